@@ -1,17 +1,85 @@
+import importlib
 import logging
+import sqlite3
 
 from flask import Flask
-from flask_migrate import Migrate
+from flask.cli import AppGroup
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
 
 from .config import get_db_uri, get_secret_key
+from .sharding import RoutingSession, init_sharding
+from .tenancy import init_tenancy, init_tenants
 
-db = SQLAlchemy()
-migrate = Migrate()
+db = SQLAlchemy(session_options={"class_": RoutingSession})
 
 
-def create_app(test_config=None):
+@event.listens_for(Engine, "connect")
+def enable_sqlite_foreign_keys(dbapi_connection, connection_record):
+    # SQLite 는 연결마다 외래 키 검사를 켜야 ON DELETE CASCADE 가 동작한다.
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
+
+# CLI 명령 이름 -> "모듈:객체". 실행하는 명령의 모듈만 import 한다.
+CLI_COMMANDS = {
+    "archive": "app.archive:archive_cli",
+    "events": "app.outbox:events_cli",
+    "filters": "app.existence:filters_cli",
+    "jobs": "app.jobs:jobs_cli",
+    "reconcile": "app.reconcile:reconcile_command",
+    "rollups": "app.rollups:rollups_cli",
+    "scheduler": "app.scheduler:scheduler_cli",
+    "shards": "app.transfers:shards_cli",
+}
+
+
+class LazyAppGroup(AppGroup):
+    """하위 명령을 처음 찾을 때 그 모듈을 import 해 등록하는 CLI 그룹.
+
+    Note:
+        `flask jobs worker` 는 app.jobs 만 불러오고, 다른 명령의 모듈은
+        불러오지 않는다. `flask --help` 처럼 목록을 보여 줄 때는 모두 불러온다.
+        "모듈:객체" 대신 명령을 반환하는 함수를 넣어도 된다.
+    """
+
+    def __init__(self, *args, lazy_commands=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.lazy_commands = dict(lazy_commands or {})
+
+    def list_commands(self, ctx):
+        return sorted({*super().list_commands(ctx), *self.lazy_commands})
+
+    def get_command(self, ctx, cmd_name):
+        target = self.lazy_commands.pop(cmd_name, None)
+        if callable(target):
+            self.add_command(target(), cmd_name)
+        elif target is not None:
+            module_name, attr = target.split(":")
+            module = importlib.import_module(module_name)
+            self.add_command(getattr(module, attr), cmd_name)
+
+        return super().get_command(ctx, cmd_name)
+
+
+def create_core_app(test_config=None):
+    """설정, DB, 모델과 CLI 명령만 갖춘 가벼운 app 을 만드는 메서드.
+
+    Note:
+        blueprint, Flask-Migrate(alembic), 로깅 핸들러, 프로파일링, 존재 확인
+        filter 를 불러오지 않으므로 백그라운드 워커, 대사 작업 같은 짧은 프로세스의
+        시작 비용이 작다. CLI 명령의 모듈은 그 명령을 실행할 때 import 한다.
+        웹 서버와 `flask db` 명령은 `create_app` 을 사용한다.
+
+    Examples:
+        $ flask --app "app:create_core_app" jobs worker
+        $ flask --app "app:create_core_app" scheduler run
+    """
     app = Flask(__name__)
+    app.cli = LazyAppGroup(app.name, lazy_commands=CLI_COMMANDS)
 
     if test_config is None:
         app.config["SQLALCHEMY_DATABASE_URI"] = get_db_uri()
@@ -20,7 +88,29 @@ def create_app(test_config=None):
     else:
         app.config.update(test_config)
 
-    # logging
+    # 세션 쿠키와 bearer 토큰을 같은 키로 서명하므로, 위조할 수 있는 키로는
+    # 시작하지 않는다.
+    from .tokens import MIN_SECRET_KEY_LENGTH, is_valid_secret_key
+
+    if not is_valid_secret_key(app.config.get("SECRET_KEY")):
+        raise RuntimeError(
+            "SECRET_KEY must be at least "
+            f"{MIN_SECRET_KEY_LENGTH} characters long."
+        )
+
+    # ORM
+    db.init_app(app)
+    init_tenants(app)
+    init_sharding(app)
+    from . import models
+
+    # background jobs: enqueue 가 작업 이름을 확인하므로 웹 서버에도 필요하다.
+    from . import tasks
+
+    return app
+
+
+def init_logging(app):
     logging.basicConfig(
         filename="app.log",
         level=logging.INFO,
@@ -32,10 +122,41 @@ def create_app(test_config=None):
     console_handler.setFormatter(formatter)
     app.logger.addHandler(console_handler)
 
-    # ORM
-    db.init_app(app)
-    migrate.init_app(app, db)
-    from . import models
+
+def init_migrate(app):
+    # alembic 을 불러오는 비용이 커서 `flask db` 명령을 실행할 때 import 한다.
+    def load_db_cli():
+        from flask_migrate import Migrate
+
+        Migrate(app, db)
+
+        return app.cli.commands["db"]
+
+    app.cli.lazy_commands["db"] = load_db_cli
+
+
+def create_app(test_config=None):
+    app = create_core_app(test_config)
+
+    # logging
+    init_logging(app)
+
+    # migration
+    init_migrate(app)
+
+    # SQL profiling
+    if app.config.get("SQL_PROFILING"):
+        from .profiling import init_profiling
+
+        init_profiling(app)
+
+    # 계좌/카드 번호 존재 확인 filter (워커는 쓰지 않는다)
+    from .existence import init_existence_filters
+
+    init_existence_filters(app)
+
+    # multi-tenant: 로그인 사용자를 불러오기 전에 tenant 를 정한다.
+    init_tenancy(app)
 
     # blueprint
     from .views import (
@@ -44,6 +165,8 @@ def create_app(test_config=None):
         accounts_views,
         cards_views,
         users_views,
+        jobs_views,
+        events_views,
     )
 
     app.register_blueprint(index_views.bp)
@@ -51,5 +174,19 @@ def create_app(test_config=None):
     app.register_blueprint(users_views.bp)
     app.register_blueprint(accounts_views.bp)
     app.register_blueprint(cards_views.bp)
+    app.register_blueprint(jobs_views.bp)
+    app.register_blueprint(events_views.bp)
+
+    # balance stream fan-out across processes
+    if app.config.get("BALANCE_STREAM_FANOUT"):
+        from .pubsub import start_outbox_fanout
+
+        start_outbox_fanout(app)
+
+    # warmup
+    if app.config.get("WARMUP_ON_START"):
+        from .warmup import warmup
+
+        warmup(app)
 
     return app
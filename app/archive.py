@@ -0,0 +1,517 @@
+"""닫힌 계좌와 오래된 잔액 변경 내역을 압축 보관 파일(cold storage)로 옮기는 모듈.
+
+Note:
+    - 보관 파일은 `ARCHIVE_DIR/<tenant>/shard-<n>/<table>/<YYYY-MM>/` 아래에
+      한 번 쓰고 고치지 않는 gzip JSON 파일이다. 행 대신 컬럼별 배열로 저장해
+      (columnar) 같은 값이 모여 잘 압축되고, 월 단위 디렉터리로 읽을 범위를 줄인다.
+    - `flask archive run` 이 `ARCHIVE_HISTORY_DAYS` 일보다 오래된 내역을 옮기고,
+      옮긴 금액은 계좌/통화별로 ArchivedHistory 에 누적한다. 잔액 대사(reconcile)는
+      원장과 이 누적 합계를 더해 확인한다.
+    - 계좌를 지우는 요청은 `close_account` 로 계좌 정보와 전체 내역을
+      ClosedAccount/ClosedAccountHistory 에 옮기고 보관 작업
+      (`archive_closed_account`)을 등록한다. 보관 파일은 작업이 워커에서 쓴다.
+    - 지운 계좌의 번호(AccountNumber)는 `flask archive run` 이
+      ArchivedAccountNumber 로 옮긴다. 번호 중복 확인은 보관 파일을 읽지 않는다.
+    - 웹/워커/보관 작업이 여러 호스트에서 돌면 ARCHIVE_DIR 은 모든 호스트가 함께
+      쓰는 저장소(NFS 등)여야 한다. 보관 내역 조회가 이 디렉터리를 읽는다.
+    - `flask rollups rebuild` 는 원장에 남은 내역만 다시 집계하므로, 보관한 기간
+      이전부터 다시 만들지 않는다.
+    - 보관 작업은 shard 마다 프로세스 하나만 실행한다.
+"""
+
+import gzip
+import json
+import os
+import uuid
+from datetime import date, datetime, timedelta, timezone
+
+import click
+from flask import current_app
+from flask.cli import AppGroup, with_appcontext
+from sqlalchemy import delete, exists, insert, literal, select
+
+from app import db
+from app.jobs import enqueue
+from app.sharding import current_partition
+
+archive_cli = AppGroup("archive", help="Cold storage for closed accounts.")
+
+HISTORY_COLUMNS = (
+    "id",
+    "account_id",
+    "account_number",
+    "card_id",
+    "amount",
+    "currency",
+    "created_at",
+)
+ACCOUNT_COLUMNS = (
+    "id",
+    "account_number",
+    "user_id",
+    "name",
+    "balances",
+    "closed_at",
+)
+
+
+def archive_dir():
+    root = current_app.config.get("ARCHIVE_DIR") or os.path.join(
+        current_app.instance_path, "archive"
+    )
+    tenant, shard = current_partition()
+
+    return os.path.join(root, tenant or "default", f"shard-{shard}")
+
+
+def _month(value):
+    return value.strftime("%Y-%m")
+
+
+def _encode(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+
+    return value
+
+
+def write_partition(table, partition, columns, rows, name=None):
+    """rows(컬럼 순서의 tuple 목록)를 보관 파일 하나로 쓰고 경로를 반환하는 메서드.
+
+    Note:
+        임시 파일에 다 쓴 뒤 이름을 바꾸므로, 읽는 쪽은 완성된 파일만 본다.
+        name 을 주면 파일 이름을 `part-<name>` 으로 정해, 다시 실행한 작업이
+        같은 파일을 덮어쓴다.
+    """
+    directory = os.path.join(archive_dir(), table, partition)
+    os.makedirs(directory, exist_ok=True)
+    if name is None:
+        now = datetime.now(timezone.utc)
+        name = f"{now:%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}"
+    path = os.path.join(directory, f"part-{name}.json.gz")
+    data = {
+        "columns": list(columns),
+        "count": len(rows),
+        "data": {
+            column: [_encode(row[i]) for row in rows]
+            for i, column in enumerate(columns)
+        },
+    }
+    tmp_path = f"{path}.tmp"
+    with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+        json.dump(data, f, separators=(",", ":"))
+    os.replace(tmp_path, path)
+
+    return path
+
+
+def read_partition(path):
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        data = json.load(f)
+
+    columns = data["columns"]
+    for values in zip(*(data["data"][column] for column in columns)):
+        yield dict(zip(columns, values))
+
+
+def partition_files(table, first=None, last=None):
+    """table 의 보관 파일 경로 목록. first/last 로 월(YYYY-MM) 범위를 좁힌다."""
+    table_dir = os.path.join(archive_dir(), table)
+    if not os.path.isdir(table_dir):
+        return []
+
+    paths = []
+    for partition in sorted(os.listdir(table_dir)):
+        if first is not None and partition < first:
+            continue
+        if last is not None and partition > last:
+            continue
+
+        partition_dir = os.path.join(table_dir, partition)
+        paths.extend(
+            os.path.join(partition_dir, name)
+            for name in sorted(os.listdir(partition_dir))
+            if name.endswith(".json.gz")
+        )
+
+    return paths
+
+
+def remove_partitions(paths):
+    for path in paths:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def _write_history(rows, name=None):
+    by_month = {}
+    for row in rows:
+        by_month.setdefault(_month(row.created_at), []).append(row)
+
+    return [
+        write_partition("history", month, HISTORY_COLUMNS, month_rows, name)
+        for month, month_rows in sorted(by_month.items())
+    ]
+
+
+def _history_query():
+    from app.models import Account, AccountHistory
+
+    return (
+        select(
+            AccountHistory.id,
+            AccountHistory.account_id,
+            Account.account_number,
+            AccountHistory.card_id,
+            AccountHistory.amount,
+            AccountHistory.currency,
+            AccountHistory.created_at,
+        )
+        .join(Account, Account.id == AccountHistory.account_id)
+        .order_by(AccountHistory.id)
+    )
+
+
+def _add_archived_totals(rows, until):
+    from app.models import ArchivedHistory
+
+    totals = {}
+    for row in rows:
+        total = totals.setdefault((row.account_id, row.currency), [0, 0])
+        total[0] += 1
+        total[1] += row.amount
+
+    for (account_id, currency), (count, amount) in totals.items():
+        archived = db.session.get(ArchivedHistory, (account_id, currency))
+        if archived is None:
+            archived = ArchivedHistory(
+                account_id=account_id, currency=currency, count=0, amount=0
+            )
+            db.session.add(archived)
+        archived.count += count
+        archived.amount += amount
+        archived.archived_until = until
+
+
+def archive_history(before, batch_size=10000):
+    """before 이전의 잔액 변경 내역을 보관 파일로 옮기는 메서드.
+
+    Note:
+        id 순으로 batch_size 개씩 보관 파일을 쓰고, 같은 트랜잭션에서 누적 합계를
+        더하고 원장 행을 지운다. commit 에 실패하면 방금 쓴 파일을 지운다.
+
+    Returns:
+        int: 옮긴 내역 수.
+    """
+    from app.models import AccountHistory
+
+    moved = 0
+    while True:
+        rows = db.session.execute(
+            _history_query()
+            .where(AccountHistory.created_at < before)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            break
+
+        paths = _write_history(rows)
+        try:
+            _add_archived_totals(rows, before)
+            # 가장 작은 id 부터 읽었으므로 이 범위의 오래된 행이 곧 이번 batch 이다.
+            db.session.execute(
+                delete(AccountHistory).where(
+                    AccountHistory.id <= rows[-1].id,
+                    AccountHistory.created_at < before,
+                )
+            )
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            remove_partitions(paths)
+            raise
+
+        moved += len(rows)
+
+    return moved
+
+
+def close_account(account):
+    """지울 계좌의 정보와 전체 내역을 옮겨 두고 보관 작업을 등록하는 메서드.
+
+    Note:
+        계좌를 지우기 전에 같은 트랜잭션에서 호출한다. 내역은 계좌를 지울 때
+        DB 에서 함께 지워지므로 INSERT ... SELECT 로 ClosedAccountHistory 에
+        먼저 복사한다. commit 은 호출한 쪽에서 수행한다.
+
+    Returns:
+        Job: 등록한 보관 작업.
+    """
+    from app.models import AccountHistory, ClosedAccount, ClosedAccountHistory
+
+    closed = ClosedAccount(
+        account_id=account.id,
+        account_number=account.account_number,
+        user_id=account.user_id,
+        name=account.name,
+        balances=account.get_balances(),
+    )
+    db.session.add(closed)
+    db.session.flush()
+    db.session.execute(
+        insert(ClosedAccountHistory).from_select(
+            [
+                "id",
+                "closed_account_id",
+                "account_id",
+                "card_id",
+                "amount",
+                "currency",
+                "created_at",
+            ],
+            select(
+                AccountHistory.id,
+                literal(closed.id),
+                AccountHistory.account_id,
+                AccountHistory.card_id,
+                AccountHistory.amount,
+                AccountHistory.currency,
+                AccountHistory.created_at,
+            ).where(AccountHistory.account_id == account.id),
+        )
+    )
+
+    return enqueue(
+        "archive_closed_account",
+        owner_id=account.user_id,
+        closed_account_id=closed.id,
+    )
+
+
+def archive_closed_account(closed_account_id):
+    """`close_account` 로 옮겨 둔 계좌 정보와 내역을 보관 파일로 쓰는 메서드.
+
+    Note:
+        파일을 쓴 뒤 옮겨 둔 행을 지우고 commit 하며, commit 에 실패하면 쓴
+        파일을 지운다. 파일 이름은 다시 쓰지 않는 계좌 번호로 정하므로, 파일을
+        쓰다 멈춘 작업을 다시 실행해도 같은 파일을 덮어쓴다.
+
+    Returns:
+        int: 보관한 내역 수. 이미 보관한 계좌이면 0.
+    """
+    from app.models import ClosedAccount, ClosedAccountHistory
+
+    closed = db.session.get(ClosedAccount, closed_account_id)
+    if closed is None:
+        return 0
+
+    rows = db.session.execute(
+        select(
+            ClosedAccountHistory.id,
+            ClosedAccountHistory.account_id,
+            literal(closed.account_number).label("account_number"),
+            ClosedAccountHistory.card_id,
+            ClosedAccountHistory.amount,
+            ClosedAccountHistory.currency,
+            ClosedAccountHistory.created_at,
+        )
+        .where(ClosedAccountHistory.closed_account_id == closed.id)
+        .order_by(ClosedAccountHistory.id)
+    ).all()
+    name = f"account-{closed.account_number}"
+    paths = _write_history(rows, name)
+    paths.append(
+        write_partition(
+            "accounts",
+            _month(closed.closed_at),
+            ACCOUNT_COLUMNS,
+            [
+                (
+                    closed.account_id,
+                    closed.account_number,
+                    closed.user_id,
+                    closed.name,
+                    closed.balances,
+                    closed.closed_at,
+                )
+            ],
+            name,
+        )
+    )
+
+    try:
+        db.session.execute(
+            delete(ClosedAccountHistory).where(
+                ClosedAccountHistory.closed_account_id == closed.id
+            )
+        )
+        db.session.delete(closed)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        remove_partitions(paths)
+        raise
+
+    return len(rows)
+
+
+def read_history(account_number, start=None, end=None):
+    """보관된 계좌 번호의 내역을 [start, end] 날짜 범위로 읽는 메서드.
+
+    Returns:
+        list[dict]: created_at 순 내역. created_at 은 ISO 형식 문자열이다.
+    """
+    rows = []
+    for path in partition_files(
+        "history", start and _month(start), end and _month(end)
+    ):
+        for row in read_partition(path):
+            if row["account_number"] != account_number:
+                continue
+
+            day = row["created_at"][:10]
+            if start is not None and day < start.isoformat():
+                continue
+            if end is not None and day > end.isoformat():
+                continue
+
+            rows.append(row)
+
+    rows.sort(key=lambda row: (row["created_at"], row["id"]))
+
+    return rows
+
+
+def _legacy_numbers_path():
+    # 예전에 계좌 번호를 보관 파일로 옮길 때 쓰던 Bloom filter 파일
+    return os.path.join(archive_dir(), "account_numbers.bloom")
+
+
+def import_legacy_account_numbers():
+    """예전에 보관 파일로 옮긴 계좌 번호를 ArchivedAccountNumber 로 옮기는 메서드.
+
+    Returns:
+        int: 새로 넣은 계좌 번호 수.
+    """
+    from app.models import ArchivedAccountNumber, insert_or_ignore
+
+    paths = partition_files("account_numbers")
+    imported = 0
+    for path in paths:
+        numbers = [row["number"] for row in read_partition(path)]
+        if numbers:
+            imported += db.session.execute(
+                insert_or_ignore(ArchivedAccountNumber, ["number"]).values(
+                    [{"number": number} for number in numbers]
+                )
+            ).rowcount
+    db.session.commit()
+
+    remove_partitions(paths + [_legacy_numbers_path()])
+
+    return imported
+
+
+def account_number_archived(account_number):
+    """계좌 번호가 지운 계좌의 (ArchivedAccountNumber 로 옮긴) 번호이면 True.
+
+    Note:
+        `flask archive run` 이 예전 보관 파일의 번호를 옮기기 전까지는 그 파일도
+        읽는다.
+    """
+    from app.models import ArchivedAccountNumber
+
+    if db.session.get(ArchivedAccountNumber, account_number) is not None:
+        return True
+
+    return any(
+        row["number"] == account_number
+        for path in partition_files("account_numbers")
+        for row in read_partition(path)
+    )
+
+
+def archive_account_numbers(batch_size=10000):
+    """지운 계좌의 번호(AccountNumber)를 ArchivedAccountNumber 로 옮기는 메서드.
+
+    Note:
+        옮기기와 지우기를 한 트랜잭션에서 하므로 번호 중복 확인이 옮기는 중인
+        번호를 놓치지 않는다.
+
+    Returns:
+        int: 옮긴 계좌 번호 수.
+    """
+    from app.models import (
+        Account,
+        AccountNumber,
+        ArchivedAccountNumber,
+        insert_or_ignore,
+    )
+
+    moved = 0
+    while True:
+        numbers = (
+            db.session.execute(
+                select(AccountNumber.number)
+                .where(
+                    ~exists().where(
+                        Account.account_number == AccountNumber.number
+                    )
+                )
+                .order_by(AccountNumber.number)
+                .limit(batch_size)
+            )
+            .scalars()
+            .all()
+        )
+        if not numbers:
+            break
+
+        db.session.execute(
+            insert_or_ignore(ArchivedAccountNumber, ["number"]).values(
+                [{"number": number} for number in numbers]
+            )
+        )
+        db.session.execute(
+            delete(AccountNumber).where(AccountNumber.number.in_(numbers))
+        )
+        db.session.commit()
+        moved += len(numbers)
+
+    return moved
+
+
+@archive_cli.command("run")
+@click.option(
+    "--older-than-days",
+    type=int,
+    default=None,
+    help="Archive history older than this. [default: ARCHIVE_HISTORY_DAYS]",
+)
+@with_appcontext
+def run_command(older_than_days):
+    """Move old history and closed account numbers to cold storage."""
+    if older_than_days is None:
+        older_than_days = current_app.config.get("ARCHIVE_HISTORY_DAYS", 365)
+    before = datetime.now(timezone.utc) - timedelta(days=older_than_days)
+
+    history = archive_history(before)
+    numbers = import_legacy_account_numbers() + archive_account_numbers()
+    click.echo(
+        f"Archived {history} history rows and {numbers} account numbers."
+    )
+
+
+@archive_cli.command("history")
+@click.argument("account_number")
+@click.option("--from", "start", type=click.DateTime(formats=["%Y-%m-%d"]))
+@click.option("--to", "end", type=click.DateTime(formats=["%Y-%m-%d"]))
+@with_appcontext
+def history_command(account_number, start, end):
+    """Print archived history of an account as JSON lines."""
+    for row in read_history(
+        account_number, start and start.date(), end and end.date()
+    ):
+        click.echo(json.dumps(row))
@@ -0,0 +1,166 @@
+import fcntl
+import hashlib
+import math
+import mmap
+import os
+import struct
+
+# 파일 헤더: 비트 수, 해시 함수 수, 넣은 키 수, 용량, mark
+HEADER = struct.Struct("<QIQQQ")
+COUNT = struct.Struct("<Q")
+COUNT_OFFSET = struct.calcsize("<QI")
+MARK_OFFSET = struct.calcsize("<QIQQ")
+# mark 를 넣기 전의 헤더. `BloomFilter.load` 는 이 형식의 파일도 읽는다.
+LEGACY_HEADER = struct.Struct("<QIQQ")
+
+
+class BloomFilter:
+    """키가 "없다" 는 것을 DB 조회 없이 확실히 알려 주는 확률적 집합.
+
+    Note:
+        `key in bloom` 이 False 이면 넣은 적 없는 키이고, True 이면 넣었을 수도
+        있는 키이다 (오탐률은 용량 이하로 넣었을 때 error_rate 정도).
+        키를 뺄 수는 없으므로 지운 키는 계속 "있을 수도 있는" 키로 남는다.
+        해시는 blake2b 하나에서 두 값을 얻어 k 개의 위치를 만든다 (double hashing).
+        mark 는 filter 를 쓰는 쪽이 DB 와 맞춰 보려고 함께 저장하는 값이다.
+
+    Examples:
+        >>> bloom = BloomFilter.for_capacity(1000)
+        >>> bloom.add("5555110000001")
+        >>> "5555110000001" in bloom
+        True
+        >>> "5555110000002" in bloom
+        False
+    """
+
+    __slots__ = ("size", "hashes", "count", "capacity", "mark", "bits")
+
+    def __init__(self, size, hashes, count=0, capacity=0, mark=0, bits=None):
+        self.size = size
+        self.hashes = hashes
+        self.count = count
+        self.capacity = capacity
+        self.mark = mark
+        self.bits = bits if bits is not None else bytearray((size + 7) // 8)
+
+    @classmethod
+    def for_capacity(cls, capacity, error_rate=0.01):
+        """capacity 개를 넣었을 때 오탐률이 error_rate 가 되는 크기로 만드는 메서드."""
+        capacity = max(capacity, 1)
+        size = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        hashes = max(1, round(size / capacity * math.log(2)))
+
+        return cls(size, hashes, capacity=capacity)
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, key):
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def update(self, keys):
+        for key in keys:
+            self.add(key)
+
+    def __contains__(self, key):
+        return all(
+            self.bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(key)
+        )
+
+    def save(self, path):
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(
+                HEADER.pack(
+                    self.size,
+                    self.hashes,
+                    self.count,
+                    self.capacity,
+                    self.mark,
+                )
+            )
+            f.write(self.bits)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            data = f.read()
+
+        size = LEGACY_HEADER.unpack_from(data)[0]
+        header = HEADER
+        if len(data) == LEGACY_HEADER.size + (size + 7) // 8:
+            header = LEGACY_HEADER
+
+        return cls(
+            *header.unpack_from(data), bits=bytearray(data[header.size :])
+        )
+
+
+class MappedBloomFilter(BloomFilter):
+    """`BloomFilter.save` 로 쓴 파일을 mmap 으로 열어 여러 프로세스가 공유하는 filter.
+
+    Note:
+        비트와 헤더의 키 수를 파일에 바로 쓰므로, 한 워커가 넣은 키를 다른 워커도
+        곧바로 본다. 조회는 잠그지 않고, 넣을 때만 파일을 새로 열어 flock 으로
+        잠근다 (fork 한 워커끼리도 서로 배제된다). 비트는 켜지기만 하므로 잠그지
+        않은 조회가 넣는 중인 키를 못 볼 수는 있어도, 넣기 전부터 있던 키를
+        놓치지는 않는다.
+        파일 크기가 헤더와 맞지 않으면(헤더 형식이 다른 파일) ValueError 를 낸다.
+    """
+
+    __slots__ = ("path", "inode", "_map")
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "r+b") as f:
+            self.inode = os.fstat(f.fileno()).st_ino
+            self._map = mmap.mmap(f.fileno(), 0)
+        self.size, self.hashes, _, self.capacity, _ = HEADER.unpack_from(
+            self._map
+        )
+        if len(self._map) != HEADER.size + (self.size + 7) // 8:
+            self._map.close()
+            raise ValueError(f"{path} is not a Bloom filter file")
+        self.bits = memoryview(self._map)[HEADER.size :]
+
+    @property
+    def count(self):
+        return COUNT.unpack_from(self._map, COUNT_OFFSET)[0]
+
+    @count.setter
+    def count(self, count):
+        COUNT.pack_into(self._map, COUNT_OFFSET, count)
+
+    @property
+    def mark(self):
+        return COUNT.unpack_from(self._map, MARK_OFFSET)[0]
+
+    @mark.setter
+    def mark(self, mark):
+        COUNT.pack_into(self._map, MARK_OFFSET, mark)
+
+    def add_mark(self, amount):
+        with open(self.path, "rb") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            self.mark += amount
+
+    def add(self, key):
+        self.update((key,))
+
+    def update(self, keys):
+        with open(self.path, "rb") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            for key in keys:
+                BloomFilter.add(self, key)
+
+    def close(self):
+        self.bits.release()
+        self._map.close()
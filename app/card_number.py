@@ -0,0 +1,141 @@
+"""카드 번호 검증, 발급사(BIN) 라우팅, 조회용 해시를 모아 둔 모듈.
+
+Note:
+    - Luhn 검사는 자리별 가중치 결과를 미리 계산한 표로 한 자리당 표 조회 한 번에 끝낸다.
+    - 발급사는 `CARD_BINS` 설정의 BIN 접두사로 만든 trie 에서 가장 긴 접두사로 찾는다.
+    - 카드 번호 조회는 평문이 아니라 HMAC 해시 컬럼의 인덱스로 한다.
+    - 평문은 저장하지 않고 해시와 마지막 4자리만 저장하며, 응답과 로그에는
+      가린 번호(`mask_card_number`)만 남긴다.
+"""
+
+import hashlib
+import hmac
+
+from flask import current_app
+
+CARD_NUMBER_LENGTH = 16
+
+# _LUHN_TABLE[자리 위치 % 2][숫자]: 오른쪽에서 짝수 번째 자리는 두 배 후 자릿수 합.
+_LUHN_TABLE = (
+    tuple(range(10)),
+    tuple(sum(divmod(digit * 2, 10)) for digit in range(10)),
+)
+
+
+def luhn_checksum(number):
+    """Luhn 합계를 10 으로 나눈 나머지. 올바른 번호는 0 이다."""
+    total = 0
+    for position, char in enumerate(reversed(number)):
+        total += _LUHN_TABLE[position & 1][ord(char) - 48]
+
+    return total % 10
+
+
+def luhn_check_digit(partial):
+    """검증 숫자를 뺀 번호에 붙일 Luhn 검증 숫자를 계산하는 메서드.
+
+    Examples:
+        >>> luhn_check_digit("411111111111111")
+        '1'
+    """
+    return str((10 - luhn_checksum(partial + "0")) % 10)
+
+
+def is_luhn_valid(number):
+    return luhn_checksum(number) == 0
+
+
+class BinTrie:
+    """BIN 접두사 -> 발급사 매핑을 담는 trie.
+
+    Note:
+        번호 앞자리부터 한 글자씩 내려가며 마지막으로 만난 발급사를 돌려주므로,
+        "55" 와 "555511" 이 함께 등록되어 있으면 더 긴 "555511" 이 우선한다.
+    """
+
+    __slots__ = ("_root",)
+
+    def __init__(self, bins=None):
+        self._root = {}
+        for prefix, issuer in (bins or {}).items():
+            self.insert(prefix, issuer)
+
+    def insert(self, prefix, issuer):
+        node = self._root
+        for char in prefix:
+            node = node.setdefault(char, {})
+        node[None] = issuer
+
+    def match(self, number):
+        node = self._root
+        issuer = None
+        for char in number:
+            node = node.get(char)
+            if node is None:
+                break
+            issuer = node.get(None, issuer)
+
+        return issuer
+
+
+def get_bin_trie():
+    """현재 app 의 `CARD_BINS` 설정으로 만든 trie 를 돌려주는 메서드 (app 마다 한 번 생성)."""
+    trie = current_app.extensions.get("bin_trie")
+    if trie is None:
+        trie = BinTrie(current_app.config.get("CARD_BINS"))
+        current_app.extensions["bin_trie"] = trie
+
+    return trie
+
+
+def get_issuer(card_number):
+    return get_bin_trie().match(card_number)
+
+
+def validate_card_number(card_number):
+    """카드 번호 형식을 확인하고, 잘못된 경우 오류 메시지를 반환하는 메서드.
+
+    Returns:
+        str | None: 오류 메시지. 올바른 번호이면 None.
+    """
+    if not card_number:
+        return "Card number is required."
+
+    if (
+        not isinstance(card_number, str)
+        or len(card_number) != CARD_NUMBER_LENGTH
+        or not (card_number.isascii() and card_number.isdigit())
+    ):
+        return "Card number should be 16 digits."
+
+    if not is_luhn_valid(card_number):
+        return "Card number is invalid."
+
+    return None
+
+
+def hash_card_number(card_number):
+    """카드 번호 조회 인덱스에 저장할 HMAC-SHA256 값.
+
+    Note:
+        키는 `CARD_NUMBER_HASH_KEY` 설정을, 없으면 SECRET_KEY 를 사용한다.
+        키가 바뀌면 저장된 해시를 다시 계산해야 한다.
+    """
+    key = (
+        current_app.config.get("CARD_NUMBER_HASH_KEY")
+        or current_app.config["SECRET_KEY"]
+    )
+
+    return hmac.new(
+        key.encode(), card_number.encode(), hashlib.sha256
+    ).hexdigest()
+
+
+def mask_card_number(card_number):
+    """마지막 4자리만 남기고 가린 카드 번호.
+
+    Examples:
+        >>> mask_card_number("5555110000000005")
+        '************0005'
+    """
+    return "*" * (CARD_NUMBER_LENGTH - 4) + card_number[-4:]
@@ -1,32 +1,263 @@
 from abc import ABC, abstractmethod
+from enum import Enum as PyEnum
+
+from app.limits import (
+    check_withdrawal_limit,
+    record_withdrawal,
+    release_withdrawal,
+)
+from app.money import fx_rates
+
+
+class CardStatus(PyEnum):
+    ENABLED = "ENABLED"
+    DISABLED = "DISABLED"
+    FROZEN = "FROZEN"
+    EXPIRED = "EXPIRED"
+    LIMITED = "LIMITED"
+
+
+class CardStateError(ValueError):
+    """허용되지 않는 카드 상태 변경."""
+
+
+# 상태별로 바꿀 수 있는 다음 상태.
+# 만료된 카드는 다시 쓸 수 없다. 동결(분실 신고 등)과 제한은 은행이 거는 상태이므로
+# 활성화/비활성화로 풀 수 없고, 만료(동결은 제한도)로만 바꿀 수 있다.
+ALLOWED_TRANSITIONS = {
+    CardStatus.ENABLED: frozenset(
+        {
+            CardStatus.DISABLED,
+            CardStatus.FROZEN,
+            CardStatus.EXPIRED,
+            CardStatus.LIMITED,
+        }
+    ),
+    CardStatus.DISABLED: frozenset(
+        {
+            CardStatus.ENABLED,
+            CardStatus.FROZEN,
+            CardStatus.EXPIRED,
+            CardStatus.LIMITED,
+        }
+    ),
+    CardStatus.FROZEN: frozenset({CardStatus.EXPIRED}),
+    CardStatus.EXPIRED: frozenset(),
+    CardStatus.LIMITED: frozenset({CardStatus.FROZEN, CardStatus.EXPIRED}),
+}
+
+
+def can_change_state(current: CardStatus, new: CardStatus) -> bool:
+    """current 상태의 카드를 new 상태로 바꿀 수 있으면 True.
+
+    Note:
+        아직 flush 되지 않아 상태 값이 없는 카드는 기본값인 DISABLED 로 취급한다.
+    """
+    if current is None:
+        current = CardStatus.DISABLED
+
+    return new in ALLOWED_TRANSITIONS[current]
+
+
+def allowed_from(new: CardStatus) -> list:
+    """new 상태로 바꿀 수 있는 현재 상태 목록 (bulk UPDATE 의 조건용).
+
+    Examples:
+        >>> allowed_from(CardStatus.ENABLED)
+        [<CardStatus.DISABLED: 'DISABLED'>]
+    """
+    return [
+        current
+        for current, targets in ALLOWED_TRANSITIONS.items()
+        if new in targets
+    ]
 
 
 class CardState(ABC):
+    """카드 상태별 행위(인출 및 입금)를 정의하는 전략 객체.
+
+    Note:
+        상태 객체는 내부 상태를 갖지 않으므로 상태마다 하나의 인스턴스만 만들어
+        `get_card_state` 로 공유한다. 카드마다, 호출마다 새로 생성할 필요가 없다.
+    """
+
+    __slots__ = ()
+
     @abstractmethod
-    def withdraw(self):
+    def withdraw(
+        self,
+        card: "app.models.Card",
+        account: "app.models.Account",
+        amount: "app.money.Money",
+    ):
         pass
 
     @abstractmethod
-    def deposit(self):
+    def deposit(
+        self,
+        card: "app.models.Card",
+        account: "app.models.Account",
+        amount: "app.money.Money",
+    ):
         pass
 
 
 class Enabled(CardState):
-    def withdraw(self, account: "app.models.Account", amount: int):
-        if account.balance >= amount:
-            account.balance -= amount
-            return True, f"Withdrawing {amount} from active card."
-        else:
+    __slots__ = ()
+
+    def withdraw(
+        self,
+        card: "app.models.Card",
+        account: "app.models.Account",
+        amount: "app.money.Money",
+    ):
+        error = check_withdrawal_limit(card, account, amount)
+        if error is None:
+            error = record_withdrawal(card, account, amount)
+        if error is not None:
+            return False, error
+
+        if not account.move_balance(-amount, card):
+            release_withdrawal(card, account, amount)
             return False, "FAILED: Insufficient balance for withdrawal."
 
-    def deposit(self, account: "app.models.Account", amount: int):
-        account.balance += amount
-        return f"Depositing {amount} to active card."
+        return True, f"Withdrawing {amount.amount} from active card."
+
+    def deposit(
+        self,
+        card: "app.models.Card",
+        account: "app.models.Account",
+        amount: "app.money.Money",
+    ):
+        account.move_balance(amount, card)
+        return True, f"Depositing {amount.amount} to active card."
 
 
 class Disabled(CardState):
-    def withdraw(self, account: "app.models.Account", amount: int):
-        return "Cannot withdraw. Card is blocked."
+    __slots__ = ()
+
+    def withdraw(
+        self,
+        card: "app.models.Card",
+        account: "app.models.Account",
+        amount: "app.money.Money",
+    ):
+        return False, "Cannot withdraw. Card is blocked."
+
+    def deposit(
+        self,
+        card: "app.models.Card",
+        account: "app.models.Account",
+        amount: "app.money.Money",
+    ):
+        return False, "Cannot deposit. Card is blocked."
+
+
+class Frozen(CardState):
+    """출금만 막고 입금은 허용하는 상태 (분실 신고 등)."""
+
+    __slots__ = ()
+
+    def withdraw(
+        self,
+        card: "app.models.Card",
+        account: "app.models.Account",
+        amount: "app.money.Money",
+    ):
+        return False, "Cannot withdraw. Card is frozen."
+
+    def deposit(
+        self,
+        card: "app.models.Card",
+        account: "app.models.Account",
+        amount: "app.money.Money",
+    ):
+        account.move_balance(amount, card)
+        return True, f"Depositing {amount.amount} to frozen card."
+
+
+class Expired(CardState):
+    __slots__ = ()
+
+    def withdraw(
+        self,
+        card: "app.models.Card",
+        account: "app.models.Account",
+        amount: "app.money.Money",
+    ):
+        return False, "Cannot withdraw. Card is expired."
+
+    def deposit(
+        self,
+        card: "app.models.Card",
+        account: "app.models.Account",
+        amount: "app.money.Money",
+    ):
+        return False, "Cannot deposit. Card is expired."
+
+
+class Limited(CardState):
+    """1회 인출 금액이 기준 통화로 `MAX_WITHDRAWAL_AMOUNT` 로 제한되는 상태."""
+
+    __slots__ = ()
+
+    MAX_WITHDRAWAL_AMOUNT = 100000
+
+    def withdraw(
+        self,
+        card: "app.models.Card",
+        account: "app.models.Account",
+        amount: "app.money.Money",
+    ):
+        if fx_rates.to_base(amount).amount > self.MAX_WITHDRAWAL_AMOUNT:
+            return (
+                False,
+                "FAILED: Limited card cannot withdraw more than "
+                f"{self.MAX_WITHDRAWAL_AMOUNT} at once.",
+            )
+
+        error = check_withdrawal_limit(card, account, amount)
+        if error is None:
+            error = record_withdrawal(card, account, amount)
+        if error is not None:
+            return False, error
+
+        if not account.move_balance(-amount, card):
+            release_withdrawal(card, account, amount)
+            return False, "FAILED: Insufficient balance for withdrawal."
+
+        return True, f"Withdrawing {amount.amount} from limited card."
+
+    def deposit(
+        self,
+        card: "app.models.Card",
+        account: "app.models.Account",
+        amount: "app.money.Money",
+    ):
+        account.move_balance(amount, card)
+        return True, f"Depositing {amount.amount} to limited card."
+
+
+CARD_STATES = {
+    CardStatus.ENABLED: Enabled(),
+    CardStatus.DISABLED: Disabled(),
+    CardStatus.FROZEN: Frozen(),
+    CardStatus.EXPIRED: Expired(),
+    CardStatus.LIMITED: Limited(),
+}
+
+
+def get_card_state(status: CardStatus) -> CardState:
+    """카드 상태 값에 해당하는 상태 객체를 반환하는 메서드.
+
+    Note:
+        아직 flush 되지 않아 상태 값이 없는 카드는 기본값인 DISABLED 로 취급한다.
+
+    Examples:
+        >>> get_card_state(CardStatus.ENABLED)
+        <app.card_state.Enabled object at ...>
+    """
+    if status is None:
+        status = CardStatus.DISABLED
 
-    def deposit(self, account: "app.models.Account", amount: int):
-        return "Cannot deposit. Card is blocked."
+    return CARD_STATES[status]
@@ -7,6 +7,121 @@ ROOT_DIR = os.path.dirname(BASE_DIR)
 SQLALCHEMY_TRACK_MODIFICATIONS = False
 BANK_ID = "555511"
 
+# 같은 배포에서 운영하는 다른 은행들. 은행마다 별도 DB 와 커넥션 풀을 쓰며,
+# 요청의 X-Bank-Id 헤더(bank_id) 또는 Host 로 은행을 고른다. 예:
+# TENANTS = {
+#     "acme": {
+#         "bank_id": "777711",
+#         "database_uri": "postgresql://.../acme",
+#         "hosts": ["acme.example.com"],
+#         "pool_size": 5,
+#         "max_overflow": 5,
+#         "pool_timeout": 5,
+#     },
+# }
+TENANTS = {}
+# CLI 워커(scheduler, jobs, events sink, reconcile, rollups)가 처리할 은행
+# (TENANTS 의 key). 설정하지 않으면 기본 DB 를 처리한다.
+TENANT = os.environ.get("TENANT")
+
+# 사용자 기준 수평 분할. 기본 DB 가 shard 0 이고 여기 적은 DB 가 shard 1, 2,
+# ... 이다. 계좌 번호로 shard 를 찾으므로 운영 중에는 개수를 바꿀 수 없다.
+# 처음 켤 때는 서비스를 시작하기 전에 `flask shards directory` 로 기존 사용자와
+# 카드를 전역 목록에 넣는다.
+# 예: SHARDS = ["sqlite:///shard1.db", "sqlite:///shard2.db"]
+SHARDS = []
+# CLI 워커(scheduler, jobs, events sink)가 처리할 shard
+SHARD_INDEX = int(os.environ.get("SHARD_INDEX", 0))
+BULK_CARD_REGISTRATION_LIMIT = 1000
+
+# 카드 BIN(앞자리) 별 발급사. 가장 긴 접두사가 우선한다.
+CARD_BINS = {
+    "4": "visa",
+    "51": "mastercard",
+    "52": "mastercard",
+    "53": "mastercard",
+    "54": "mastercard",
+    "55": "mastercard",
+    "34": "amex",
+    "37": "amex",
+    BANK_ID: "bering",
+}
+# 카드 번호 조회 해시의 HMAC 키 (None 이면 SECRET_KEY 사용)
+CARD_NUMBER_HASH_KEY = os.environ.get("CARD_NUMBER_HASH_KEY")
+
+# 환율표를 DB 에서 다시 읽는 주기(초)
+FX_RATES_TTL = 300
+
+# 변경 이벤트(/events) 소비자용 API 키 (None 이면 비활성)
+EVENTS_API_KEY = os.environ.get("EVENTS_API_KEY")
+EVENTS_SSE_KEEPALIVE = 15
+# outbox id 는 commit 순서와 다를 수 있어, 빈 id 뒤의 이벤트는 그 id 가
+# commit 되거나 이 시간(초)이 지나 롤백된 것으로 볼 때까지 보류한다.
+OUTBOX_GAP_TIMEOUT = 10
+
+# 잔액 스트림(/accounts/<id>/balance/stream): 여러 프로세스로 띄울 때는
+# FANOUT 을 켜서 outbox 를 통해 다른 프로세스의 잔액 변경도 받는다.
+BALANCE_STREAM_FANOUT = False
+BALANCE_STREAM_KEEPALIVE = 15
+
+# 입출금 요약(/accounts/<id>/summary) 한 번에 조회할 수 있는 최대 일수
+SUMMARY_MAX_DAYS = 366
+
+# 백그라운드 작업 임대(lease) 시간(초). 실행 중인 워커가 이 시간 안에 연장하지
+# 못한(죽은) RUNNING 작업은 다른 워커가 다시 가져가며, JOB_MAX_ATTEMPTS 번
+# 가져간 작업은 FAILED 로 끝낸다.
+JOB_LEASE_SECONDS = 300
+JOB_MAX_ATTEMPTS = 3
+
+# 보관(cold storage): 이 일수보다 오래된 잔액 변경 내역을 `flask archive run` 이
+# 압축 파일로 옮긴다. ARCHIVE_DIR 이 None 이면 instance/archive 를 쓴다.
+# 여러 호스트에서 돌면 모든 웹/워커 호스트가 함께 쓰는 저장소여야 한다.
+ARCHIVE_DIR = os.environ.get("ARCHIVE_DIR")
+ARCHIVE_HISTORY_DAYS = 365
+
+# 계좌 번호/카드 번호 존재 확인 앞의 Bloom filter. 파일은 EXISTENCE_FILTER_DIR
+# (None 이면 instance/filters) 에 두고 워커들이 mmap 으로 공유한다.
+# 모든 웹 워커에서 같이 켜거나 꺼야 한다.
+EXISTENCE_FILTERS = True
+EXISTENCE_FILTER_DIR = os.environ.get("EXISTENCE_FILTER_DIR")
+EXISTENCE_FILTER_CAPACITY = 1000000
+EXISTENCE_FILTER_ERROR_RATE = 0.01
+# DB 의 키 INSERT 수를 다시 읽는 간격(초). 다른 호스트가 넣은 키는 이 시간
+# 동안 없다고 답할 수 있다.
+EXISTENCE_FILTER_CHECK_INTERVAL = 1
+
+# 인출 한도 (None 이면 검사하지 않음)
+WITHDRAWAL_LIMIT_PER_TRANSACTION = 1000000
+CARD_DAILY_WITHDRAWAL_LIMIT = 3000000
+ACCOUNT_DAILY_WITHDRAWAL_LIMIT = 5000000
+CARD_WITHDRAWAL_VELOCITY_LIMIT = 10
+
+# 요청 빈도 제한: (허용 횟수, 기간(초))
+LOGIN_RATE_LIMIT_PER_IP = (20, 60)
+LOGIN_RATE_LIMIT_PER_EMAIL = (5, 60)
+# 출금 한도는 (사용자, 카드) 마다 센다.
+WITHDRAW_RATE_LIMIT_PER_CARD = (10, 60)
+# 계좌 이체는 (사용자, 계좌) 마다 센다.
+TRANSFER_RATE_LIMIT_PER_ACCOUNT = (10, 60)
+
+# bearer 토큰 유효 시간(초)
+AUTH_TOKEN_TTL = 3600
+# 다른 워커에서 폐기한 토큰을 DB 에서 다시 읽는 주기(초). 폐기된 토큰은 늦어도
+# 이 시간 안에 모든 워커에서 거절된다.
+TOKEN_REVOCATION_TTL = 5
+
+# SQL 프로파일링: 응답 헤더는 개발 환경에서만 켜고, 운영에서는 샘플링한 요청의
+# 느린 쿼리/중복 쿼리만 로그로 남긴다. 모든 문장에 리스너가 붙으므로 기본은 끈다.
+SQL_PROFILING = False
+SQL_PROFILING_HEADERS = False
+SQL_PROFILING_SAMPLE_RATE = 0.01
+SQL_SLOW_QUERY_MS = 100
+
+# 워커 시작 시 커넥션/컴파일 캐시 준비 (gunicorn preload_app 사용 시에는 끄고
+# app.warmup.post_fork 를 사용)
+WARMUP_ON_START = True
+WARMUP_CONNECTIONS = 5
+
 def get_db_uri():
     protocol = os.getenv("db_protocol","")
     db_name = os.getenv("db_name","")
@@ -0,0 +1,373 @@
+"""여러 shard 로 나눈 경우 shard 0 에 두는 사용자/카드 전역 목록 모듈.
+
+Note:
+    - shard 를 켜기 전에 만든 사용자는 모두 shard 0 에 있어 id 나 이메일로 shard 를
+      계산할 수 없으므로, 사용자의 shard 는 `UserShard` 에서 찾는다. 로그인할 때
+      이메일로 한 번 찾고 세션과 토큰에 shard 를 넣어, 요청마다 찾지 않는다.
+    - user_id 도 이 목록에서 매기므로 shard 가 달라도 겹치지 않는다.
+    - 카드 번호의 UNIQUE 제약은 shard 안에서만 동작하므로, 카드를 등록하기 전에
+      `CardShard` 에 카드 번호 해시를 넣어 전체에서 중복을 막는다.
+    - 다른 사용자의 계좌로 이체할 때는 계좌 번호로 `AccountShard` 에서 shard 를
+      찾는다. 계좌를 만들기 전에 번호를 넣으므로 shard 를 켜기 전에 만든 계좌의
+      번호와도 겹치지 않는다.
+    - 목록은 사용자/카드를 만들기 전에 commit 하므로, 만들다 실패했거나 계좌와
+      함께 지워진 카드의 행이 남을 수 있다. 다른 shard 가 같은 이메일/카드 번호를
+      등록하려 하면 행의 shard 에 실제로 있는지 확인하고, 없으면 넘겨받는다.
+      만드는 중인 행을 넘겨받지 않도록 `STALE_AFTER` 초가 지난 행만 확인한다.
+    - SHARDS 를 설정한 뒤 서비스를 시작하기 전에 `flask shards directory` 로
+      기존 사용자, 계좌와 카드를 목록에 넣는다. 목록에 없는 사용자와 계좌는
+      shard 0 에서 찾으므로 그 전에도 기존 사용자는 로그인하고 이체받을 수 있다.
+    - shard 가 하나이면(다른 은행 포함) 목록을 쓰지 않는다.
+"""
+
+from contextlib import contextmanager
+from datetime import timedelta
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.exc import IntegrityError
+
+from app import db
+from app.models import (
+    Account,
+    AccountShard,
+    Card,
+    CardShard,
+    User,
+    UserShard,
+    as_naive_utc,
+    insert_or_ignore,
+    is_unique_violation,
+    utcnow,
+)
+from app.sharding import current_shard, shard_count, use_shard
+
+STALE_AFTER = 60
+
+
+@contextmanager
+def on_shard(index):
+    """with 블록 안의 쿼리만 index shard 로 보내는 context manager."""
+    shard = current_shard()
+    use_shard(index)
+    try:
+        yield
+    finally:
+        use_shard(shard)
+
+
+def _is_stale(created_at):
+    return as_naive_utc(created_at) < as_naive_utc(
+        utcnow() - timedelta(seconds=STALE_AFTER)
+    )
+
+
+def user_shard(email=None, user_id=None):
+    """이메일 또는 user_id 로 사용자의 shard 를 찾는 메서드. 없으면 None."""
+    query = select(UserShard.shard)
+    if email is not None:
+        query = query.where(UserShard.email == email)
+    else:
+        query = query.where(UserShard.id == user_id)
+
+    with on_shard(0):
+        return db.session.execute(query).scalar()
+
+
+def route_to_email(email):
+    """이메일 사용자의 shard 로 이후 쿼리를 보내는 메서드 (로그인)."""
+    if shard_count() > 1 and isinstance(email, str):
+        use_shard(user_shard(email=email) or 0)
+
+
+def route_to_user(user_id, shard=None):
+    """사용자의 shard 로 이후 쿼리를 보내는 메서드.
+
+    Note:
+        세션/토큰에 담아 둔 shard 가 있으면 그대로 쓰고, 없으면 목록에서 찾는다.
+    """
+    if shard_count() == 1:
+        return
+
+    if shard is None:
+        shard = user_shard(user_id=user_id) or 0
+    use_shard(shard)
+
+
+def account_shard(account_number):
+    """계좌 번호의 계좌가 있는 shard 를 찾는 메서드.
+
+    Note:
+        목록에 없는 번호는 shard 를 켜기 전에 만든 계좌로 보고 shard 0 을 반환한다.
+    """
+    if shard_count() == 1:
+        return 0
+
+    with on_shard(0):
+        shard = db.session.execute(
+            select(AccountShard.shard).where(
+                AccountShard.account_number == account_number
+            )
+        ).scalar()
+
+    return shard or 0
+
+
+def claim_account_number(account_number):
+    """현재 shard 에서 쓸 계좌 번호를 목록에 넣는 메서드 (commit 포함).
+
+    Returns:
+        bool: 다른 shard 가 이미 쓰는 번호이면 False.
+    """
+    if shard_count() == 1:
+        return True
+
+    shard = current_shard()
+    with on_shard(0):
+        db.session.execute(
+            insert_or_ignore(AccountShard, ["account_number"]).values(
+                account_number=account_number, shard=shard, created_at=utcnow()
+            )
+        )
+        owner = db.session.execute(
+            select(AccountShard.shard).where(
+                AccountShard.account_number == account_number
+            )
+        ).scalar()
+        db.session.commit()
+
+    return owner == shard
+
+
+def _release_stale_user(email):
+    # 이메일 행의 shard 에 사용자가 없으면 이메일을 비우고 True 를 반환한다.
+    entry = db.session.execute(
+        select(UserShard).where(UserShard.email == email)
+    ).scalar_one_or_none()
+    if entry is None:
+        return True
+
+    if not _is_stale(entry.created_at):
+        return False
+
+    with on_shard(entry.shard):
+        exists = db.session.execute(
+            select(User.id).where(User.email == email)
+        ).scalar()
+    if exists is not None:
+        return False
+
+    db.session.execute(
+        update(UserShard)
+        .where(UserShard.id == entry.id, UserShard.email == email)
+        .values(email=None)
+    )
+    db.session.commit()
+
+    return True
+
+
+def register_user(email, shard, retries=3):
+    """목록에 이메일을 등록하고 새 user_id 를 반환하는 메서드.
+
+    Note:
+        이미 다른 사용자가 쓰는 이메일이면 None 을 반환한다. 아직 목록에 넣지
+        않은 기존 사용자의 id 와 겹치지 않도록 shard 0 의 가장 큰 user_id 보다도
+        큰 id 를 준다. 다른 요청과 같은 id 를 받으면 다시 시도한다.
+    """
+    with on_shard(0):
+        for _ in range(retries):
+            user_id = 1 + max(
+                db.session.execute(select(func.max(model.id))).scalar() or 0
+                for model in (UserShard, User)
+            )
+            db.session.add(UserShard(id=user_id, email=email, shard=shard))
+            try:
+                db.session.commit()
+            except IntegrityError as e:
+                db.session.rollback()
+                if is_unique_violation(e, "user_shard", "email"):
+                    if not _release_stale_user(email):
+                        return None
+                elif not is_unique_violation(e, "user_shard", "id"):
+                    raise
+            else:
+                return user_id
+
+    raise RuntimeError("Could not allocate a user id.")
+
+
+def release_user(user_id):
+    """지운 사용자의 이메일을 목록에서 비우는 메서드 (commit 포함)."""
+    if shard_count() == 1:
+        return
+
+    with on_shard(0):
+        db.session.execute(
+            update(UserShard).where(UserShard.id == user_id).values(email=None)
+        )
+        db.session.commit()
+
+
+def claim_cards(card_hashes):
+    """현재 shard 에 등록할 카드 번호 해시들을 목록에 넣는 메서드.
+
+    Note:
+        다른 shard 에 이미 등록된 해시는 빼고 반환한다. 같은 shard 의 중복은
+        카드 테이블의 UNIQUE 제약으로 확인한다.
+
+    Returns:
+        set[str]: 현재 shard 에 등록해도 되는 해시.
+    """
+    card_hashes = set(card_hashes)
+    if shard_count() == 1 or not card_hashes:
+        return card_hashes
+
+    shard = current_shard()
+    with on_shard(0):
+        db.session.execute(
+            insert_or_ignore(CardShard, ["card_number_hash"]).values(
+                [
+                    {
+                        "card_number_hash": card_hash,
+                        "shard": shard,
+                        "created_at": utcnow(),
+                    }
+                    for card_hash in card_hashes
+                ]
+            )
+        )
+        owners = db.session.execute(
+            select(
+                CardShard.card_number_hash,
+                CardShard.shard,
+                CardShard.created_at,
+            ).where(CardShard.card_number_hash.in_(card_hashes))
+        ).all()
+        db.session.commit()
+
+    taken = {}
+    for card_hash, owner, created_at in owners:
+        if owner != shard:
+            taken.setdefault(owner, {})[card_hash] = created_at
+
+    for owner, entries in taken.items():
+        stale = {
+            card_hash
+            for card_hash, created_at in entries.items()
+            if _is_stale(created_at)
+        }
+        if not stale:
+            continue
+
+        with on_shard(owner):
+            stale -= set(
+                db.session.execute(
+                    select(Card.card_number_hash).where(
+                        Card.card_number_hash.in_(stale)
+                    )
+                ).scalars()
+            )
+        with on_shard(0):
+            for card_hash in stale:
+                claimed = db.session.execute(
+                    update(CardShard)
+                    .where(
+                        CardShard.card_number_hash == card_hash,
+                        CardShard.shard == owner,
+                    )
+                    .values(shard=shard, created_at=utcnow())
+                ).rowcount
+                if claimed:
+                    del entries[card_hash]
+            db.session.commit()
+
+    return card_hashes.difference(*taken.values())
+
+
+def release_cards(card_hashes):
+    """현재 shard 에서 지운 카드 번호 해시들을 목록에서 빼는 메서드."""
+    if shard_count() == 1 or not card_hashes:
+        return
+
+    shard = current_shard()
+    with on_shard(0):
+        db.session.execute(
+            delete(CardShard).where(
+                CardShard.card_number_hash.in_(card_hashes),
+                CardShard.shard == shard,
+            )
+        )
+        db.session.commit()
+
+
+def build_directory():
+    """모든 shard 의 사용자, 계좌와 카드를 목록에 넣는 메서드.
+
+    Note:
+        이미 목록에 있는 사용자/계좌/카드는 건너뛰므로 여러 번 실행해도 된다.
+
+    Returns:
+        tuple[int, int, int]: 새로 넣은 사용자 수, 계좌 수와 카드 수.
+    """
+    users = accounts = cards = 0
+    for index in range(shard_count()):
+        with on_shard(index):
+            shard_users = db.session.execute(select(User.id, User.email)).all()
+            shard_accounts = (
+                db.session.execute(select(Account.account_number))
+                .scalars()
+                .all()
+            )
+            shard_cards = (
+                db.session.execute(select(Card.card_number_hash))
+                .scalars()
+                .all()
+            )
+            db.session.commit()
+
+        with on_shard(0):
+            if shard_users:
+                # 이메일이 이미 목록에 있는 사용자도 건너뛴다.
+                users += db.session.execute(
+                    insert_or_ignore(UserShard, None).values(
+                        [
+                            {
+                                "id": user_id,
+                                "email": email,
+                                "shard": index,
+                                "created_at": utcnow(),
+                            }
+                            for user_id, email in shard_users
+                        ]
+                    )
+                ).rowcount
+            if shard_accounts:
+                accounts += db.session.execute(
+                    insert_or_ignore(AccountShard, ["account_number"]).values(
+                        [
+                            {
+                                "account_number": account_number,
+                                "shard": index,
+                                "created_at": utcnow(),
+                            }
+                            for account_number in shard_accounts
+                        ]
+                    )
+                ).rowcount
+            if shard_cards:
+                cards += db.session.execute(
+                    insert_or_ignore(CardShard, ["card_number_hash"]).values(
+                        [
+                            {
+                                "card_number_hash": card_hash,
+                                "shard": index,
+                                "created_at": utcnow(),
+                            }
+                            for card_hash in shard_cards
+                        ]
+                    )
+                ).rowcount
+            db.session.commit()
+        db.session.expunge_all()
+
+    return users, accounts, cards
@@ -0,0 +1,48 @@
+"""version 컬럼을 ETag 로 내보내고 If-Match 로 갱신 충돌을 확인하는 모듈.
+
+Note:
+    - 조회/수정 응답의 ETag 는 행의 version 값이다.
+    - 수정 요청에 If-Match 가 있으면 현재 version 과 다를 때 409 로 거절한다.
+      If-Match 가 없으면 확인하지 않지만, 읽은 뒤 다른 요청이 먼저 수정했다면
+      commit 시 version 검사(StaleDataError)에서 걸러진다.
+    - 잔액 변경은 version 을 올리지 않으므로 입출금 중에도 ETag 는 그대로이다.
+"""
+
+from flask import current_app, jsonify, request
+
+CONFLICT_ERROR = "Resource was modified by another request"
+
+
+def with_etag(response, version):
+    """응답에 version 을 ETag 로 붙여 반환하는 메서드."""
+    response.set_etag(str(version))
+
+    return response
+
+
+def if_match_failed(version):
+    """요청의 If-Match 가 현재 version 과 맞지 않으면 True 를 반환하는 메서드.
+
+    Examples:
+        >>> # If-Match: "3"
+        >>> if_match_failed(3)
+        False
+        >>> if_match_failed(4)
+        True
+    """
+    if_match = request.if_match
+    if not if_match:
+        return False
+
+    return not (if_match.star_tag or if_match.contains(str(version)))
+
+
+def conflict(version=None):
+    """409 응답. version 을 주면 현재 ETag 를 함께 보낸다."""
+    current_app.logger.error(CONFLICT_ERROR)
+    response = jsonify({"error": CONFLICT_ERROR})
+    response.status_code = 409
+    if version is not None:
+        with_etag(response, version)
+
+    return response
@@ -0,0 +1,345 @@
+"""계좌 번호/카드 번호 존재 확인 앞에 두는 Bloom filter 모듈.
+
+Note:
+    - 계좌 번호 생성과 번호로 계좌/카드를 찾는 조회는 대부분 없는 번호를 찾는다.
+      `might_exist` 가 False 이면 DB 를 조회하지 않고 "없음" 으로 처리한다.
+    - filter 는 은행(tenant)/shard 와 종류(ACCOUNT_NUMBERS, CARDS)마다 하나씩
+      `EXISTENCE_FILTER_DIR` 의 파일로 두고 mmap 으로 열어 워커들이 공유한다.
+      파일이 없으면 처음 쓰일 때(warmup 포함) DB 에서 만든다.
+    - AccountNumber/Card 를 INSERT 하면 flush 시점(commit 전)에 키를 넣으므로,
+      commit 된 행의 키가 filter 에 없는 경우는 없다. ORM 을 거치지 않는 INSERT
+      는 `record` 와 `count_inserts` 를 직접 부른다.
+    - filter 파일은 호스트마다 따로 있으므로 다른 호스트가 넣은 키는 없다.
+      그래서 DB 의 `ExistenceCounter` 에 commit 된 INSERT 수를 세고, filter 파일의
+      mark 에는 filter 를 만든 시점의 그 값에 이 호스트가 commit 한 INSERT 수를
+      더해 둔다. filter 에 없는 키는 mark 가 DB 값보다 작지 않을 때만 없다고
+      답하고, 작으면 DB 를 조회한다. DB 값은 `EXISTENCE_FILTER_CHECK_INTERVAL`
+      초마다 다시 읽으므로, 다른 호스트가 넣은 키는 그 사이 없다고 답할 수 있다.
+    - DB 값을 따라가지 못한 filter 나 키 수가 용량을 넘어 오탐이 늘어난 filter 는
+      워커를 멈추고 `flask filters rebuild` 로 다시 만든다. 도는 중에 다시 만들면
+      그 사이에 넣은 키를 옛 파일에만 기록할 수 있다.
+    - filter 는 조회를 줄이는 데만 쓴다. 이체 받는 계좌 찾기처럼 돈이 움직이는
+      경로는 filter 를 보지 않고 DB 를 조회하고, 계좌 번호를 만들 때 filter 가
+      틀려 쓰던 번호를 고르면 기본 키 위반으로 알아채 다시 만든다.
+"""
+
+import fcntl
+import os
+import threading
+import time
+
+import click
+from flask import current_app, has_app_context
+from flask.cli import AppGroup, with_appcontext
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session, object_session
+
+from app import db
+from app.bloom import BloomFilter, MappedBloomFilter
+from app.models import (
+    AccountNumber,
+    Card,
+    ExistenceCounter,
+    increment_statement,
+)
+from app.sharding import current_partition, shard_count, use_shard
+
+filters_cli = AppGroup("filters", help="Existence Bloom filters.")
+
+ACCOUNT_NUMBERS = "account_numbers"
+CARDS = "cards"
+
+# session.info 의 키: commit 하면 filter mark 에 더할 (partition, 종류) -> 수
+PENDING_INSERTS = "existence_inserts"
+
+
+COLUMNS = {
+    ACCOUNT_NUMBERS: AccountNumber.number,
+    CARDS: Card.card_number_hash,
+}
+
+
+def _connect():
+    # 요청 도중(flush 중일 수도 있다)에 만들 수 있으므로 session 과 별도의
+    # 커넥션으로 현재 은행/shard 의 DB 를 읽는다.
+    return db.session.get_bind().connect()
+
+
+def _inserted(kind, connection):
+    return (
+        connection.execute(
+            select(ExistenceCounter.inserted).where(
+                ExistenceCounter.kind == kind
+            )
+        ).scalar()
+        or 0
+    )
+
+
+class ExistenceFilters:
+    """(tenant, shard, 종류) -> mmap 으로 연 Bloom filter 표.
+
+    Note:
+        다른 프로세스가 파일을 다시 만들었으면(inode 가 바뀌면) 새 파일로 다시 연다.
+        파일을 만드는 동안에는 `.lock` 파일을 잠가 여러 워커가 함께 만들지 않게 한다.
+        filter 가 DB 의 모든 키를 담고 있는지는 `is_complete` 로 확인한다.
+    """
+
+    __slots__ = (
+        "directory",
+        "capacity",
+        "error_rate",
+        "check_interval",
+        "_filters",
+        "_checked",
+        "_lock",
+    )
+
+    def __init__(
+        self, directory, capacity=1000000, error_rate=0.01, check_interval=1
+    ):
+        self.directory = directory
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.check_interval = check_interval
+        self._filters = {}
+        # 경로 -> (읽은 시각, DB 의 INSERT 수)
+        self._checked = {}
+        self._lock = threading.Lock()
+
+    def path(self, partition, kind):
+        tenant, shard = partition
+
+        return os.path.join(
+            self.directory, f"{tenant or 'default'}-shard-{shard}-{kind}.bloom"
+        )
+
+    def get(self, partition, kind):
+        path = self.path(partition, kind)
+        bloom = self._filters.get(path)
+        if bloom is not None and _inode(path) == bloom.inode:
+            return bloom
+
+        with self._lock:
+            bloom = self._filters.get(path)
+            if bloom is None or _inode(path) != bloom.inode:
+                bloom = self._filters[path] = self._open(path, kind)
+
+        return bloom
+
+    def _open(self, path, kind):
+        os.makedirs(self.directory, exist_ok=True)
+        with open(f"{path}.lock", "wb") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                bloom = MappedBloomFilter(path)
+            except (FileNotFoundError, ValueError):
+                # 없거나 mark 가 없는 옛 형식의 파일이면 새로 만든다.
+                self.build(kind).save(path)
+                bloom = MappedBloomFilter(path)
+
+        if bloom.count > bloom.capacity:
+            current_app.logger.warning(
+                f"Existence filter {path} holds {bloom.count} keys over "
+                f"capacity {bloom.capacity}; run 'flask filters rebuild'"
+            )
+
+        return bloom
+
+    def build(self, kind):
+        """현재 shard DB 의 키로 새 filter 를 만드는 메서드.
+
+        Note:
+            키 수가 설정한 용량의 절반을 넘으면 두 배 용량으로 만든다.
+            INSERT 수를 키보다 먼저 읽으므로, 그 사이 commit 된 키는 filter 에
+            있어도 mark 에는 빠져 DB 를 조회하는 쪽으로 틀린다.
+        """
+        with _connect() as connection:
+            inserted = _inserted(kind, connection)
+            keys = connection.execute(select(COLUMNS[kind])).scalars().all()
+        bloom = BloomFilter.for_capacity(
+            max(self.capacity, len(keys) * 2), self.error_rate
+        )
+        for key in keys:
+            bloom.add(key)
+        bloom.mark = inserted
+
+        return bloom
+
+    def is_complete(self, partition, kind, bloom):
+        """filter 가 DB 에 commit 된 키를 모두 담고 있으면 True 를 반환하는 메서드.
+
+        Note:
+            DB 의 INSERT 수는 `check_interval` 초마다 다시 읽는다.
+        """
+        path = self.path(partition, kind)
+        now = time.monotonic()
+        checked = self._checked.get(path)
+        if checked is None or now - checked[0] >= self.check_interval:
+            with _connect() as connection:
+                checked = self._checked[path] = (
+                    now,
+                    _inserted(kind, connection),
+                )
+            if bloom.mark < checked[1]:
+                current_app.logger.warning(
+                    f"Existence filter {path} is behind the database "
+                    f"({bloom.mark} < {checked[1]} inserts); checking the "
+                    "database until 'flask filters rebuild'"
+                )
+
+        return bloom.mark >= checked[1]
+
+    def close(self):
+        with self._lock:
+            for bloom in self._filters.values():
+                bloom.close()
+            self._filters.clear()
+
+
+def _inode(path):
+    try:
+        return os.stat(path).st_ino
+    except FileNotFoundError:
+        return None
+
+
+def init_existence_filters(app):
+    if not app.config.get("EXISTENCE_FILTERS"):
+        return
+
+    app.extensions["existence_filters"] = ExistenceFilters(
+        app.config.get("EXISTENCE_FILTER_DIR")
+        or os.path.join(app.instance_path, "filters"),
+        app.config.get("EXISTENCE_FILTER_CAPACITY", 1000000),
+        app.config.get("EXISTENCE_FILTER_ERROR_RATE", 0.01),
+        app.config.get("EXISTENCE_FILTER_CHECK_INTERVAL", 1),
+    )
+
+
+def _filters():
+    if not has_app_context():
+        return None
+
+    return current_app.extensions.get("existence_filters")
+
+
+def might_exist(kind, key):
+    """현재 은행/shard 에 key 가 있을 수도 있으면 True 를 반환하는 메서드.
+
+    Note:
+        filter 를 쓰지 않거나 filter 가 DB 를 따라가지 못했으면 항상 True 이다
+        (DB 를 조회한다).
+    """
+    filters = _filters()
+    if filters is None:
+        return True
+
+    partition = current_partition()
+    bloom = filters.get(partition, kind)
+
+    return key in bloom or not filters.is_complete(partition, kind, bloom)
+
+
+def record(kind, *keys):
+    """INSERT 하는 키들을 현재 은행/shard 의 filter 에 넣는 메서드."""
+    filters = _filters()
+    if filters is not None:
+        filters.get(current_partition(), kind).update(keys)
+
+
+def open_filters():
+    """기본 은행의 모든 shard 의 filter 를 미리 열거나 만드는 메서드.
+
+    Note:
+        다른 은행(tenant)의 filter 는 그 은행의 요청이 처음 쓸 때 연다.
+
+    Returns:
+        int: 연 filter 수.
+    """
+    filters = _filters()
+    if filters is None:
+        return 0
+
+    shard = current_partition()[1]
+    opened = 0
+    try:
+        for index in range(shard_count()):
+            use_shard(index)
+            for kind in (ACCOUNT_NUMBERS, CARDS):
+                filters.get(current_partition(), kind)
+                opened += 1
+    finally:
+        use_shard(shard)
+
+    return opened
+
+
+def _count_inserts(session, connection, kind, count):
+    connection.execute(
+        increment_statement(
+            ExistenceCounter, {"kind": kind}, {"inserted": count}
+        )
+    )
+    # commit 한 뒤에 filter 의 mark 에 더한다 (apply_committed_inserts).
+    pending = session.info.setdefault(PENDING_INSERTS, {})
+    key = (current_partition(), kind)
+    pending[key] = pending.get(key, 0) + count
+
+
+def count_inserts(kind, count):
+    """ORM 을 거치지 않고 INSERT 한 키 수를 DB 의 INSERT 수에 더하는 메서드.
+
+    Note:
+        INSERT 와 같은 트랜잭션에서 부른다. 키를 넣지 않는 프로세스(filter 를 쓰지
+        않는 워커 포함)도 세어야 다른 프로세스의 filter 가 키를 놓쳤는지 안다.
+    """
+    if count:
+        _count_inserts(db.session, db.session.connection(), kind, count)
+
+
+@event.listens_for(AccountNumber, "after_insert")
+def record_account_number(mapper, connection, target):
+    record(ACCOUNT_NUMBERS, target.number)
+    _count_inserts(object_session(target), connection, ACCOUNT_NUMBERS, 1)
+
+
+@event.listens_for(Card, "after_insert")
+def record_card(mapper, connection, target):
+    record(CARDS, target.card_number_hash)
+    _count_inserts(object_session(target), connection, CARDS, 1)
+
+
+@event.listens_for(Session, "after_commit")
+def apply_committed_inserts(session):
+    pending = session.info.pop(PENDING_INSERTS, None)
+    filters = _filters()
+    if pending and filters is not None:
+        for (partition, kind), count in pending.items():
+            filters.get(partition, kind).add_mark(count)
+
+
+@event.listens_for(Session, "after_rollback")
+def discard_rolled_back_inserts(session):
+    session.info.pop(PENDING_INSERTS, None)
+
+
+@filters_cli.command("rebuild")
+@with_appcontext
+def rebuild_command():
+    """Rebuild this shard's existence filters (stop the web workers first)."""
+    if "existence_filters" not in current_app.extensions:
+        init_existence_filters(current_app)
+    filters = _filters()
+    if filters is None:
+        click.echo("EXISTENCE_FILTERS is off.")
+        return
+
+    os.makedirs(filters.directory, exist_ok=True)
+    for kind in (ACCOUNT_NUMBERS, CARDS):
+        path = filters.path(current_partition(), kind)
+        with open(f"{path}.lock", "wb") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            bloom = filters.build(kind)
+            bloom.save(path)
+        click.echo(f"Rebuilt {kind} filter with {bloom.count} keys.")
@@ -0,0 +1,262 @@
+import json
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import timedelta
+
+import click
+from flask import current_app
+from flask.cli import AppGroup, with_appcontext
+from sqlalchemy import or_, select, update
+
+from app import db
+from app.models import Job, JobStatus, utcnow
+
+TASKS = {}
+
+jobs_cli = AppGroup("jobs", help="Background job queue commands.")
+
+
+def task(name):
+    """함수를 백그라운드 작업으로 등록하는 데코레이터.
+
+    Examples:
+        >>> @task("export_user_data")
+        ... def export_user_data(user_id):
+        ...     ...
+    """
+
+    def decorator(func):
+        TASKS[name] = func
+        return func
+
+    return decorator
+
+
+def enqueue(name, owner_id=None, **params):
+    """작업을 job 테이블에 등록하고 Job 객체를 반환하는 메서드.
+
+    Note:
+        작업은 요청 처리 중에 실행되지 않고, `flask jobs worker` 가 가져가 실행한다.
+        owner_id 는 작업 결과를 조회할 수 있는 사용자 id 이며,
+        commit 은 호출한 쪽에서 수행한다.
+
+    Raises:
+        KeyError: 등록되지 않은 작업 이름인 경우.
+    """
+    if name not in TASKS:
+        raise KeyError(f"Unknown job '{name}'")
+
+    job = Job(name=name, params=params, user_id=owner_id)
+    db.session.add(job)
+
+    return job
+
+
+def _lease_until(now):
+    return now + timedelta(
+        seconds=current_app.config.get("JOB_LEASE_SECONDS", 300)
+    )
+
+
+def _lease_expired(now):
+    return (Job.status == JobStatus.RUNNING) & (Job.lease_expires_at < now)
+
+
+def fail_abandoned_jobs():
+    """임대가 끝난 채 최대 횟수만큼 실행된 RUNNING 작업을 FAILED 로 바꾸는 메서드.
+
+    Returns:
+        int: FAILED 로 바꾼 작업 수.
+    """
+    now = utcnow()
+    max_attempts = current_app.config.get("JOB_MAX_ATTEMPTS", 3)
+    failed = db.session.execute(
+        update(Job)
+        .where(_lease_expired(now), Job.attempts >= max_attempts)
+        .values(
+            status=JobStatus.FAILED,
+            error=f"Lease expired after {max_attempts} attempts",
+            finished_at=now,
+            lease_expires_at=None,
+        )
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.session.commit()
+
+    return failed
+
+
+def claim_next_job():
+    """가장 오래된 대기 작업 하나를 RUNNING 으로 바꾸고 id 를 반환하는 메서드.
+
+    Note:
+        `status = PENDING` 조건을 건 UPDATE 로 상태를 바꾸므로 여러 워커가 같은
+        작업을 동시에 가져가더라도 한 워커만 성공한다.
+        실행하던 워커가 죽어 임대(lease_expires_at)가 끝난 RUNNING 작업도
+        JOB_MAX_ATTEMPTS 번까지는 다시 가져간다.
+
+    Returns:
+        int | None: 가져간 작업 id, 대기 작업이 없으면 None.
+    """
+    fail_abandoned_jobs()
+    now = utcnow()
+    claimable = or_(Job.status == JobStatus.PENDING, _lease_expired(now))
+    while True:
+        job_id = db.session.execute(
+            select(Job.id).where(claimable).order_by(Job.id).limit(1)
+        ).scalar()
+        if job_id is None:
+            return None
+
+        claimed = db.session.execute(
+            update(Job)
+            .where(Job.id == job_id, claimable)
+            .values(
+                status=JobStatus.RUNNING,
+                started_at=now,
+                lease_expires_at=_lease_until(now),
+                attempts=Job.attempts + 1,
+            )
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        db.session.commit()
+
+        if claimed:
+            return job_id
+
+
+def renew_leases(job_ids):
+    """실행 중인 작업들의 임대를 연장하는 메서드 (heartbeat)."""
+    db.session.execute(
+        update(Job)
+        .where(Job.id.in_(job_ids), Job.status == JobStatus.RUNNING)
+        .values(lease_expires_at=_lease_until(utcnow()))
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+
+
+def run_job(job_id):
+    """작업을 실행하고 결과를 기록하는 메서드.
+
+    Note:
+        실행이 임대 시간을 넘겨 다른 워커가 다시 가져간 경우에는 결과를 기록하지
+        않는다 (가져간 횟수가 바뀌었는지로 확인한다).
+    """
+    job = db.session.get(Job, job_id)
+    name, attempt = job.name, job.attempts
+    current_app.logger.info(f"Running job {name} (id {job_id})")
+
+    try:
+        values = {"result": TASKS[name](**job.params)}
+    except Exception as e:
+        db.session.rollback()
+        # traceback 은 로그에만 남기고 작업에는 예외 요약만 기록한다.
+        error = traceback.format_exception_only(type(e), e)[-1].strip()
+        values = {"status": JobStatus.FAILED, "error": error}
+        current_app.logger.exception(f"Job {name} (id {job_id}) failed")
+    else:
+        values["status"] = JobStatus.DONE
+        current_app.logger.info(f"Job {name} (id {job_id}) finished")
+
+    finished = db.session.execute(
+        update(Job)
+        .where(
+            Job.id == job_id,
+            Job.status == JobStatus.RUNNING,
+            Job.attempts == attempt,
+        )
+        .values(**values, finished_at=utcnow(), lease_expires_at=None)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.session.commit()
+
+    if not finished:
+        current_app.logger.warning(
+            f"Job {name} (id {job_id}) lost its lease; result discarded"
+        )
+
+
+def _run_in_app_context(app, job_id):
+    with app.app_context():
+        run_job(job_id)
+
+
+def run_worker(app, concurrency=2, poll_interval=1.0, once=False):
+    """대기 작업을 가져와 스레드 풀에서 실행하는 워커 루프.
+
+    Note:
+        `once=True` 이면 현재 대기 중인 작업만 모두 처리하고 반환한다.
+
+    Returns:
+        int: 실행한 작업 수.
+    """
+    processed = 0
+    heartbeat_interval = app.config.get("JOB_LEASE_SECONDS", 300) / 3
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        while True:
+            with app.app_context():
+                job_ids = []
+                while len(job_ids) < concurrency:
+                    job_id = claim_next_job()
+                    if job_id is None:
+                        break
+                    job_ids.append(job_id)
+
+            futures = {
+                executor.submit(_run_in_app_context, app, job_id): job_id
+                for job_id in job_ids
+            }
+            # 실행이 끝날 때까지 임대 시간의 1/3 마다 임대를 연장한다.
+            pending = set(futures)
+            while pending:
+                _, pending = wait(pending, timeout=heartbeat_interval)
+                if pending:
+                    with app.app_context():
+                        renew_leases([futures[future] for future in pending])
+            for future in futures:
+                future.result()
+            processed += len(job_ids)
+
+            if not job_ids:
+                if once:
+                    return processed
+                time.sleep(poll_interval)
+
+
+@jobs_cli.command("worker")
+@click.option("--concurrency", default=2, show_default=True)
+@click.option("--poll-interval", default=1.0, show_default=True)
+@click.option("--once", is_flag=True, help="Exit when the queue is empty.")
+@with_appcontext
+def worker_command(concurrency, poll_interval, once):
+    """Run queued jobs in a worker pool."""
+    processed = run_worker(
+        current_app._get_current_object(), concurrency, poll_interval, once
+    )
+    click.echo(f"Processed {processed} jobs.")
+
+
+@jobs_cli.command("enqueue")
+@click.argument("name")
+@click.option("--params", default="{}", help="Job parameters as JSON.")
+@with_appcontext
+def enqueue_command(name, params):
+    """Queue a job by name."""
+    job = enqueue(name, **json.loads(params))
+    db.session.commit()
+    click.echo(f"Queued job {job.name} (id {job.id}).")
+
+
+@jobs_cli.command("list")
+@click.option("--status", type=click.Choice([s.value for s in JobStatus]))
+@with_appcontext
+def list_command(status):
+    """List jobs, newest first."""
+    query = select(Job).order_by(Job.id.desc()).limit(50)
+    if status:
+        query = query.where(Job.status == JobStatus(status))
+
+    for job in db.session.execute(query).scalars():
+        click.echo(f"{job.id}\t{job.name}\t{job.status.value}\t{job.params}")
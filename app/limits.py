@@ -0,0 +1,253 @@
+import threading
+import time
+from datetime import datetime, timezone
+
+from flask import current_app
+from sqlalchemy import select
+
+from app import db
+from app.money import fx_rates
+from app.sharding import current_partition
+
+
+class SlidingWindowCounter:
+    """키별 최근 N초 동안의 발생 횟수를 세는 인메모리 링 버퍼.
+
+    Note:
+        윈도우를 `bucket_count` 개의 고정 칸으로 나누고, 각 칸에는 해당 시간대의
+        횟수와 시간대 번호만 저장한다. 오래된 칸은 재사용 시점에 초기화되므로
+        기록과 조회 모두 이력 크기와 무관하게 상수 시간이 든다.
+        프로세스마다 따로 유지되는 근사치이며, 정확한 누적액은 WithdrawalUsage
+        테이블이 담당한다. 키가 `max_keys` 개를 넘으면 윈도우 안에 기록이 없는
+        키부터 정리한다.
+
+    Examples:
+        >>> counter = SlidingWindowCounter(window_seconds=60, bucket_count=12)
+        >>> counter.add(("card", 1))
+        1
+    """
+
+    __slots__ = (
+        "window_seconds",
+        "bucket_count",
+        "max_keys",
+        "_width",
+        "_rings",
+        "_lock",
+    )
+
+    def __init__(self, window_seconds=60, bucket_count=12, max_keys=100000):
+        self.window_seconds = window_seconds
+        self.bucket_count = bucket_count
+        self.max_keys = max_keys
+        self._width = window_seconds / bucket_count
+        self._rings = {}
+        self._lock = threading.Lock()
+
+    def _ring(self, key, slot):
+        ring = self._rings.get(key)
+        if ring is None:
+            if len(self._rings) >= self.max_keys:
+                self._sweep(slot)
+            ring = self._rings[key] = (
+                [-1] * self.bucket_count,
+                [0] * self.bucket_count,
+            )
+
+        stamps, counts = ring
+        index = slot % self.bucket_count
+        if stamps[index] != slot:
+            stamps[index] = slot
+            counts[index] = 0
+
+        return stamps, counts, index
+
+    def _sweep(self, slot):
+        oldest = slot - self.bucket_count
+        idle = [
+            key
+            for key, (stamps, _) in self._rings.items()
+            if max(stamps) <= oldest
+        ]
+        for key in idle:
+            del self._rings[key]
+
+    def _total(self, stamps, counts, slot):
+        oldest = slot - self.bucket_count
+        return sum(
+            count for stamp, count in zip(stamps, counts) if stamp > oldest
+        )
+
+    def add(self, key, now=None):
+        slot = int((time.time() if now is None else now) // self._width)
+        with self._lock:
+            stamps, counts, index = self._ring(key, slot)
+            counts[index] += 1
+
+            return self._total(stamps, counts, slot)
+
+    def count(self, key, now=None):
+        slot = int((time.time() if now is None else now) // self._width)
+        with self._lock:
+            ring = self._rings.get(key)
+            if ring is None:
+                return 0
+
+            return self._total(*ring, slot)
+
+    def clear(self):
+        with self._lock:
+            self._rings.clear()
+
+
+velocity_counter = SlidingWindowCounter()
+
+
+def velocity_key(card):
+    return ("card", current_partition(), card.id)
+
+
+def _today():
+    return datetime.now(timezone.utc).date()
+
+
+def _get_used_amount(subject, subject_id, day):
+    from app.models import WithdrawalUsage
+
+    # 조회만 하므로 행을 만들지 않는다. 거절된 인출은 집계 행을 남기지 않는다.
+    amount = db.session.execute(
+        select(WithdrawalUsage.amount).where(
+            WithdrawalUsage.subject == subject,
+            WithdrawalUsage.subject_id == subject_id,
+            WithdrawalUsage.day == day,
+        )
+    ).scalar()
+
+    return amount or 0
+
+
+def _daily_limits(card, account):
+    # (대상, id, 일일 한도) 목록. 카드 없이 출금하면 계좌 한도만 있다.
+    config = current_app.config
+    limits = [
+        ("account", account.id, config.get("ACCOUNT_DAILY_WITHDRAWAL_LIMIT"))
+    ]
+    if card is not None:
+        limits.insert(
+            0, ("card", card.id, config.get("CARD_DAILY_WITHDRAWAL_LIMIT"))
+        )
+
+    return limits
+
+
+def _add_usage(subjects, day, amount, count):
+    from app.models import WithdrawalUsage, increment_or_insert
+
+    for subject, subject_id in subjects:
+        increment_or_insert(
+            WithdrawalUsage,
+            {"subject": subject, "subject_id": subject_id, "day": day},
+            amount=amount,
+            count=count,
+        )
+
+
+def check_withdrawal_limit(card, account, amount):
+    """인출 전에 1회/일일 한도와 인출 빈도 제한을 확인하는 메서드.
+
+    Note:
+        한도 값은 app config 에서 읽으며, 설정되지 않은 한도는 검사하지 않는다.
+        한도는 기준 통화 기준이므로 amount(Money) 를 기준 통화로 환산해 비교한다.
+        일일 한도는 카드와 계좌의 오늘자 WithdrawalUsage 행을 기본 키로 조회하므로
+        인출 이력이 아무리 많아도 조회 비용은 일정하다.
+        계좌 이체처럼 카드 없이 출금하면 card 로 None 을 넘기며, 계좌 한도만
+        확인한다.
+
+    Returns:
+        str | None: 한도를 넘으면 실패 메시지, 통과하면 None.
+
+    Examples:
+        >>> check_withdrawal_limit(card, account, Money(50000))
+        None
+    """
+    config = current_app.config
+    amount = fx_rates.to_base(amount).amount
+
+    per_transaction = config.get("WITHDRAWAL_LIMIT_PER_TRANSACTION")
+    if per_transaction is not None and amount > per_transaction:
+        return "FAILED: Per-transaction withdrawal limit exceeded."
+
+    velocity = config.get("CARD_WITHDRAWAL_VELOCITY_LIMIT")
+    if (
+        card is not None
+        and velocity is not None
+        and velocity_counter.count(velocity_key(card)) >= velocity
+    ):
+        return "FAILED: Too many withdrawals in a short time."
+
+    today = _today()
+    for subject, subject_id, daily_limit in _daily_limits(card, account):
+        if daily_limit is None:
+            continue
+
+        used = _get_used_amount(subject, subject_id, today)
+        if used + amount > daily_limit:
+            return f"FAILED: Daily {subject} withdrawal limit exceeded."
+
+    return None
+
+
+def record_withdrawal(card, account, amount):
+    """인출을 오늘자 집계 행과 인출 빈도 카운터에 반영하는 메서드.
+
+    Note:
+        잔액을 바꾸기 전에 같은 트랜잭션에서 호출한다. `check_withdrawal_limit`
+        뒤에 다른 요청이 먼저 인출했을 수 있으므로, 일일 한도가 있으면
+        `amount + :amount <= 한도` 인 행에만 더하는 조건부 upsert 로 DB 에서
+        한 번 더 확인한다. 한도를 넘어 더하지 못하면 먼저 더한 대상을 되돌린다.
+        잔액이 모자라 인출하지 못하면 `release_withdrawal` 로 되돌린다.
+
+    Returns:
+        str | None: 한도를 넘으면 실패 메시지, 반영했으면 None.
+    """
+    from app.models import WithdrawalUsage, increment_statement
+
+    amount = fx_rates.to_base(amount).amount
+    today = _today()
+    recorded = []
+    for subject, subject_id, daily_limit in _daily_limits(card, account):
+        where = None
+        if daily_limit is not None:
+            where = WithdrawalUsage.amount + amount <= daily_limit
+
+        updated = db.session.execute(
+            increment_statement(
+                WithdrawalUsage,
+                {"subject": subject, "subject_id": subject_id, "day": today},
+                {"amount": amount, "count": 1},
+                where,
+            )
+        ).rowcount
+        if not updated:
+            _add_usage(recorded, today, -amount, -1)
+            return f"FAILED: Daily {subject} withdrawal limit exceeded."
+
+        recorded.append((subject, subject_id))
+
+    if card is not None:
+        velocity_counter.add(velocity_key(card))
+
+    return None
+
+
+def release_withdrawal(card, account, amount):
+    """잔액이 모자라 실패한 인출의 `record_withdrawal` 집계를 되돌리는 메서드.
+
+    Note:
+        인출 빈도 카운터는 시도 횟수로 보고 되돌리지 않는다.
+    """
+    subjects = [
+        (subject, subject_id)
+        for subject, subject_id, _ in _daily_limits(card, account)
+    ]
+    _add_usage(subjects, _today(), -fx_rates.to_base(amount).amount, -1)
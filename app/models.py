@@ -1,9 +1,94 @@
+import calendar
+from datetime import datetime, timedelta, timezone
 from enum import Enum as PyEnum
-from sqlalchemy import Enum
+
+from sqlalchemy import Enum, func, update
+from sqlalchemy.dialects import postgresql, sqlite
 from werkzeug.security import generate_password_hash, check_password_hash
 
 from app import db
-from app.card_state import Enabled, Disabled
+from app.card_number import hash_card_number, mask_card_number
+from app.card_state import (
+    CardStateError,
+    CardStatus,
+    allowed_from,
+    can_change_state,
+    get_card_state,
+)
+from app.money import BASE_CURRENCY, Money
+from app.rollups import record_movement
+
+
+def is_unique_violation(error, table, column):
+    """IntegrityError 가 table.column 의 UNIQUE 제약 위반인지 확인하는 메서드.
+
+    Note:
+        SQLite 는 "UNIQUE constraint failed: user.email" 형식으로,
+        PostgreSQL 은 기본 제약 이름 "user_email_key" 로 알려 준다.
+        `unique=True, index=True` 컬럼은 UNIQUE 인덱스 "ix_card_card_number_hash"
+        로, 기본 키(id) 위반은 "card_pkey" 로 알려 준다.
+    """
+    message = str(error.orig)
+
+    return (
+        f"UNIQUE constraint failed: {table}.{column}" in message
+        or f'"{table}_{column}_key"' in message
+        or f'"ix_{table}_{column}"' in message
+        or (column == "id" and f'"{table}_pkey"' in message)
+    )
+
+
+def insert_or_ignore(model, index_elements):
+    """UNIQUE 충돌 행은 건너뛰는 INSERT 문을 DB 종류에 맞게 만드는 메서드."""
+    dialects = {"sqlite": sqlite, "postgresql": postgresql}
+    dialect = dialects[db.session.get_bind().dialect.name]
+
+    return dialect.insert(model).on_conflict_do_nothing(
+        index_elements=index_elements
+    )
+
+
+def increment_or_insert(model, keys, **deltas):
+    """기본 키 keys 의 집계 행에 deltas 를 더하고, 행이 없으면 만드는 메서드.
+
+    Note:
+        INSERT ... ON CONFLICT DO UPDATE SET col = col + :delta 한 문장으로
+        실행하므로, 같은 행을 동시에 처음 기록해도 기본 키 위반이 나지 않고
+        동시에 더한 값도 잃지 않는다. commit 은 호출한 쪽에서 수행한다.
+
+    Examples:
+        >>> increment_or_insert(
+        ...     WithdrawalUsage,
+        ...     {"subject": "card", "subject_id": 1, "day": today},
+        ...     amount=5000,
+        ...     count=1,
+        ... )
+    """
+    db.session.execute(increment_statement(model, keys, deltas))
+
+
+def increment_statement(model, keys, deltas, where=None):
+    """`increment_or_insert` 의 INSERT ... ON CONFLICT 문장을 만드는 메서드.
+
+    Note:
+        RETURNING 을 붙이거나 session 이 아닌 커넥션으로 실행할 때 쓴다.
+        where 를 주면 기존 행은 조건을 만족할 때만 더하며, 더하지 않으면
+        rowcount 가 0 이다. 조건에서 더할 값은 `stmt.excluded` 가 아닌
+        `model.__table__.c` 와 deltas 로 직접 계산해 넘긴다.
+    """
+    dialects = {"sqlite": sqlite, "postgresql": postgresql}
+    dialect = dialects[db.session.get_bind().dialect.name]
+    columns = model.__table__.c
+    stmt = dialect.insert(model).values(**keys, **deltas)
+
+    return stmt.on_conflict_do_update(
+        index_elements=list(keys),
+        set_={
+            column: columns[column] + stmt.excluded[column]
+            for column in deltas
+        },
+        where=where,
+    )
 
 
 class User(db.Model):
@@ -11,8 +96,26 @@ class User(db.Model):
     email = db.Column(db.String(120), nullable=False, unique=True)
     name = db.Column(db.String(100), nullable=False)
     password_hash = db.Column(db.String(128), nullable=False)
-    accounts = db.relationship("Account", backref="user", lazy=True)
-    cards = db.relationship("Card", backref="user", lazy=True)
+    # 낙관적 동시성 제어: UPDATE 마다 WHERE version = <읽은 값> 으로 확인하고
+    # 1 올린다. 그 사이 다른 요청이 수정했으면 StaleDataError 가 난다.
+    version = db.Column(db.Integer, nullable=False, server_default="1")
+    __mapper_args__ = {"version_id_col": version}
+    # 자식 행은 DB 의 ON DELETE CASCADE 로 지운다. (passive_deletes)
+    # 삭제 시 계좌/카드를 하나씩 불러오지 않는다.
+    accounts = db.relationship(
+        "Account",
+        backref="user",
+        lazy=True,
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+    )
+    cards = db.relationship(
+        "Card",
+        backref="user",
+        lazy=True,
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+    )
 
     @property
     def password(self):
@@ -48,8 +151,29 @@ class Account(db.Model):
     name = db.Column(db.String(100), nullable=False)
     password_hash = db.Column(db.String(128), nullable=False)
     balance = db.Column(db.Integer, default=0)
-    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
-    cards = db.relationship("Card", backref="account", lazy=True)
+    # 이름/비밀번호 수정의 낙관적 동시성 제어용. 잔액은 move_balance 가 version
+    # 검사 없이 원자적으로 갱신하므로, 프로필 수정과 입출금은 서로 막지 않는다.
+    version = db.Column(db.Integer, nullable=False, server_default="1")
+    __mapper_args__ = {"version_id_col": version}
+    user_id = db.Column(
+        db.Integer,
+        db.ForeignKey("user.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+    )
+    cards = db.relationship(
+        "Card",
+        backref="account",
+        lazy=True,
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+    )
+    foreign_balances = db.relationship(
+        "AccountBalance",
+        lazy=True,
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+    )
 
     @property
     def password(self):
@@ -62,6 +186,123 @@ class Account(db.Model):
     def verify_password(self, password):
         return check_password_hash(self.password_hash, password)
 
+    def get_balance(self, currency=BASE_CURRENCY):
+        """통화별 잔액을 Money 로 반환하는 메서드.
+
+        Note:
+            기준 통화 잔액은 Account.balance 에, 나머지 통화는 AccountBalance 에
+            (계좌, 통화) 당 한 행으로 저장된다.
+        """
+        if currency == BASE_CURRENCY:
+            return Money(self.balance or 0, currency)
+
+        row = db.session.get(AccountBalance, (self.id, currency))
+
+        return Money(row.amount if row is not None else 0, currency)
+
+    def get_balances(self):
+        balances = {BASE_CURRENCY: self.balance or 0}
+        for row in self.foreign_balances:
+            balances[row.currency] = row.amount
+
+        return balances
+
+    def move_balance(self, amount, card=None):
+        """잔액을 amount(Money) 만큼 변경하고 그 내역을 AccountHistory 에 남기는 메서드.
+
+        Note:
+            잔액 변경은 반드시 이 메서드를 거쳐야 잔액 대사(reconcile) 시
+            내역 합계와 잔액이 일치한다. 카드 입출금, 이체, 예약 이체 모두 여기를
+            거치므로 잔액 변경 이벤트와 일별 집계(DailyRollup)도 여기서 남긴다.
+            출금은 잔액이 모자라면 아무것도 바꾸지 않는다. 미리 읽은 잔액은
+            다른 요청이 그 사이 바꿀 수 있으므로 반환값으로 성공 여부를 확인한다.
+            commit 은 호출한 쪽에서 수행한다.
+
+        Returns:
+            bool: 잔액을 변경했으면 True, 잔액이 모자라면 False.
+        """
+        if amount.currency == BASE_CURRENCY:
+            # ORM flush 대신 UPDATE 로 더해 version 검사를 거치지 않는다.
+            # 동시에 입출금해도 서로의 변경을 덮어쓰지 않는다.
+            balance = func.coalesce(Account.balance, 0) + amount.amount
+            stmt = (
+                update(Account)
+                .where(Account.id == self.id)
+                .values(balance=balance)
+                .returning(Account.balance)
+            )
+        elif amount.amount >= 0:
+            balance = AccountBalance.amount + amount.amount
+            stmt = (
+                increment_statement(
+                    AccountBalance,
+                    {"account_id": self.id, "currency": amount.currency},
+                    {"amount": amount.amount},
+                )
+                .returning(AccountBalance.amount)
+                .execution_options(populate_existing=True)
+            )
+        else:
+            balance = AccountBalance.amount + amount.amount
+            stmt = (
+                update(AccountBalance)
+                .where(
+                    AccountBalance.account_id == self.id,
+                    AccountBalance.currency == amount.currency,
+                )
+                .values(amount=balance)
+                .returning(AccountBalance.amount)
+            )
+
+        if amount.amount < 0:
+            # 잔액 확인과 차감을 한 문장으로 하여, 동시에 출금해도 음수가
+            # 되지 않는다. 조건에 맞지 않으면 갱신된 행이 없다.
+            stmt = stmt.where(balance >= 0)
+        balance = db.session.execute(stmt).scalar()
+        if balance is None:
+            return False
+
+        card_id = card.id if card is not None else None
+        record_movement(self.id, card_id, amount)
+        db.session.add(
+            AccountHistory(
+                account_id=self.id,
+                card_id=card_id,
+                amount=amount.amount,
+                currency=amount.currency,
+            )
+        )
+        db.session.add(
+            OutboxEvent(
+                type="account.balance_changed",
+                aggregate_id=self.id,
+                user_id=self.user_id,
+                data={
+                    "card_id": card_id,
+                    "amount": amount.amount,
+                    "currency": amount.currency,
+                    "balance": balance,
+                },
+            )
+        )
+
+        return True
+
+    def transfer(self, to_account, amount):
+        """다른 계좌로 amount(Money) 를 이체하는 메서드.
+
+        Note:
+            commit 은 호출한 쪽에서 수행한다.
+
+        Returns:
+            tuple[bool, str]: 성공 여부와 메시지.
+        """
+        if not self.move_balance(-amount):
+            return False, "FAILED: Insufficient balance for transfer."
+        to_account.move_balance(amount)
+
+        return True, f"Transferred {amount.amount} to account {to_account.id}."
+
     def to_dict(self):
         return {
             "id": self.id,
@@ -83,48 +324,611 @@ class Account(db.Model):
         }
 
 
-class CardStatus(PyEnum):
-    ENABLED = "ENABLED"
-    DISABLED = "DISABLED"
-
-
 class Card(db.Model):
+    # (user_id, account_id): 사용자별/계좌별 카드 목록과 일괄 상태 변경 조회용.
+    # account_id 단독 인덱스는 Account.cards 관계 로딩용.
+    __table_args__ = (
+        db.Index("ix_card_user_id_account_id", "user_id", "account_id"),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
-    card_number = db.Column(db.String(16), unique=True, nullable=False)
-    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
+    # 카드 번호 평문은 저장하지 않는다. 조회와 중복 확인은 해시 컬럼의 UNIQUE
+    # 인덱스로 하고, 화면에는 마지막 4자리만 보여 준다.
+    card_number_hash = db.Column(
+        db.String(64), unique=True, index=True, nullable=False
+    )
+    card_last4 = db.Column(db.String(4), nullable=False)
+    user_id = db.Column(
+        db.Integer,
+        db.ForeignKey("user.id", ondelete="CASCADE"),
+        nullable=False,
+    )
     account_id = db.Column(
-        db.Integer, db.ForeignKey("account.id"), nullable=False
+        db.Integer,
+        db.ForeignKey("account.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
     )
     state = db.Column(
         Enum(CardStatus), nullable=False, default=CardStatus.DISABLED
     )
 
+    @property
+    def card_number(self):
+        raise AttributeError("card_number is not a readable attribute")
+
+    @card_number.setter
+    def card_number(self, card_number):
+        self.card_number_hash = hash_card_number(card_number)
+        self.card_last4 = card_number[-4:]
+
+    @property
+    def masked_card_number(self):
+        return mask_card_number(self.card_last4)
+
+    @property
+    def card_state(self):
+        return get_card_state(self.state)
+
+    def change_state(self, state):
+        """카드 상태를 변경하고, 실제로 변경되었는지 여부를 반환하는 메서드.
+
+        Note:
+            이미 같은 상태인 경우 아무것도 바꾸지 않으므로 호출한 쪽에서 commit 을
+            생략할 수 있다. 바꿀 수 있는 상태는 `ALLOWED_TRANSITIONS` 를 따른다.
+
+        Raises:
+            CardStateError: 현재 상태에서 state 로 바꿀 수 없는 경우
+                (예: 만료된 카드의 활성화).
+        """
+        if self.state == state:
+            return False
+
+        if not can_change_state(self.state, state):
+            current = (self.state or CardStatus.DISABLED).value.lower()
+            raise CardStateError(
+                f"Cannot change card to {state.value.lower()}. "
+                f"Card is {current}."
+            )
+
+        self.state = state
+        return True
+
+    @classmethod
+    def bulk_change_state(cls, state, **filters):
+        """조건에 맞는 카드들의 상태를 하나의 UPDATE 문으로 변경하는 메서드.
+
+        Note:
+            카드를 하나씩 불러오지 않고 `UPDATE card SET state=... WHERE ...` 한 번으로
+            처리하며, 이미 같은 상태인 카드와 state 로 바꿀 수 없는 상태(만료 등)의
+            카드는 변경 대상에서 제외된다. commit 은 호출한 쪽에서 수행한다.
+
+        Returns:
+            list[int]: 실제로 상태가 변경된 카드 id 목록.
+
+        Examples:
+            >>> Card.bulk_change_state(CardStatus.DISABLED, user_id=1)
+            [3, 4, 7]
+        """
+        stmt = (
+            update(cls)
+            .filter_by(**filters)
+            .where(cls.state.in_(allowed_from(state)))
+            .values(state=state)
+            .returning(cls.id)
+        )
+        card_ids = db.session.execute(stmt).scalars().all()
+
+        return sorted(card_ids)
+
     def enable(self):
-        self.state = CardStatus.ENABLED
+        return self.change_state(CardStatus.ENABLED)
 
     def disable(self):
-        self.state = CardStatus.DISABLED
+        return self.change_state(CardStatus.DISABLED)
 
     def verify_owner(self, user):
         return self.user_id == user.id
 
     def withdraw(self, account, amount):
-        if self.state == CardStatus.ENABLED:
-            return Enabled().withdraw(account, amount)
-        else:
-            return Disabled().withdraw(account, amount)
+        return self.card_state.withdraw(self, account, amount)
 
     def deposit(self, account, amount):
-        if self.state == CardStatus.ENABLED:
-            return Enabled().deposit(account, amount)
-        else:
-            return Disabled().deposit(account, amount)
+        return self.card_state.deposit(self, account, amount)
 
     def to_dict(self):
         return {
             "id": self.id,
             "user_name": self.user.name,
             "account_id": self.account.id,
-            "card_number": self.card_number,
+            "card_number": self.masked_card_number,
             "status": self.state.value.lower(),
         }
+
+
+class WithdrawalUsage(db.Model):
+    """카드/계좌별 하루 인출 누적액을 저장하는 집계 테이블.
+
+    Note:
+        인출 내역 전체를 합산하지 않고 (대상, id, 날짜) 단위 한 행만 읽어
+        일일 한도를 확인한다. subject 는 "card" 또는 "account" 이다.
+    """
+
+    subject = db.Column(db.String(10), primary_key=True)
+    subject_id = db.Column(db.Integer, primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    amount = db.Column(db.Integer, nullable=False, default=0)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+
+def utcnow():
+    return datetime.now(timezone.utc)
+
+
+class JobStatus(PyEnum):
+    PENDING = "PENDING"
+    RUNNING = "RUNNING"
+    DONE = "DONE"
+    FAILED = "FAILED"
+
+
+class Job(db.Model):
+    """백그라운드 작업 큐에 등록된 작업 한 건."""
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(50), nullable=False)
+    params = db.Column(db.JSON, nullable=False, default=dict)
+    status = db.Column(
+        Enum(JobStatus), nullable=False, default=JobStatus.PENDING, index=True
+    )
+    result = db.Column(db.JSON)
+    error = db.Column(db.Text)
+    user_id = db.Column(
+        db.Integer, db.ForeignKey("user.id", ondelete="SET NULL")
+    )
+    created_at = db.Column(db.DateTime, nullable=False, default=utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    # 실행 중인 워커가 주기적으로 연장하는 임대 만료 시각과 가져간 횟수
+    lease_expires_at = db.Column(db.DateTime)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+
+    def to_dict(self):
+        """API 응답용 dict.
+
+        Note:
+            실패한 작업의 오류 내용은 서버 로그에만 남기고 일반 메시지를 준다.
+            결과의 "file"(EXPORT_DIR 안의 파일 이름) 대신 내려받을 주소를 준다.
+        """
+        result = None
+        if self.status == JobStatus.DONE and self.result is not None:
+            result = dict(self.result)
+            if result.pop("file", None) is not None:
+                result["download_url"] = f"/jobs/{self.id}/download"
+
+        return {
+            "id": self.id,
+            "name": self.name,
+            "status": self.status.value.lower(),
+            "result": result,
+            "error": (
+                "Job failed" if self.status == JobStatus.FAILED else None
+            ),
+            "created_at": self.created_at.isoformat(),
+            "finished_at": self.finished_at and self.finished_at.isoformat(),
+        }
+
+
+class AccountHistory(db.Model):
+    """계좌 잔액 변경 내역. amount 는 입금이면 양수, 출금이면 음수이다."""
+
+    id = db.Column(db.Integer, primary_key=True)
+    account_id = db.Column(
+        db.Integer,
+        db.ForeignKey("account.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+    )
+    card_id = db.Column(
+        db.Integer, db.ForeignKey("card.id", ondelete="SET NULL")
+    )
+    amount = db.Column(db.Integer, nullable=False)
+    currency = db.Column(
+        db.String(3),
+        nullable=False,
+        default=BASE_CURRENCY,
+        server_default=BASE_CURRENCY,
+    )
+    created_at = db.Column(db.DateTime, nullable=False, default=utcnow)
+
+
+class ArchivedHistory(db.Model):
+    """보관 파일로 옮긴 계좌 잔액 변경 내역의 (계좌, 통화) 별 합계.
+
+    Note:
+        원장(AccountHistory)에서 오래된 내역을 옮겨도 잔액 = 내역 합계 관계가
+        유지되도록 옮긴 만큼을 여기 누적한다 (`app.archive`).
+    """
+
+    account_id = db.Column(
+        db.Integer,
+        db.ForeignKey("account.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    currency = db.Column(db.String(3), primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+    amount = db.Column(db.BigInteger, nullable=False, default=0)
+    archived_until = db.Column(db.DateTime, nullable=False)
+
+
+class ClosedAccount(db.Model):
+    """지운 계좌를 보관 파일로 옮기기 전까지 두는 행.
+
+    Note:
+        계좌를 지우는 요청이 계좌 정보를 여기에, 내역을 ClosedAccountHistory 에
+        옮기고 보관 작업(`archive_closed_account`)을 등록한다. 작업이 보관 파일을
+        쓴 뒤 행을 지운다.
+    """
+
+    id = db.Column(db.Integer, primary_key=True)
+    account_id = db.Column(db.Integer, nullable=False)
+    account_number = db.Column(db.String(13), nullable=False)
+    user_id = db.Column(db.Integer, nullable=False)
+    name = db.Column(db.String(100), nullable=False)
+    balances = db.Column(db.JSON, nullable=False, default=dict)
+    closed_at = db.Column(db.DateTime, nullable=False, default=utcnow)
+
+
+class ClosedAccountHistory(db.Model):
+    """보관 파일로 옮기기 전의 지운 계좌 내역. id 는 AccountHistory 의 id 이다."""
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    closed_account_id = db.Column(
+        db.Integer,
+        db.ForeignKey("closed_account.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+    )
+    account_id = db.Column(db.Integer, nullable=False)
+    card_id = db.Column(db.Integer)
+    amount = db.Column(db.Integer, nullable=False)
+    currency = db.Column(db.String(3), nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False)
+
+
+class ArchivedAccountNumber(db.Model):
+    """지운 계좌의 번호. 다시 쓰지 않도록 AccountNumber 에서 옮겨 둔다.
+
+    Note:
+        `flask archive run` 이 남은 계좌가 없는 AccountNumber 행을 옮긴다.
+        보관 파일과 달리 모든 호스트가 같은 DB 에서 확인한다.
+    """
+
+    number = db.Column(db.String(13), primary_key=True)
+    archived_at = db.Column(db.DateTime, nullable=False, default=utcnow)
+
+
+class AccountBalance(db.Model):
+    """기준 통화가 아닌 통화의 계좌 잔액. (계좌, 통화) 당 한 행이다.
+
+    Note:
+        amount 는 해당 통화의 최소 단위 정수이다 (USD 는 센트).
+    """
+
+    account_id = db.Column(
+        db.Integer,
+        db.ForeignKey("account.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    currency = db.Column(db.String(3), primary_key=True)
+    amount = db.Column(db.BigInteger, nullable=False, default=0)
+
+
+class DailyRollup(db.Model):
+    """계좌/카드별 하루 입출금 집계. (계좌, 카드, 날짜, 통화) 당 한 행이다.
+
+    Note:
+        잔액 변경과 같은 트랜잭션에서 `app.rollups.record_movement` 가 갱신한다.
+        card_id 가 0 인 행은 카드를 거치지 않은 이체까지 포함한 계좌 전체 집계이며,
+        기본 키 순서대로 (account_id, 0, 날짜 범위) 조회가 인덱스 범위 조회가 된다.
+        카드가 삭제되어도 지난 집계는 남도록 card_id 에는 외래 키를 두지 않는다.
+        날짜는 UTC 기준이다.
+    """
+
+    account_id = db.Column(
+        db.Integer,
+        db.ForeignKey("account.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    card_id = db.Column(db.Integer, primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    currency = db.Column(db.String(3), primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+    amount_in = db.Column(db.BigInteger, nullable=False, default=0)
+    amount_out = db.Column(db.BigInteger, nullable=False, default=0)
+
+
+class FxRate(db.Model):
+    """통화 1 단위의 기준 통화 가격. 앱은 `fx_rates` 로 메모리에 올려 쓴다."""
+
+    currency = db.Column(db.String(3), primary_key=True)
+    rate = db.Column(db.Numeric(18, 6), nullable=False)
+    updated_at = db.Column(
+        db.DateTime, nullable=False, default=utcnow, onupdate=utcnow
+    )
+
+
+def as_utc(value):
+    """DB 에서 읽은 naive datetime 을 UTC aware datetime 으로 바꾸는 메서드."""
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+
+    return value
+
+
+def as_naive_utc(value):
+    """aware datetime 을 naive DateTime 컬럼에 넣을 UTC naive datetime 으로 바꾸는 메서드.
+
+    Note:
+        DB 의 시간대 설정과 관계없이 naive 컬럼에는 항상 UTC 시각을 저장하고
+        비교한다. `as_utc` 의 반대 방향이다.
+    """
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+    return value
+
+
+def add_months(value, months):
+    month = value.month - 1 + months
+    year = value.year + month // 12
+    month = month % 12 + 1
+    day = min(value.day, calendar.monthrange(year, month)[1])
+
+    return value.replace(year=year, month=month, day=day)
+
+
+class TransferInterval(PyEnum):
+    ONCE = "ONCE"
+    DAILY = "DAILY"
+    WEEKLY = "WEEKLY"
+    MONTHLY = "MONTHLY"
+
+
+class StandingOrder(db.Model):
+    """예약/정기 이체 지시. next_run_at 이 지나면 scheduler 가 실행한다.
+
+    Note:
+        n 번째 실행 시각은 항상 start_at 에서 계산하므로, 31일에 시작한 월간
+        이체가 2월에 28일로 당겨져도 3월에는 다시 31일에 실행된다.
+    """
+
+    # scheduler 가 다가올 구간의 지시만 범위 조회하기 위한 인덱스.
+    __table_args__ = (
+        db.Index(
+            "ix_standing_order_active_next_run_at", "active", "next_run_at"
+        ),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(
+        db.Integer,
+        db.ForeignKey("user.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+    )
+    from_account_id = db.Column(
+        db.Integer,
+        db.ForeignKey("account.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+    )
+    to_account_id = db.Column(
+        db.Integer,
+        db.ForeignKey("account.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    amount = db.Column(db.Integer, nullable=False)
+    currency = db.Column(db.String(3), nullable=False, default=BASE_CURRENCY)
+    interval = db.Column(Enum(TransferInterval), nullable=False)
+    start_at = db.Column(db.DateTime, nullable=False)
+    next_run_at = db.Column(db.DateTime, nullable=False)
+    run_count = db.Column(db.Integer, nullable=False, default=0)
+    active = db.Column(db.Boolean, nullable=False, default=True)
+    last_error = db.Column(db.String(200))
+    created_at = db.Column(db.DateTime, nullable=False, default=utcnow)
+
+    from_account = db.relationship("Account", foreign_keys=[from_account_id])
+    to_account = db.relationship("Account", foreign_keys=[to_account_id])
+
+    @property
+    def money(self):
+        return Money(self.amount, self.currency)
+
+    def occurrence(self, n):
+        """n 번째(0 부터) 실행 예정 시각."""
+        start_at = as_utc(self.start_at)
+        if self.interval == TransferInterval.DAILY:
+            return start_at + timedelta(days=n)
+        if self.interval == TransferInterval.WEEKLY:
+            return start_at + timedelta(weeks=n)
+        if self.interval == TransferInterval.MONTHLY:
+            return add_months(start_at, n)
+
+        return start_at
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "from_account_id": self.from_account_id,
+            "to_account_id": self.to_account_id,
+            "amount": self.amount,
+            "currency": self.currency,
+            "interval": self.interval.value.lower(),
+            "next_run_at": as_utc(self.next_run_at).isoformat(),
+            "run_count": self.run_count,
+            "active": self.active,
+            "last_error": self.last_error,
+        }
+
+
+class OutboxEvent(db.Model):
+    """계좌/카드/사용자 변경 이벤트 로그. id 가 소비자가 읽어 가는 offset 이다.
+
+    Note:
+        변경과 같은 트랜잭션에서 추가되므로 commit 된 변경에만 이벤트가 남는다.
+        사용자가 삭제된 뒤에도 이벤트는 남아야 하므로 외래 키를 두지 않는다.
+    """
+
+    id = db.Column(db.Integer, primary_key=True)
+    type = db.Column(db.String(50), nullable=False)
+    aggregate_id = db.Column(db.Integer, nullable=False)
+    user_id = db.Column(db.Integer)
+    data = db.Column(db.JSON, nullable=False, default=dict)
+    created_at = db.Column(db.DateTime, nullable=False, default=utcnow)
+
+    def to_dict(self):
+        return {
+            "offset": self.id,
+            "type": self.type,
+            "aggregate_id": self.aggregate_id,
+            "user_id": self.user_id,
+            "data": self.data,
+            "created_at": as_utc(self.created_at).isoformat(),
+        }
+
+
+class TokenRevocation(db.Model):
+    """폐기된 bearer 토큰(jti) 또는 사용자별 토큰 폐기 기록.
+
+    Note:
+        jti 가 있는 행은 그 토큰 하나를, jti 가 없는 행은 (tenant, user_id)
+        에게 issued_before(epoch 초) 이전에 발급된 모든 토큰을 폐기한다.
+        은행(tenant)/shard 마다 사용자와 같은 DB 에 두므로 모든 워커가 같은
+        목록을 본다. 여러 은행이 한 DB 를 함께 쓰더라도 다른 은행의 같은 id
+        사용자를 폐기하지 않도록 은행 key(기본 은행은 None)를 함께 둔다. expires_at(epoch 초)이 지난 행은 토큰도 만료되었으므로
+        새로 폐기할 때 지운다. 사용자가 삭제된 뒤에도 남아야 하므로 외래 키를
+        두지 않는다.
+    """
+
+    __table_args__ = (
+        db.Index(
+            "ix_token_revocation_user", "tenant", "user_id", "issued_before"
+        ),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    jti = db.Column(db.String(32), unique=True)
+    tenant = db.Column(db.String(64))
+    user_id = db.Column(db.Integer, nullable=False)
+    issued_before = db.Column(db.Integer)
+    expires_at = db.Column(db.Integer, nullable=False, index=True)
+
+
+class ShardTransferStatus(PyEnum):
+    PREPARED = "PREPARED"
+    COMMITTED = "COMMITTED"
+    FAILED = "FAILED"
+
+
+class ShardTransfer(db.Model):
+    """다른 shard 의 계좌와 주고받은 이체 한 건.
+
+    Note:
+        보내는 shard 에는 direction "out" 행이, 받는 shard 에는 같은 id 의
+        direction "in" 행이 남는다. "out" 행은 출금과 함께 PREPARED 로 만들어지고,
+        받는 쪽 입금이 끝나면 COMMITTED, 받는 계좌가 없어 환불하면 FAILED 가 된다.
+        "in" 행은 같은 이체가 두 번 입금되지 않도록 막는다.
+        상대 shard 의 계좌는 계좌 번호로만 가리킨다.
+    """
+
+    __table_args__ = (db.Index("ix_shard_transfer_status", "status"),)
+
+    id = db.Column(db.String(32), primary_key=True)
+    direction = db.Column(db.String(3), nullable=False)
+    account_id = db.Column(
+        db.Integer,
+        db.ForeignKey("account.id", ondelete="SET NULL"),
+        index=True,
+    )
+    peer_shard = db.Column(db.Integer, nullable=False)
+    peer_account_number = db.Column(db.String(13), nullable=False)
+    amount = db.Column(db.BigInteger, nullable=False)
+    currency = db.Column(db.String(3), nullable=False)
+    status = db.Column(Enum(ShardTransferStatus), nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, default=utcnow)
+    updated_at = db.Column(
+        db.DateTime, nullable=False, default=utcnow, onupdate=utcnow
+    )
+
+    account = db.relationship("Account")
+
+    @property
+    def money(self):
+        return Money(self.amount, self.currency)
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "direction": self.direction,
+            "account_id": self.account_id,
+            "peer_account_number": self.peer_account_number,
+            "amount": self.amount,
+            "currency": self.currency,
+            "status": self.status.value.lower(),
+        }
+
+
+class UserShard(db.Model):
+    """여러 shard 로 나눈 경우 사용자가 있는 shard 를 기록하는 전역 목록.
+
+    Note:
+        shard 0 에만 두고 `app.directory` 가 읽고 쓴다. id 는 사용자의 id 로,
+        이 목록에서 매기므로 shard 가 달라도 겹치지 않는다. 사용자를 지우면
+        email 만 비워 둬 같은 id 를 다시 주지 않는다.
+    """
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    email = db.Column(db.String(120), unique=True)
+    shard = db.Column(db.Integer, nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, default=utcnow)
+
+
+class CardShard(db.Model):
+    """여러 shard 로 나눈 경우 카드 번호(해시)가 등록된 shard 의 전역 목록.
+
+    Note:
+        shard 0 에만 두고, 카드를 등록하기 전에 먼저 넣어 다른 shard 에 같은
+        카드 번호를 등록하지 못하게 한다.
+    """
+
+    card_number_hash = db.Column(db.String(64), primary_key=True)
+    shard = db.Column(db.Integer, nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, default=utcnow)
+
+
+class AccountShard(db.Model):
+    """여러 shard 로 나눈 경우 계좌 번호가 있는 shard 의 전역 목록.
+
+    Note:
+        shard 0 에만 두고, 계좌를 만들기 전에 먼저 넣어 다른 shard 가 같은 계좌
+        번호를 쓰지 못하게 한다. 계좌 번호는 다시 쓰지 않으므로 계좌를 지워도
+        행을 남긴다.
+    """
+
+    account_number = db.Column(db.String(13), primary_key=True)
+    shard = db.Column(db.Integer, nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, default=utcnow)
+
+
+class ExistenceCounter(db.Model):
+    """존재 확인 filter 종류별로 commit 된 키 INSERT 수를 세는 행.
+
+    Note:
+        키를 넣는 트랜잭션에서 함께 더하므로 롤백하면 되돌아간다. filter 파일의
+        mark 와 맞춰 보아 filter 가 모든 키를 담고 있는지 확인한다 (`app.existence`).
+        은행/shard 의 DB 마다 따로 있다.
+    """
+
+    kind = db.Column(db.String(20), primary_key=True)
+    inserted = db.Column(db.BigInteger, nullable=False, default=0)
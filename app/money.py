@@ -0,0 +1,187 @@
+import threading
+import time
+from decimal import ROUND_HALF_EVEN, Decimal
+from functools import total_ordering
+
+from flask import current_app
+from sqlalchemy import select
+
+from app import db
+from app.sharding import current_partition
+
+# 장부의 기준 통화. Account.balance 와 인출 한도는 이 통화 기준이다.
+BASE_CURRENCY = "KRW"
+
+# 지원하는 통화와 최소 단위 자릿수 (ISO 4217).
+CURRENCY_EXPONENTS = {
+    "KRW": 0,
+    "JPY": 0,
+    "USD": 2,
+    "EUR": 2,
+}
+
+
+class MoneyError(ValueError):
+    pass
+
+
+@total_ordering
+class Money:
+    """최소 단위 정수 금액과 통화 코드로 이루어진 값 객체.
+
+    Note:
+        금액은 항상 최소 단위(KRW 는 원, USD 는 센트)의 int 로만 만들 수 있으며,
+        float 나 문자열은 거부한다. 서로 다른 통화끼리의 연산과 비교는
+        MoneyError 를 일으키므로 환산은 `fx_rates.convert` 로 명시적으로 한다.
+
+    Examples:
+        >>> Money(1500, "USD") - Money(500, "USD")
+        Money(1000, 'USD')
+    """
+
+    __slots__ = ("amount", "currency")
+
+    def __init__(self, amount, currency=BASE_CURRENCY):
+        # bool 은 int 의 하위 타입이므로 type 으로 정확히 비교한다.
+        if type(amount) is not int:
+            raise MoneyError("Amount must be an integer in minor units.")
+
+        if not isinstance(currency, str):
+            raise MoneyError("Currency must be a currency code.")
+
+        currency = currency.upper()
+        if currency not in CURRENCY_EXPONENTS:
+            raise MoneyError(f"Unsupported currency: {currency}")
+
+        self.amount = amount
+        self.currency = currency
+
+    @classmethod
+    def from_request(cls, amount, currency=None):
+        """요청 본문의 금액/통화로 양수 금액을 만드는 메서드."""
+        if amount is None:
+            raise MoneyError("Amount is required.")
+
+        money = cls(amount, currency or BASE_CURRENCY)
+        if money.amount <= 0:
+            raise MoneyError("Amount must be positive.")
+
+        return money
+
+    def _check_currency(self, other):
+        if self.currency != other.currency:
+            raise MoneyError(
+                f"Currency mismatch: {self.currency} and {other.currency}"
+            )
+
+    def __add__(self, other):
+        if not isinstance(other, Money):
+            return NotImplemented
+
+        self._check_currency(other)
+        return Money(self.amount + other.amount, self.currency)
+
+    def __sub__(self, other):
+        if not isinstance(other, Money):
+            return NotImplemented
+
+        self._check_currency(other)
+        return Money(self.amount - other.amount, self.currency)
+
+    def __neg__(self):
+        return Money(-self.amount, self.currency)
+
+    def __eq__(self, other):
+        if not isinstance(other, Money):
+            return NotImplemented
+
+        return self.amount == other.amount and self.currency == other.currency
+
+    def __lt__(self, other):
+        if not isinstance(other, Money):
+            return NotImplemented
+
+        self._check_currency(other)
+        return self.amount < other.amount
+
+    def __hash__(self):
+        return hash((self.amount, self.currency))
+
+    def __repr__(self):
+        return f"Money({self.amount}, {self.currency!r})"
+
+    def to_dict(self):
+        return {"amount": self.amount, "currency": self.currency}
+
+
+class FxRateTable:
+    """FxRate 테이블을 메모리에 올려 두고 주기적으로 다시 읽는 환율표.
+
+    Note:
+        환율은 요청마다 조회하지 않고 `FX_RATES_TTL` 초가 지난 뒤 처음 환산할 때
+        한 번에 다시 읽는다. 환율은 기준 통화 1 단위가 아니라 해당 통화 1 단위의
+        기준 통화 가격이다 (예: USD 1380.50 이면 1 USD = 1380.50 KRW).
+        은행(tenant)과 shard 마다 DB 가 다르므로 `current_partition()` 마다 따로
+        읽어 둔다.
+    """
+
+    __slots__ = ("_tables", "_lock")
+
+    def __init__(self):
+        self._tables = {}
+        self._lock = threading.Lock()
+
+    def _load(self):
+        from app.models import FxRate
+
+        rates = db.session.execute(select(FxRate.currency, FxRate.rate))
+
+        return {currency: Decimal(rate) for currency, rate in rates}
+
+    def rates(self):
+        ttl = current_app.config.get("FX_RATES_TTL", 300)
+        now = time.monotonic()
+        partition = current_partition()
+        with self._lock:
+            table = self._tables.get(partition)
+            if table is None or now - table[0] >= ttl:
+                table = self._tables[partition] = (now, self._load())
+
+            return table[1]
+
+    def rate(self, currency):
+        if currency == BASE_CURRENCY:
+            return Decimal(1)
+
+        rate = self.rates().get(currency)
+        if rate is None:
+            raise MoneyError(f"No exchange rate for {currency}")
+
+        return rate
+
+    def convert(self, money, currency):
+        """money 를 currency 로 환산하는 메서드 (최소 단위에서 반올림)."""
+        if money.currency == currency:
+            return money
+
+        major = Decimal(money.amount).scaleb(
+            -CURRENCY_EXPONENTS[money.currency]
+        )
+        converted = (
+            major * self.rate(money.currency) / self.rate(currency)
+        ).scaleb(CURRENCY_EXPONENTS[currency])
+
+        return Money(
+            int(converted.quantize(Decimal(1), rounding=ROUND_HALF_EVEN)),
+            currency,
+        )
+
+    def to_base(self, money):
+        return self.convert(money, BASE_CURRENCY)
+
+    def clear(self):
+        with self._lock:
+            self._tables.clear()
+
+
+fx_rates = FxRateTable()
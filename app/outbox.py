@@ -0,0 +1,166 @@
+import json
+import os
+import time
+from datetime import timedelta
+
+import click
+from flask import current_app
+from flask.cli import AppGroup, with_appcontext
+from sqlalchemy import bindparam, func, select
+
+from app import db
+from app.models import OutboxEvent, as_utc, utcnow
+
+events_cli = AppGroup("events", help="Change event outbox commands.")
+
+
+def emit(event_type, aggregate_id, user_id=None, **data):
+    """변경 이벤트를 outbox 에 추가하는 메서드.
+
+    Note:
+        commit 은 호출한 쪽에서 변경 내용과 함께 수행한다.
+
+    Examples:
+        >>> emit("card.state_changed", card.id, card.user_id, state="enabled")
+    """
+    event = OutboxEvent(
+        type=event_type, aggregate_id=aggregate_id, user_id=user_id, data=data
+    )
+    db.session.add(event)
+
+    return event
+
+
+def _settled(events, after, gap_timeout):
+    """events 중 앞에 비어 있는 offset 이 없는 앞부분을 반환하는 메서드.
+
+    Note:
+        id 는 INSERT 할 때 정해지고 commit 순서와 다를 수 있으므로, 빈 id 는
+        아직 commit 되지 않은 트랜잭션의 이벤트일 수 있다. 빈 id 뒤의 이벤트는
+        그 id 가 채워지거나, 빈 id 다음 이벤트가 gap_timeout 초보다 오래되어
+        (롤백되었다고 보고) 건너뛸 때까지 돌려주지 않는다.
+    """
+    horizon = utcnow() - timedelta(seconds=gap_timeout)
+    expected = after + 1
+    settled = []
+    for event in events:
+        if event.id != expected and as_utc(event.created_at) > horizon:
+            break
+        settled.append(event)
+        expected = event.id + 1
+
+    return settled
+
+
+def read_events(
+    after=0, limit=100, timeout=0.0, poll_interval=0.5, types=None
+):
+    """offset after 이후의 이벤트를 순서대로 읽는 메서드.
+
+    Note:
+        기본 키 범위 조회 한 번으로 읽으며, 새 이벤트가 없으면 timeout 초까지
+        poll_interval 간격으로 다시 확인한다 (long-poll).
+        늦게 commit 되는 작은 id 를 건너뛰지 않도록 빈 id 뒤의 이벤트는 잠시
+        보류한다 (`OUTBOX_GAP_TIMEOUT`).
+        types 가 주어지면 해당 종류의 이벤트만 돌려주지만, offset 은 다른 종류의
+        이벤트까지 포함해 앞으로 나아간다.
+
+    Returns:
+        tuple[list[OutboxEvent], int]: 최대 limit 개의 이벤트와 다음에 읽을
+        offset.
+    """
+    query = (
+        select(OutboxEvent)
+        .where(OutboxEvent.id > bindparam("after"))
+        .order_by(OutboxEvent.id)
+        .limit(limit)
+    )
+    gap_timeout = current_app.config.get("OUTBOX_GAP_TIMEOUT", 10)
+
+    deadline = time.monotonic() + timeout
+    while True:
+        events = _settled(
+            db.session.execute(query, {"after": after}).scalars().all(),
+            after,
+            gap_timeout,
+        )
+        if events or time.monotonic() >= deadline:
+            break
+
+        # 트랜잭션을 끝내야 다른 연결이 commit 한 이벤트가 보인다.
+        db.session.rollback()
+        time.sleep(poll_interval)
+
+    if events:
+        after = events[-1].id
+    if types is not None:
+        events = [event for event in events if event.type in types]
+
+    return events, after
+
+
+def latest_offset():
+    return db.session.execute(select(func.max(OutboxEvent.id))).scalar() or 0
+
+
+def load_offset(path):
+    if not os.path.exists(path):
+        return 0
+
+    with open(path) as f:
+        return json.load(f)["offset"]
+
+
+def save_offset(path, offset):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"offset": offset}, f)
+    os.replace(tmp_path, path)
+
+
+def sink_to_file(path, batch_size=500, timeout=0.0):
+    """저장된 offset 이후의 이벤트를 JSON lines 파일 끝에 덧붙이는 메서드.
+
+    Note:
+        이벤트를 파일에 쓰고 fsync 한 뒤에 offset 을 저장하므로, 중간에 죽더라도
+        이벤트가 빠지지는 않는다 (마지막 배치가 중복될 수는 있다).
+        offset 은 `<path>.offset` 파일에 저장된다.
+
+    Returns:
+        int: 기록한 이벤트 수.
+    """
+    offset_path = f"{path}.offset"
+    offset = load_offset(offset_path)
+
+    written = 0
+    with open(path, "a") as f:
+        while True:
+            events, offset = read_events(offset, batch_size, timeout)
+            if not events:
+                return written
+
+            for event in events:
+                f.write(json.dumps(event.to_dict(), ensure_ascii=False))
+                f.write("\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+            save_offset(offset_path, offset)
+            written += len(events)
+            db.session.rollback()
+
+
+@events_cli.command("sink")
+@click.argument("path")
+@click.option("--batch-size", default=500, show_default=True)
+@click.option("--follow", is_flag=True, help="Keep waiting for new events.")
+@with_appcontext
+def sink_command(path, batch_size, follow):
+    """Append outbox events to a JSON lines file."""
+    written = 0
+    while True:
+        written += sink_to_file(path, batch_size, timeout=30 if follow else 0)
+        if not follow:
+            break
+
+    click.echo(f"Wrote {written} events to {path}.")
@@ -0,0 +1,138 @@
+import logging
+import random
+import time
+from collections import Counter
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+
+from app import db
+
+slow_query_logger = logging.getLogger("app.sql")
+
+
+class QueryStats:
+    """요청 하나에서 실행된 SQL 의 개수, 총 소요 시간, 중복 문장을 모으는 객체."""
+
+    __slots__ = ("count", "total_time", "statements")
+
+    def __init__(self):
+        self.count = 0
+        self.total_time = 0.0
+        self.statements = Counter()
+
+    def add(self, statement, elapsed):
+        self.count += 1
+        self.total_time += elapsed
+        self.statements[statement] += 1
+
+    def duplicates(self):
+        """같은 문장이 여러 번 실행된 경우 (N+1 의심) 문장별 실행 횟수."""
+        return {
+            statement: count
+            for statement, count in self.statements.items()
+            if count > 1
+        }
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, many):
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+def _handle_error(context):
+    # 실패한 문장은 after_cursor_execute 가 불리지 않으므로 여기서 꺼낸다.
+    # 실행 context 가 없으면 before_cursor_execute 전에 실패한 것이다.
+    if context.execution_context is None or context.connection is None:
+        return
+
+    stack = context.connection.info.get("query_start_time")
+    if stack:
+        stack.pop()
+
+
+def _make_after_cursor_execute(app):
+    slow_query_ms = app.config.get("SQL_SLOW_QUERY_MS", 100)
+
+    def _after_cursor_execute(
+        conn, cursor, statement, parameters, context, many
+    ):
+        elapsed = time.perf_counter() - conn.info["query_start_time"].pop()
+
+        if not has_request_context():
+            return
+
+        stats = g.get("query_stats")
+        if stats is not None:
+            stats.add(statement, elapsed)
+
+        if (
+            g.get("query_sampled")
+            and slow_query_ms is not None
+            and elapsed * 1000 >= slow_query_ms
+        ):
+            slow_query_logger.warning(
+                f"Slow query ({elapsed * 1000:.1f} ms) on "
+                f"{request.method} {request.path}: {statement}"
+            )
+
+    return _after_cursor_execute
+
+
+def init_profiling(app):
+    """SQL 프로파일링 리스너와 요청 훅을 등록하는 메서드.
+
+    Note:
+        `SQL_PROFILING` 설정이 켜져 있을 때만 create_app 에서 호출된다.
+        기본 DB 와 bind 엔진뿐 아니라 나중에 만드는 shard/tenant 엔진에도
+        리스너를 건다.
+        - `SQL_PROFILING_HEADERS`: 응답 헤더로 쿼리 수/DB 시간/중복 쿼리 수를 내보냄 (개발용).
+        - `SQL_PROFILING_SAMPLE_RATE`: 느린 쿼리와 중복 쿼리를 로그로 남길 요청 비율 (운영용).
+        - `SQL_SLOW_QUERY_MS`: 느린 쿼리로 기록할 기준 시간(ms).
+    """
+    sample_rate = app.config.get("SQL_PROFILING_SAMPLE_RATE", 1.0)
+    send_headers = app.config.get("SQL_PROFILING_HEADERS", False)
+
+    after_cursor_execute = _make_after_cursor_execute(app)
+
+    def attach(engine):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", after_cursor_execute)
+        event.listen(engine, "handle_error", _handle_error)
+
+    with app.app_context():
+        for engine in db.engines.values():
+            attach(engine)
+    for registry in (app.extensions["shards"], app.extensions["tenants"]):
+        registry.engine_hooks.append(attach)
+
+    @app.before_request
+    def start_query_stats():
+        g.query_stats = QueryStats()
+        g.query_sampled = random.random() < sample_rate
+
+    @app.after_request
+    def report_query_stats(response):
+        stats = g.pop("query_stats", None)
+        if stats is None:
+            return response
+
+        duplicates = stats.duplicates()
+
+        if send_headers:
+            response.headers["X-DB-Query-Count"] = str(stats.count)
+            response.headers["X-DB-Time-ms"] = f"{stats.total_time * 1000:.2f}"
+            response.headers["X-DB-Duplicate-Queries"] = str(
+                sum(count - 1 for count in duplicates.values())
+            )
+
+        if duplicates and g.get("query_sampled"):
+            slow_query_logger.warning(
+                f"Repeated queries on {request.method} {request.path} "
+                f"({stats.count} queries total): "
+                + "; ".join(
+                    f"{count}x {statement}"
+                    for statement, count in duplicates.items()
+                )
+            )
+
+        return response
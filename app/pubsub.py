@@ -0,0 +1,178 @@
+import queue
+import threading
+import time
+
+from flask import current_app
+
+from app import db
+from app.outbox import latest_offset, read_events
+from app.sharding import current_partition, use_shard
+from app.tenancy import use_tenant
+
+
+class Broker:
+    """채널별 구독자 큐에 메시지를 전달하는 프로세스 내 pub/sub.
+
+    Note:
+        구독자마다 크기가 정해진 큐를 하나씩 두고, 느린 구독자의 큐가 가득 차면
+        가장 오래된 메시지를 버린다. 잔액 스트림은 최신 잔액만 의미가 있으므로
+        메시지를 잃어도 다음 메시지로 따라잡는다.
+
+    Examples:
+        >>> q = broker.subscribe(("account", 1))
+        >>> broker.publish(("account", 1), {"balance": 1000})
+        1
+        >>> q.get_nowait()
+        {'balance': 1000}
+    """
+
+    __slots__ = ("maxsize", "_subscribers", "_lock")
+
+    def __init__(self, maxsize=16):
+        self.maxsize = maxsize
+        self._subscribers = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, channel):
+        subscriber = queue.Queue(maxsize=self.maxsize)
+        with self._lock:
+            self._subscribers.setdefault(channel, set()).add(subscriber)
+
+        return subscriber
+
+    def unsubscribe(self, channel, subscriber):
+        with self._lock:
+            subscribers = self._subscribers.get(channel)
+            if subscribers is None:
+                return
+
+            subscribers.discard(subscriber)
+            if not subscribers:
+                del self._subscribers[channel]
+
+    def publish(self, channel, message):
+        """채널의 구독자들에게 메시지를 전달하고, 전달한 구독자 수를 반환하는 메서드."""
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+
+        for subscriber in subscribers:
+            while True:
+                try:
+                    subscriber.put_nowait(message)
+                    break
+                except queue.Full:
+                    try:
+                        subscriber.get_nowait()
+                    except queue.Empty:
+                        pass
+
+        return len(subscribers)
+
+
+broker = Broker()
+
+
+def balance_channel(account_id):
+    return ("account", current_partition(), account_id)
+
+
+def publish_balance(account, currency):
+    """commit 된 잔액 변경을 잔액 스트림 구독자에게 알리는 메서드.
+
+    Note:
+        `BALANCE_STREAM_FANOUT` 이 켜져 있으면 다른 프로세스의 변경과 함께
+        outbox 를 따라 읽는 스레드가 전달하므로 여기서는 보내지 않는다.
+    """
+    if current_app.config.get("BALANCE_STREAM_FANOUT"):
+        return
+
+    broker.publish(
+        balance_channel(account.id),
+        {
+            "account_id": account.id,
+            "currency": currency,
+            "balance": account.get_balance(currency).amount,
+        },
+    )
+
+
+def run_outbox_fanout(
+    app,
+    poll_timeout=5.0,
+    stop=None,
+    after=None,
+    shard=0,
+    tenant=None,
+    max_backoff=30.0,
+):
+    """outbox 의 잔액 변경 이벤트를 이 프로세스의 구독자에게 전달하는 루프.
+
+    Note:
+        여러 프로세스(워커)로 서비스할 때, 다른 프로세스나 예약 이체 scheduler 가
+        만든 잔액 변경도 스트림에 흘려보내기 위해 사용한다.
+        프로세스마다 스레드 하나가 outbox 를 long-poll 하므로, DB 부하는 구독자
+        수와 무관하다. after 를 주지 않으면 시작 시점 이후의 이벤트부터 전달한다.
+        outbox 는 은행(tenant)과 shard 마다 따로 있으므로 그 하나당 스레드
+        하나를 띄운다.
+        DB 오류로 스레드가 끝나면 스트림이 조용히 멈추므로, 오류를 로그로 남기고
+        1초부터 max_backoff 초까지 두 배씩 늘려 기다린 뒤 다시 읽는다.
+    """
+    with app.app_context():
+        use_tenant(tenant)
+        use_shard(shard)
+        backoff = 1.0
+        while stop is None or not stop.is_set():
+            try:
+                if after is None:
+                    after = latest_offset()
+                events, after = read_events(
+                    after,
+                    limit=500,
+                    timeout=poll_timeout,
+                    types=("account.balance_changed",),
+                )
+                for event in events:
+                    broker.publish(
+                        balance_channel(event.aggregate_id),
+                        {
+                            "account_id": event.aggregate_id,
+                            "currency": event.data["currency"],
+                            "balance": event.data["balance"],
+                        },
+                    )
+                db.session.rollback()
+            except Exception:
+                db.session.rollback()
+                current_app.logger.exception(
+                    f"Balance stream fan-out for {tenant or 'default'} "
+                    f"shard {shard} raised an error"
+                )
+                if stop is None:
+                    time.sleep(backoff)
+                else:
+                    stop.wait(backoff)
+                backoff = min(backoff * 2, max_backoff)
+            else:
+                backoff = 1.0
+
+
+def start_outbox_fanout(app):
+    # 기본 DB 의 shard 들과, shard 로 나누지 않는 다른 은행들의 DB
+    partitions = [
+        (None, shard) for shard in range(app.extensions["shards"].count)
+    ]
+    partitions += [(tenant, 0) for tenant in app.extensions["tenants"].tenants]
+
+    threads = []
+    for tenant, shard in partitions:
+        thread = threading.Thread(
+            target=run_outbox_fanout,
+            args=(app,),
+            kwargs={"shard": shard, "tenant": tenant},
+            name=f"balance-stream-fanout-{tenant or 'default'}-{shard}",
+            daemon=True,
+        )
+        thread.start()
+        threads.append(thread)
+
+    return threads
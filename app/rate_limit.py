@@ -0,0 +1,127 @@
+import functools
+import threading
+import time
+
+from flask import current_app, jsonify, request
+
+from app.sharding import current_partition
+
+
+class TokenBucketStore:
+    """키별 토큰 버킷을 보관하는 인메모리 저장소.
+
+    Note:
+        버킷은 (남은 토큰, 마지막 갱신 시각, 가득 차는 시각) 세 값만 저장한다.
+        가득 찬 버킷은 없는 버킷과 같으므로 `max_keys` 를 넘으면 만료된 버킷부터
+        정리한다. 여러 프로세스가 같은 한도를 공유해야 하면 같은 `consume`
+        인터페이스를 가진 객체를 `RATE_LIMIT_STORE` 설정으로 지정하면 된다.
+
+    Examples:
+        >>> store = TokenBucketStore()
+        >>> store.consume(("login_ip", "127.0.0.1"), capacity=5, period=60)
+        True
+    """
+
+    __slots__ = ("max_keys", "_buckets", "_lock")
+
+    def __init__(self, max_keys=100000):
+        self.max_keys = max_keys
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def consume(self, key, capacity, period, now=None):
+        """토큰 하나를 소비하고, 소비에 성공했는지 여부를 반환하는 메서드."""
+        now = time.monotonic() if now is None else now
+        refill_rate = capacity / period
+
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None or bucket[2] <= now:
+                tokens = capacity
+            else:
+                tokens = min(
+                    capacity, bucket[0] + (now - bucket[1]) * refill_rate
+                )
+
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+
+            if bucket is None and len(self._buckets) >= self.max_keys:
+                self._sweep(now)
+
+            self._buckets[key] = (
+                tokens,
+                now,
+                now + (capacity - tokens) / refill_rate,
+            )
+
+            return allowed
+
+    def _sweep(self, now):
+        expired = [
+            key for key, bucket in self._buckets.items() if bucket[2] <= now
+        ]
+        for key in expired:
+            del self._buckets[key]
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+token_buckets = TokenBucketStore()
+
+
+def get_store():
+    return current_app.config.get("RATE_LIMIT_STORE") or token_buckets
+
+
+def client_ip(**kwargs):
+    return request.remote_addr
+
+
+def request_email(**kwargs):
+    email = (request.get_json(silent=True) or {}).get("email")
+    if isinstance(email, str):
+        # 대소문자만 바꿔 한도를 피하지 못하게 한다.
+        return email.strip().lower()
+
+    return email
+
+
+def rate_limit(config_key, key_func):
+    """설정된 한도를 넘는 요청을 view 실행 전에 429 로 거절하는 데코레이터.
+
+    Note:
+        한도는 `(허용 횟수, 기간(초))` 형태로 app config 의 `config_key` 에서 읽으며,
+        설정되지 않았거나 `key_func` 가 None 을 반환하면 검사하지 않는다.
+        view 보다 먼저 실행되므로 거절된 요청은 DB 조회나 비밀번호 해시 검증을
+        하지 않는다.
+
+    Examples:
+        >>> @rate_limit("LOGIN_RATE_LIMIT_PER_IP", client_ip)
+        ... def post(self):
+        ...     ...
+    """
+
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapped_view(*args, **kwargs):
+            limit = current_app.config.get(config_key)
+            if limit is not None:
+                key = key_func(**kwargs)
+                if key is not None and not get_store().consume(
+                    (config_key, current_partition(), key), *limit
+                ):
+                    current_app.logger.warning(
+                        f"Rate limit {config_key} exceeded for {key}"
+                    )
+
+                    return jsonify({"error": "Too many requests"}), 429
+
+            return view(*args, **kwargs)
+
+        return wrapped_view
+
+    return decorator
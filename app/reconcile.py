@@ -0,0 +1,185 @@
+import csv
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import create_engine, func, select, union_all
+
+from app import db
+from app.models import Account, AccountHistory, ArchivedHistory
+from app.money import BASE_CURRENCY
+from app.sharding import current_partition
+
+REPORT_FIELDS = ("account_id", "balance", "history_total", "difference")
+
+
+def _mismatch_query(low, high, account_ids=None):
+    # 보관 파일로 옮긴 내역은 계좌별 누적 합계(ArchivedHistory)로 더한다.
+    history = union_all(
+        select(AccountHistory.account_id, AccountHistory.amount).where(
+            AccountHistory.account_id.between(low, high),
+            AccountHistory.currency == BASE_CURRENCY,
+        ),
+        select(ArchivedHistory.account_id, ArchivedHistory.amount).where(
+            ArchivedHistory.account_id.between(low, high),
+            ArchivedHistory.currency == BASE_CURRENCY,
+        ),
+    ).subquery()
+    history_total = func.coalesce(func.sum(history.c.amount), 0)
+    query = (
+        select(Account.id, Account.balance, history_total)
+        .outerjoin(history, history.c.account_id == Account.id)
+        .where(Account.id.between(low, high))
+        .group_by(Account.id, Account.balance)
+        .having(func.coalesce(Account.balance, 0) != history_total)
+    )
+    if account_ids is not None:
+        query = query.where(Account.id.in_(account_ids))
+
+    return query
+
+
+def reconcile_range(db_uri, low, high, watermark=None):
+    """id 범위 [low, high] 의 계좌 잔액과 내역 합계를 비교하는 메서드.
+
+    Note:
+        별도 프로세스에서 실행되므로 app 대신 DB URI 를 받아 자체 엔진을 만든다.
+        범위 하나당 GROUP BY 쿼리 한 번으로 불일치 계좌만 가져온다.
+        Account.balance 는 기준 통화 잔액이므로 기준 통화 내역만 합산한다.
+        watermark 가 주어지면 그 이후 내역이 있는 계좌만 확인한다.
+
+    Returns:
+        list[tuple]: (account_id, balance, history_total, difference) 목록.
+    """
+    engine = create_engine(db_uri)
+    try:
+        with engine.connect() as conn:
+            account_ids = None
+            if watermark is not None:
+                account_ids = (
+                    select(AccountHistory.account_id)
+                    .where(AccountHistory.id > watermark)
+                    .where(AccountHistory.account_id.between(low, high))
+                    .distinct()
+                )
+
+            rows = conn.execute(_mismatch_query(low, high, account_ids))
+
+            return [
+                (account_id, balance, total, (balance or 0) - total)
+                for account_id, balance, total in rows
+            ]
+    finally:
+        engine.dispose()
+
+
+def load_watermark(path):
+    if not os.path.exists(path):
+        return None
+
+    with open(path) as f:
+        return json.load(f)["history_id"]
+
+
+def save_watermark(path, history_id):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"history_id": history_id}, f)
+    os.replace(tmp_path, path)
+
+
+def reconcile(
+    report_path, watermark_path, chunk_size=10000, workers=4, full=False
+):
+    """모든 계좌의 잔액이 잔액 변경 내역의 합계와 일치하는지 확인하는 메서드.
+
+    Note:
+        계좌를 id 범위로 나눠 프로세스 풀에서 병렬로 확인하고, 불일치 계좌는
+        범위별 결과가 도착하는 대로 CSV 보고서에 기록한다.
+        `full=False` 이면 저장된 watermark(마지막으로 확인한 내역 id) 이후
+        내역이 생긴 계좌만 확인하고, 끝나면 watermark 를 갱신한다.
+
+    Returns:
+        dict: 확인한 범위 수, 불일치 계좌 수, 새 watermark.
+    """
+    watermark = None if full else load_watermark(watermark_path)
+    db_uri = db.session.get_bind().url.render_as_string(hide_password=False)
+
+    min_id, max_id = db.session.execute(
+        select(func.min(Account.id), func.max(Account.id))
+    ).one()
+    new_watermark = db.session.execute(
+        select(func.max(AccountHistory.id))
+    ).scalar()
+    db.session.commit()
+
+    ranges = []
+    if min_id is not None and (
+        watermark is None or new_watermark != watermark
+    ):
+        ranges = [
+            (low, min(low + chunk_size - 1, max_id))
+            for low in range(min_id, max_id + 1, chunk_size)
+        ]
+
+    mismatches = 0
+    with open(report_path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(REPORT_FIELDS)
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(reconcile_range, db_uri, low, high, watermark)
+                for low, high in ranges
+            ]
+            for future in as_completed(futures):
+                rows = future.result()
+                writer.writerows(rows)
+                f.flush()
+                mismatches += len(rows)
+
+    if new_watermark is not None:
+        save_watermark(watermark_path, new_watermark)
+
+    return {
+        "ranges": len(ranges),
+        "mismatches": mismatches,
+        "watermark": new_watermark,
+    }
+
+
+def get_reconcile_dir():
+    root = current_app.config.get("RECONCILE_DIR") or os.path.join(
+        current_app.instance_path, "reconcile"
+    )
+    # watermark 는 은행(tenant)/shard 의 내역 id 이므로 DB 마다 따로 둔다.
+    tenant, shard = current_partition()
+    reconcile_dir = os.path.join(root, tenant or "default", f"shard-{shard}")
+    os.makedirs(reconcile_dir, exist_ok=True)
+
+    return reconcile_dir
+
+
+@click.command("reconcile")
+@click.option("--chunk-size", default=10000, show_default=True)
+@click.option("--workers", default=os.cpu_count(), show_default=True)
+@click.option("--full", is_flag=True, help="Ignore the saved watermark.")
+@click.option("--report", default=None, help="Report CSV path.")
+@with_appcontext
+def reconcile_command(chunk_size, workers, full, report):
+    """Verify account balances against their history."""
+    reconcile_dir = get_reconcile_dir()
+    result = reconcile(
+        report or os.path.join(reconcile_dir, "mismatches.csv"),
+        os.path.join(reconcile_dir, "watermark.json"),
+        chunk_size=chunk_size,
+        workers=workers,
+        full=full,
+    )
+    click.echo(
+        f"Checked {result['ranges']} ranges, "
+        f"found {result['mismatches']} mismatched accounts."
+    )
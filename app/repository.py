@@ -0,0 +1,95 @@
+"""views 에서 반복 실행되는 조회를 모아 둔 모듈.
+
+Note:
+    조회 문장은 import 시점에 bind parameter 를 가진 select() 로 한 번만 만들어 둔다.
+    요청마다 Query 를 다시 조립하지 않고, 같은 문장 객체를 재사용하므로 캐시 키도
+    한 번만 계산되어 SQLAlchemy 의 compiled cache 에서 바로 실행된다.
+    (lambda_stmt 는 호출마다 클로저를 분석하는 비용 때문에 오히려 더 느렸다.)
+"""
+
+from sqlalchemy import bindparam, select
+
+from app import db
+from app.card_number import hash_card_number
+from app.existence import CARDS, might_exist
+from app.models import User, Account, Card
+
+USER_BY_EMAIL = select(User).where(User.email == bindparam("email"))
+
+ACCOUNT_BY_NUMBER = select(Account).where(
+    Account.account_number == bindparam("account_number")
+)
+
+ACCOUNTS_BY_USER = select(Account).where(
+    Account.user_id == bindparam("user_id")
+)
+
+CARDS_BY_USER = select(Card).where(Card.user_id == bindparam("user_id"))
+
+CARDS_BY_USER_AND_ACCOUNT = select(Card).where(
+    Card.user_id == bindparam("user_id"),
+    Card.account_id == bindparam("account_id"),
+)
+
+ACCOUNT_CARD = select(Card).where(
+    Card.id == bindparam("card_id"),
+    Card.account_id == bindparam("account_id"),
+)
+
+CARD_BY_NUMBER_HASH = select(Card).where(
+    Card.card_number_hash == bindparam("card_number_hash")
+)
+
+
+def get_user_by_email(email):
+    return db.session.execute(
+        USER_BY_EMAIL, {"email": email}
+    ).scalar_one_or_none()
+
+
+def get_account_by_number(account_number):
+    # 이체 받는 계좌를 찾으므로 존재 확인 filter 를 믿지 않고 DB 를 조회한다.
+    return db.session.execute(
+        ACCOUNT_BY_NUMBER, {"account_number": account_number}
+    ).scalar_one_or_none()
+
+
+def get_accounts_by_user(user_id):
+    return (
+        db.session.execute(ACCOUNTS_BY_USER, {"user_id": user_id})
+        .scalars()
+        .all()
+    )
+
+
+def get_cards_by_user(user_id):
+    return (
+        db.session.execute(CARDS_BY_USER, {"user_id": user_id}).scalars().all()
+    )
+
+
+def get_cards_by_user_and_account(user_id, account_id):
+    return (
+        db.session.execute(
+            CARDS_BY_USER_AND_ACCOUNT,
+            {"user_id": user_id, "account_id": account_id},
+        )
+        .scalars()
+        .all()
+    )
+
+
+def get_account_card(account_id, card_id):
+    return db.session.execute(
+        ACCOUNT_CARD, {"account_id": account_id, "card_id": card_id}
+    ).scalar_one_or_none()
+
+
+def get_card_by_number(card_number):
+    card_number_hash = hash_card_number(card_number)
+    if not might_exist(CARDS, card_number_hash):
+        return None
+
+    return db.session.execute(
+        CARD_BY_NUMBER_HASH, {"card_number_hash": card_number_hash}
+    ).scalar_one_or_none()
@@ -0,0 +1,272 @@
+"""계좌/카드별 일별 입출금 집계(DailyRollup)를 갱신하고 조회하는 모듈.
+
+Note:
+    - 잔액이 바뀔 때마다 `record_movement` 가 같은 트랜잭션에서 집계 행을 갱신하므로
+      요약 조회는 원장(AccountHistory)을 읽지 않고 날짜 범위의 집계 행만 읽는다.
+    - 여러 계좌의 요약은 계좌마다 쿼리하지 않고 IN 조회 한 번으로 읽어 합산한다.
+    - 집계를 잃었거나 도입 전 내역을 채울 때는 `flask rollups rebuild` 로 다시 만든다.
+"""
+
+from datetime import date, datetime, timedelta, timezone
+
+import click
+from flask.cli import AppGroup, with_appcontext
+from sqlalchemy import case, delete, func, insert, literal, select
+
+from app import db
+
+rollups_cli = AppGroup("rollups", help="Daily spending rollups.")
+
+# card_id 가 이 값인 행은 계좌 전체 집계이다.
+ACCOUNT_TOTAL = 0
+
+PERIODS = ("day", "month")
+
+
+def _today():
+    return datetime.now(timezone.utc).date()
+
+
+def record_movement(account_id, card_id, amount, day=None):
+    """잔액 변경 한 건(amount: Money)을 계좌 집계와 카드 집계에 반영하는 메서드.
+
+    Note:
+        집계 행마다 INSERT ... ON CONFLICT DO UPDATE 한 문장으로 더하므로,
+        같은 계좌의 첫 입출금이 동시에 일어나도 기본 키 위반이나 덮어쓰기가
+        없다. commit 은 호출한 쪽에서 잔액 변경과 함께 수행한다.
+    """
+    from app.models import DailyRollup, increment_or_insert
+
+    day = day or _today()
+    card_ids = [ACCOUNT_TOTAL]
+    if card_id is not None:
+        card_ids.append(card_id)
+
+    amount_in = max(amount.amount, 0)
+    amount_out = max(-amount.amount, 0)
+    for rollup_card_id in card_ids:
+        increment_or_insert(
+            DailyRollup,
+            {
+                "account_id": account_id,
+                "card_id": rollup_card_id,
+                "day": day,
+                "currency": amount.currency,
+            },
+            count=1,
+            amount_in=amount_in,
+            amount_out=amount_out,
+        )
+
+
+def period_key(day, period):
+    if period == "month":
+        return day.strftime("%Y-%m")
+
+    return day.isoformat()
+
+
+def _add(totals, key, count, amount_in, amount_out):
+    total = totals.get(key)
+    if total is None:
+        total = totals[key] = [0, 0, 0]
+    total[0] += count
+    total[1] += amount_in
+    total[2] += amount_out
+
+
+def _to_list(totals, *names):
+    return [
+        dict(
+            zip(names, key),
+            count=count,
+            amount_in=amount_in,
+            amount_out=amount_out,
+            net=amount_in - amount_out,
+        )
+        for key, (count, amount_in, amount_out) in sorted(totals.items())
+    ]
+
+
+def summarize_accounts(account_ids, start, end, period="day", currency=None):
+    """계좌들의 [start, end] 기간 입출금을 통화별로 요약하는 메서드.
+
+    Note:
+        계좌 전체 집계 행(card_id 0)만 IN 조회 한 번으로 읽고, 한 번 훑으면서
+        계좌별 합계, 기간(일/월)별 합계, 전체 합계를 함께 계산한다.
+        읽는 행 수는 계좌 수 x 일수 x 통화 수를 넘지 않는다.
+
+    Returns:
+        dict: "accounts", "periods", "totals" 목록.
+    """
+    from app.models import DailyRollup
+
+    query = select(
+        DailyRollup.account_id,
+        DailyRollup.day,
+        DailyRollup.currency,
+        DailyRollup.count,
+        DailyRollup.amount_in,
+        DailyRollup.amount_out,
+    ).where(
+        DailyRollup.account_id.in_(account_ids),
+        DailyRollup.card_id == ACCOUNT_TOTAL,
+        DailyRollup.day.between(start, end),
+    )
+    if currency is not None:
+        query = query.where(DailyRollup.currency == currency)
+
+    by_account = {}
+    by_period = {}
+    totals = {}
+    for account_id, day, row_currency, *values in db.session.execute(query):
+        _add(by_account, (account_id, row_currency), *values)
+        _add(by_period, (period_key(day, period), row_currency), *values)
+        _add(totals, (row_currency,), *values)
+
+    return {
+        "accounts": _to_list(by_account, "account_id", "currency"),
+        "periods": _to_list(by_period, "period", "currency"),
+        "totals": _to_list(totals, "currency"),
+    }
+
+
+def summarize_cards(account_id, start, end, currency=None):
+    """계좌에 속한 카드별 [start, end] 기간 입출금 합계를 반환하는 메서드."""
+    from app.models import DailyRollup
+
+    query = (
+        select(
+            DailyRollup.card_id,
+            DailyRollup.currency,
+            func.sum(DailyRollup.count),
+            func.sum(DailyRollup.amount_in),
+            func.sum(DailyRollup.amount_out),
+        )
+        .where(
+            DailyRollup.account_id == account_id,
+            DailyRollup.card_id != ACCOUNT_TOTAL,
+            DailyRollup.day.between(start, end),
+        )
+        .group_by(DailyRollup.card_id, DailyRollup.currency)
+    )
+    if currency is not None:
+        query = query.where(DailyRollup.currency == currency)
+
+    cards = {}
+    for card_id, row_currency, *values in db.session.execute(query):
+        _add(cards, (card_id, row_currency), *values)
+
+    return _to_list(cards, "card_id", "currency")
+
+
+def parse_summary_range(args, max_days):
+    """요약 조회의 from/to/period 쿼리 인자를 확인하는 메서드.
+
+    Note:
+        from/to 는 YYYY-MM-DD 형식의 UTC 날짜이며, 둘 다 없으면 오늘까지 30일이다.
+
+    Returns:
+        tuple: (start, end, period).
+
+    Raises:
+        ValueError: 형식이 잘못되었거나 기간이 max_days 일을 넘는 경우.
+    """
+    end = args.get("to")
+    end = date.fromisoformat(end) if end else _today()
+    start = args.get("from")
+    start = date.fromisoformat(start) if start else end - timedelta(days=29)
+
+    if start > end:
+        raise ValueError("'from' must not be after 'to'.")
+
+    if (end - start).days + 1 > max_days:
+        raise ValueError(f"Date range must not exceed {max_days} days.")
+
+    period = args.get("period", "day")
+    if period not in PERIODS:
+        raise ValueError(f"Period must be one of {', '.join(PERIODS)}.")
+
+    return start, end, period
+
+
+def _history_rollup_query(by_card, since=None):
+    from app.models import AccountHistory
+
+    day = func.date(AccountHistory.created_at)
+    card_id = AccountHistory.card_id if by_card else literal(ACCOUNT_TOTAL)
+    query = select(
+        AccountHistory.account_id,
+        card_id,
+        day,
+        AccountHistory.currency,
+        func.count(),
+        func.sum(
+            case((AccountHistory.amount > 0, AccountHistory.amount), else_=0)
+        ),
+        func.sum(
+            case((AccountHistory.amount < 0, -AccountHistory.amount), else_=0)
+        ),
+    ).group_by(AccountHistory.account_id, day, AccountHistory.currency)
+    if by_card:
+        query = query.where(AccountHistory.card_id.is_not(None)).group_by(
+            AccountHistory.card_id
+        )
+    if since is not None:
+        query = query.where(
+            AccountHistory.created_at
+            >= datetime.combine(since, datetime.min.time())
+        )
+
+    return query
+
+
+def rebuild_rollups(since=None):
+    """AccountHistory 로부터 since 이후(없으면 전체)의 집계 행을 다시 만드는 메서드.
+
+    Note:
+        해당 기간의 집계 행을 지우고, 계좌 전체 집계와 카드별 집계를 각각
+        INSERT ... SELECT 한 번으로 DB 안에서 채운다.
+
+    Returns:
+        int: 새로 만든 집계 행 수.
+    """
+    from app.models import DailyRollup
+
+    clear = delete(DailyRollup)
+    if since is not None:
+        clear = clear.where(DailyRollup.day >= since)
+    db.session.execute(clear)
+
+    columns = [
+        "account_id",
+        "card_id",
+        "day",
+        "currency",
+        "count",
+        "amount_in",
+        "amount_out",
+    ]
+    inserted = 0
+    for by_card in (False, True):
+        inserted += db.session.execute(
+            insert(DailyRollup).from_select(
+                columns, _history_rollup_query(by_card, since)
+            )
+        ).rowcount
+    db.session.commit()
+
+    return inserted
+
+
+@rollups_cli.command("rebuild")
+@click.option(
+    "--since",
+    type=click.DateTime(formats=["%Y-%m-%d"]),
+    help="Rebuild only days on or after this UTC date.",
+)
+@with_appcontext
+def rebuild_command(since):
+    """Rebuild daily rollups from account history."""
+    inserted = rebuild_rollups(since and since.date())
+    click.echo(f"Rebuilt {inserted} rollup rows.")
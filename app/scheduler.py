@@ -0,0 +1,278 @@
+import heapq
+import itertools
+import time
+from datetime import datetime, timedelta, timezone
+
+import click
+from flask import current_app
+from flask.cli import AppGroup, with_appcontext
+from sqlalchemy import select, update
+
+from app import db
+from app.models import (
+    StandingOrder,
+    TransferInterval,
+    as_naive_utc,
+    as_utc,
+)
+
+scheduler_cli = AppGroup("scheduler", help="Standing order scheduler.")
+
+
+class TimingWheel:
+    """tick 단위 칸으로 나눈 원형 버퍼에 실행 예정 항목을 넣어 두는 타이밍 휠.
+
+    Note:
+        `size` 칸(= tick * size 초) 안에 실행될 항목은 해당 칸에, 그보다 먼 항목은
+        overflow 힙에 넣는다. `advance` 는 지나간 칸만 비우고 휠 범위에 들어온
+        overflow 항목을 칸으로 옮기므로, tick 마다 드는 일은 전체 예약 수가 아니라
+        실행할 항목 수에 비례한다. 이미 지난 시각의 항목은 다음 advance 에서 바로
+        꺼내진다 (다운타임 후 밀린 항목).
+
+    Examples:
+        >>> wheel = TimingWheel(tick=1, size=60, now=0)
+        >>> wheel.schedule(5, "a")
+        >>> wheel.advance(10)
+        ['a']
+    """
+
+    __slots__ = (
+        "tick",
+        "size",
+        "_slots",
+        "_overflow",
+        "_ready",
+        "_current",
+        "_seq",
+    )
+
+    def __init__(self, tick=1.0, size=3600, now=None):
+        self.tick = tick
+        self.size = size
+        self._slots = [[] for _ in range(size)]
+        self._overflow = []
+        self._ready = []
+        self._current = int((time.time() if now is None else now) // tick)
+        self._seq = itertools.count()
+
+    def schedule(self, due, item):
+        tick_no = int(due // self.tick)
+        if tick_no < self._current:
+            self._ready.append(item)
+        elif tick_no < self._current + self.size:
+            self._slots[tick_no % self.size].append(item)
+        else:
+            heapq.heappush(self._overflow, (tick_no, next(self._seq), item))
+
+    def advance(self, now):
+        """now 까지 지나간 칸의 항목을 모두 꺼내 반환하는 메서드."""
+        target = int(now // self.tick)
+        due, self._ready = self._ready, []
+
+        if target - self._current >= self.size:
+            # 휠 한 바퀴 이상 멈춰 있었으면 모든 칸이 이미 지난 칸이다.
+            for slot in self._slots:
+                due.extend(slot)
+                slot.clear()
+            self._current = target + 1
+        else:
+            while self._current <= target:
+                slot = self._slots[self._current % self.size]
+                if slot:
+                    due.extend(slot)
+                    slot.clear()
+                self._current += 1
+
+        while (
+            self._overflow and self._overflow[0][0] < self._current + self.size
+        ):
+            tick_no, _, item = heapq.heappop(self._overflow)
+            if tick_no < self._current:
+                due.append(item)
+            else:
+                self._slots[tick_no % self.size].append(item)
+
+        return due
+
+
+def execute_order(order_id, now, max_catch_up=31):
+    """이체 지시의 밀린 회차를 실행하는 메서드.
+
+    Note:
+        회차마다 `next_run_at` 조건을 건 UPDATE 로 다음 실행 시각을 먼저 옮긴 뒤
+        같은 트랜잭션에서 이체하므로, scheduler 가 여러 개 떠 있어도 한 회차는
+        한 번만 실행된다. 다운타임으로 여러 회차가 밀렸으면 최대 max_catch_up 회까지
+        이어서 실행한다. 잔액 부족 등으로 실패한 회차는 last_error 에 남기고 넘어간다.
+
+    Returns:
+        int: 실행한 회차 수.
+    """
+    executed = 0
+    while executed < max_catch_up:
+        order = db.session.get(StandingOrder, order_id)
+        if (
+            order is None
+            or not order.active
+            or as_utc(order.next_run_at) > now
+        ):
+            break
+
+        run_at = order.next_run_at
+        run_count = order.run_count + 1
+        claimed = db.session.execute(
+            update(StandingOrder)
+            .where(
+                StandingOrder.id == order_id,
+                StandingOrder.next_run_at == run_at,
+                StandingOrder.active.is_(True),
+            )
+            .values(
+                next_run_at=as_naive_utc(order.occurrence(run_count)),
+                run_count=run_count,
+                active=order.interval != TransferInterval.ONCE,
+                last_error=None,
+            )
+        ).rowcount
+        if not claimed:
+            db.session.rollback()
+            break
+
+        is_successful, message = order.from_account.transfer(
+            order.to_account, order.money
+        )
+        if not is_successful:
+            order.last_error = message
+            current_app.logger.warning(
+                f"Standing order id {order_id} failed: {message}"
+            )
+        db.session.commit()
+        executed += 1
+
+    return executed
+
+
+class StandingOrderScheduler:
+    """다가올 구간의 이체 지시만 타이밍 휠에 올려 두고 실행하는 scheduler.
+
+    Note:
+        `window` 초 안에 실행될 지시만 (active, next_run_at) 인덱스로 범위 조회해
+        휠에 넣고, `reload_interval` 초마다 다시 조회해 새로 생긴 지시를 반영한다.
+        tick 마다는 휠에서 꺼낸 지시만 `batch_size` 개씩 한 번에 불러 실행한다.
+    """
+
+    def __init__(
+        self,
+        tick=1.0,
+        window=3600,
+        reload_interval=60,
+        batch_size=100,
+        now=None,
+    ):
+        self.window = window
+        self.reload_interval = reload_interval
+        self.batch_size = batch_size
+        self.wheel = TimingWheel(
+            tick, int(window // tick) + 1, now and now.timestamp()
+        )
+        self.scheduled = {}
+        self.loaded_at = None
+
+    def load(self, now):
+        until = now + timedelta(seconds=self.window)
+        rows = db.session.execute(
+            select(StandingOrder.id, StandingOrder.next_run_at).where(
+                StandingOrder.active.is_(True),
+                StandingOrder.next_run_at < as_naive_utc(until),
+            )
+        )
+        loaded = 0
+        for order_id, next_run_at in rows:
+            due = as_utc(next_run_at).timestamp()
+            if self.scheduled.get(order_id) != due:
+                self.scheduled[order_id] = due
+                self.wheel.schedule(due, (order_id, due))
+                loaded += 1
+        db.session.commit()
+        self.loaded_at = now
+
+        return loaded
+
+    def tick(self, now):
+        """now 까지 실행할 지시를 실행하고 실행한 회차 수를 반환하는 메서드."""
+        if (
+            self.loaded_at is None
+            or (now - self.loaded_at).total_seconds() >= self.reload_interval
+        ):
+            self.load(now)
+
+        # 다시 조회되어 실행 시각이 바뀐 지시의 이전 항목은 건너뛴다.
+        order_ids = []
+        for order_id, due in self.wheel.advance(now.timestamp()):
+            if self.scheduled.get(order_id) == due:
+                del self.scheduled[order_id]
+                order_ids.append(order_id)
+
+        executed = 0
+        for i in range(0, len(order_ids), self.batch_size):
+            batch = order_ids[i : i + self.batch_size]
+            # 한 번의 IN 조회로 identity map 에 올려 두고 하나씩 실행한다.
+            db.session.execute(
+                select(StandingOrder).where(StandingOrder.id.in_(batch))
+            ).scalars().all()
+            for order_id in batch:
+                # 한 지시의 오류로 나머지 지시와 scheduler 루프가 멈추지 않게 한다.
+                # 실패한 지시는 휠에서 빠지고 다음 load 에서 다시 올라온다.
+                try:
+                    executed += execute_order(order_id, now)
+                    self._reschedule(order_id, now)
+                except Exception:
+                    db.session.rollback()
+                    current_app.logger.exception(
+                        f"Standing order id {order_id} raised an error"
+                    )
+
+        return executed
+
+    def _reschedule(self, order_id, now):
+        order = db.session.get(StandingOrder, order_id)
+        if order is None or not order.active:
+            return
+
+        next_run_at = as_utc(order.next_run_at)
+        if next_run_at < now + timedelta(seconds=self.window):
+            due = next_run_at.timestamp()
+            self.scheduled[order_id] = due
+            self.wheel.schedule(due, (order_id, due))
+
+
+def run_scheduler(app, tick=1.0, window=3600, once=False):
+    """이체 지시 scheduler 루프.
+
+    Note:
+        `once=True` 이면 지금까지 밀린 지시만 실행하고 반환한다.
+
+    Returns:
+        int: 실행한 회차 수.
+    """
+    with app.app_context():
+        scheduler = StandingOrderScheduler(tick=tick, window=window)
+        executed = 0
+        while True:
+            executed += scheduler.tick(datetime.now(timezone.utc))
+            db.session.remove()
+            if once:
+                return executed
+            time.sleep(tick)
+
+
+@scheduler_cli.command("run")
+@click.option("--tick", default=1.0, show_default=True)
+@click.option("--window", default=3600, show_default=True)
+@click.option("--once", is_flag=True, help="Run due orders and exit.")
+@with_appcontext
+def run_command(tick, window, once):
+    """Execute standing orders as they fall due."""
+    executed = run_scheduler(
+        current_app._get_current_object(), tick, window, once
+    )
+    click.echo(f"Executed {executed} standing order runs.")
@@ -0,0 +1,141 @@
+"""사용자(user_id) 기준으로 계좌/카드를 여러 DB 에 나눠 두는 수평 분할(shard) 모듈.
+
+Note:
+    - 기본 DB 가 shard 0 이고, `SHARDS` 설정의 DB 들이 차례로 shard 1, 2, ... 이다.
+    - 새 사용자는 이메일 해시로 shard 를 고른다. 사용자가 어느 shard 에 있는지는
+      shard 0 의 전역 목록(`app.directory`)에 기록하고, 로그인할 때 찾아 세션과
+      토큰에 넣는다. 그래서 shard 를 켜기 전부터 shard 0 에 있던 사용자도 그대로
+      쓸 수 있다. 운영 중에는 shard 수를 바꿀 수 없다.
+    - 계좌, 카드, 내역 등 사용자에게 속한 행은 모두 사용자의 shard 에 있다.
+      로그인 사용자를 불러올 때 `g.shard` 가 정해지고 `RoutingSession` 이 요청의
+      모든 쿼리를 그 shard 로 보낸다. 계좌/카드 id 는 shard 마다 따로 매겨진다.
+      카드 번호의 중복은 전역 목록으로 막는다.
+    - 다른 사용자의 계좌는 계좌 번호로 전역 목록에서 shard 를 찾는다
+      (`app.transfers`).
+    - 요청이 없는 CLI 워커(scheduler, jobs, events)는 `SHARD_INDEX` 설정의
+      shard 를 처리하므로 shard 마다 하나씩 띄운다.
+    - 다른 은행(tenant) 의 요청은 shard 로 나누지 않는다.
+"""
+
+import threading
+import zlib
+
+from flask import current_app, g, has_app_context
+from flask_sqlalchemy.session import Session
+from sqlalchemy import create_engine
+
+from app.tenancy import current_tenant, current_tenant_key
+
+
+class ShardRegistry:
+    """shard 번호 -> 엔진 표. shard 0 은 기본 DB 엔진(db.engine)을 쓴다.
+
+    Note:
+        shard 엔진은 처음 쓰일 때 만들어 app 이 끝날 때까지 재사용한다.
+        `engine_hooks` 의 함수는 엔진을 만들 때마다 그 엔진으로 호출된다.
+    """
+
+    __slots__ = ("uris", "engine_options", "engine_hooks", "_engines", "_lock")
+
+    def __init__(self, uris=None, engine_options=None):
+        self.uris = list(uris or [])
+        self.engine_options = engine_options or {}
+        self.engine_hooks = []
+        self._engines = {}
+        self._lock = threading.Lock()
+
+    @property
+    def count(self):
+        return len(self.uris) + 1
+
+    def engine(self, index):
+        engine = self._engines.get(index)
+        if engine is None:
+            with self._lock:
+                engine = self._engines.get(index)
+                if engine is None:
+                    engine = create_engine(
+                        self.uris[index - 1], **self.engine_options
+                    )
+                    for hook in self.engine_hooks:
+                        hook(engine)
+                    self._engines[index] = engine
+
+        return engine
+
+    def dispose(self):
+        with self._lock:
+            for engine in self._engines.values():
+                engine.dispose()
+            self._engines.clear()
+
+
+def init_sharding(app):
+    app.extensions["shards"] = ShardRegistry(
+        app.config.get("SHARDS"), app.config.get("SQLALCHEMY_ENGINE_OPTIONS")
+    )
+
+
+def shard_count():
+    if current_tenant() is not None:
+        return 1
+
+    registry = current_app.extensions.get("shards")
+
+    return registry.count if registry is not None else 1
+
+
+def shard_for_email(email):
+    return zlib.crc32(email.encode("utf-8")) % shard_count()
+
+
+def current_shard():
+    if not has_app_context() or current_tenant() is not None:
+        return 0
+
+    shard = g.get("shard")
+    if shard is None:
+        shard = current_app.config.get("SHARD_INDEX", 0)
+
+    return shard
+
+
+def use_shard(index):
+    """이후 `db.session` 의 쿼리를 index shard 로 보내는 메서드.
+
+    Note:
+        shard 를 바꾸기 전에 불러온 객체는 다른 shard 의 같은 id 객체와 섞이지 않도록
+        호출한 쪽에서 commit 후 session 에서 떼어 낸다.
+    """
+    g.shard = index
+
+
+def current_partition():
+    """프로세스 메모리 상태의 키에 함께 넣는 (tenant, shard) 값.
+
+    Note:
+        계좌/카드 id 는 은행과 shard 마다 따로 매겨지므로, id 를 키로 두는 상태
+        (요청 빈도 제한, 인출 빈도, 잔액 스트림 채널)는 이 값으로 구분한다.
+    """
+    return current_tenant_key(), current_shard()
+
+
+class RoutingSession(Session):
+    """현재 은행(tenant)과 shard 의 엔진으로 쿼리를 보내는 session.
+
+    Note:
+        tenant 가 정해졌으면 그 은행의 DB 로, 아니면 현재 shard 로 보낸다.
+        shard 0 이면 Flask-SQLAlchemy 기본 동작(모델의 bind key)을 따른다.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None:
+            tenant = current_tenant()
+            if tenant is not None:
+                return current_app.extensions["tenants"].engine(tenant.key)
+
+            shard = current_shard()
+            if shard:
+                return current_app.extensions["shards"].engine(shard)
+
+        return super().get_bind(mapper, clause, bind, **kwargs)
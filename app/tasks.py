@@ -0,0 +1,124 @@
+import json
+import os
+
+from flask import current_app
+from sqlalchemy import delete, exists, select
+
+from app import db
+from app.archive import archive_closed_account
+from app.jobs import task
+from app.models import User, Account, Card, WithdrawalUsage
+from app.reconcile import get_reconcile_dir, reconcile
+
+
+def get_export_dir():
+    export_dir = current_app.config.get("EXPORT_DIR") or os.path.join(
+        current_app.instance_path, "exports"
+    )
+    os.makedirs(export_dir, exist_ok=True)
+
+    return export_dir
+
+
+@task("export_user_data")
+def export_user_data(user_id):
+    """사용자의 계좌와 카드 정보를 JSON 파일로 내보내는 작업.
+
+    Returns:
+        dict: 생성된 파일 이름(EXPORT_DIR 기준)과 내보낸 계좌/카드 수.
+    """
+    user = db.session.get(User, user_id)
+    if user is None:
+        raise ValueError(f"User id {user_id} not found")
+
+    accounts = db.session.execute(
+        select(Account).filter_by(user_id=user_id).order_by(Account.id)
+    ).scalars()
+    cards = db.session.execute(
+        select(Card).filter_by(user_id=user_id).order_by(Card.id)
+    ).scalars()
+
+    data = {
+        "user": {"id": user.id, "e-mail": user.email, "name": user.name},
+        "accounts": [
+            {
+                "id": account.id,
+                "account_number": account.account_number,
+                "name": account.name,
+                "balance": account.balance,
+            }
+            for account in accounts
+        ],
+        "cards": [
+            {
+                "id": card.id,
+                "account_id": card.account_id,
+                "card_number": card.masked_card_number,
+                "status": card.state.value.lower(),
+            }
+            for card in cards
+        ],
+    }
+
+    file_name = f"user_{user_id}.json"
+    with open(os.path.join(get_export_dir(), file_name), "w") as f:
+        json.dump(data, f, ensure_ascii=False)
+
+    return {
+        "file": file_name,
+        "accounts": len(data["accounts"]),
+        "cards": len(data["cards"]),
+    }
+
+
+@task("archive_closed_account")
+def archive_closed_account_task(closed_account_id):
+    """지운 계좌의 정보와 내역을 보관 파일로 옮기는 작업.
+
+    Returns:
+        dict: 보관한 내역 수.
+    """
+    return {"history": archive_closed_account(closed_account_id)}
+
+
+@task("purge_deleted_user_data")
+def purge_deleted_user_data():
+    """삭제된 카드/계좌에 남아 있는 인출 집계 행을 지우는 작업.
+
+    Note:
+        WithdrawalUsage 는 외래 키가 없어 cascade 로 지워지지 않으므로,
+        대상이 더 이상 존재하지 않는 행을 대상별 DELETE 한 번으로 정리한다.
+
+    Returns:
+        dict: 대상별 삭제된 행 수.
+    """
+    purged = {}
+    for subject, model in (("card", Card), ("account", Account)):
+        purged[subject] = db.session.execute(
+            delete(WithdrawalUsage)
+            .where(WithdrawalUsage.subject == subject)
+            .where(~exists().where(model.id == WithdrawalUsage.subject_id))
+            .execution_options(synchronize_session=False)
+        ).rowcount
+    db.session.commit()
+
+    return purged
+
+
+@task("reconcile_balances")
+def reconcile_balances(full=False, workers=2):
+    """계좌 잔액과 잔액 변경 내역 합계를 대사하는 작업.
+
+    Returns:
+        dict: 보고서 경로와 대사 결과.
+    """
+    reconcile_dir = get_reconcile_dir()
+    report_path = os.path.join(reconcile_dir, "mismatches.csv")
+    result = reconcile(
+        report_path,
+        os.path.join(reconcile_dir, "watermark.json"),
+        workers=workers,
+        full=full,
+    )
+
+    return dict(result, report=report_path)
@@ -0,0 +1,184 @@
+"""한 배포에서 여러 은행(tenant)의 장부를 각자의 DB 로 분리해 운영하기 위한 모듈.
+
+Note:
+    - `TENANTS` 설정의 은행마다 `TenantRegistry` 가 전용 엔진과 커넥션
+      풀(pool_size/max_overflow/pool_timeout)을 만들어 둔다. 한 은행이 풀을 다
+      써도 다른 은행의 요청은 자기 풀에서 커넥션을 얻는다.
+    - 요청마다 `X-Bank-Id` 헤더(은행 코드) 또는 Host 로 tenant 를 정해 `g.tenant`
+      에 넣고, `RoutingSession` 이 그 tenant 의 엔진으로 모든 쿼리를 보낸다.
+    - 어느 tenant 에도 해당하지 않는 요청은 기본 DB 와 `BANK_ID` 를 사용한다.
+    - 요청이 없는 CLI 워커(scheduler, jobs, events, reconcile, rollups)는
+      `TENANT` 설정의 은행을 처리하므로 은행(과 shard)마다 하나씩 띄운다.
+      설정하지 않으면 기본 DB 를 처리한다.
+"""
+
+import threading
+
+from flask import current_app, g, has_app_context, jsonify, request
+from sqlalchemy import create_engine
+
+TENANT_HEADER = "X-Bank-Id"
+
+# tenant 설정 중 엔진(커넥션 풀) 옵션으로 넘기는 키
+ENGINE_OPTION_KEYS = ("pool_size", "max_overflow", "pool_timeout")
+
+
+class Tenant:
+    """은행 하나의 tenant 정보."""
+
+    __slots__ = ("key", "bank_id", "database_uri", "engine_options", "hosts")
+
+    def __init__(self, key, bank_id, database_uri, hosts=(), **options):
+        self.key = key
+        self.bank_id = bank_id
+        self.database_uri = database_uri
+        self.engine_options = {
+            option: options[option]
+            for option in ENGINE_OPTION_KEYS
+            if options.get(option) is not None
+        }
+        self.hosts = tuple(hosts)
+
+
+class TenantRegistry:
+    """tenant 를 은행 코드와 Host 로 찾고, tenant 별 엔진을 보관하는 bind 표.
+
+    Note:
+        엔진은 tenant 에 처음 요청이 올 때 만들어 app 이 끝날 때까지 재사용한다.
+        `SQLALCHEMY_BINDS` 를 쓰지 않는 것은 Flask-SQLAlchemy 가 bind 마다 전역
+        metadata 를 만들어 `db.create_all` 이 모든 tenant DB 를 건드리기 때문이다.
+
+    Examples:
+        >>> registry = TenantRegistry(
+        ...     {"acme": {"bank_id": "777711", "database_uri": "sqlite://"}}
+        ... )
+        >>> registry.by_bank_id("777711").key
+        'acme'
+    """
+
+    __slots__ = (
+        "tenants",
+        "engine_options",
+        "engine_hooks",
+        "_by_bank_id",
+        "_by_host",
+        "_engines",
+        "_lock",
+    )
+
+    def __init__(self, tenants=None, engine_options=None):
+        self.tenants = {}
+        self.engine_options = engine_options or {}
+        # 엔진을 만들 때마다 그 엔진으로 호출할 함수들 (예: SQL 프로파일링)
+        self.engine_hooks = []
+        self._by_bank_id = {}
+        self._by_host = {}
+        self._engines = {}
+        self._lock = threading.Lock()
+        for key, options in (tenants or {}).items():
+            tenant = Tenant(key, **options)
+            self.tenants[key] = tenant
+            self._by_bank_id[tenant.bank_id] = tenant
+            for host in tenant.hosts:
+                self._by_host[host.lower()] = tenant
+
+    def by_bank_id(self, bank_id):
+        return self._by_bank_id.get(bank_id)
+
+    def by_host(self, host):
+        # Host 헤더의 포트는 무시한다.
+        return self._by_host.get(host.rsplit(":", 1)[0].lower())
+
+    def engine(self, key):
+        engine = self._engines.get(key)
+        if engine is None:
+            with self._lock:
+                engine = self._engines.get(key)
+                if engine is None:
+                    tenant = self.tenants[key]
+                    engine = create_engine(
+                        tenant.database_uri,
+                        **{**self.engine_options, **tenant.engine_options},
+                    )
+                    for hook in self.engine_hooks:
+                        hook(engine)
+                    self._engines[key] = engine
+
+        return engine
+
+    def dispose(self):
+        with self._lock:
+            for engine in self._engines.values():
+                engine.dispose()
+            self._engines.clear()
+
+
+def init_tenants(app):
+    """tenant 표를 만들고 CLI 워커가 처리할 `TENANT` 를 확인하는 메서드."""
+    registry = TenantRegistry(
+        app.config.get("TENANTS"), app.config.get("SQLALCHEMY_ENGINE_OPTIONS")
+    )
+    app.extensions["tenants"] = registry
+
+    tenant = app.config.get("TENANT")
+    if tenant and tenant not in registry.tenants:
+        raise RuntimeError(f"TENANT {tenant!r} is not one of TENANTS.")
+
+
+def init_tenancy(app):
+    """요청마다 tenant 를 정하는 hook 을 등록하는 메서드.
+
+    Note:
+        로그인 사용자를 불러오는 hook 보다 먼저 실행되어야 하므로 blueprint 를
+        등록하기 전에 불러야 한다.
+    """
+    registry = app.extensions["tenants"]
+
+    @app.before_request
+    def resolve_tenant():
+        g.tenant = None
+        bank_id = request.headers.get(TENANT_HEADER)
+        if bank_id:
+            g.tenant = registry.by_bank_id(bank_id)
+            if g.tenant is None and bank_id != app.config.get("BANK_ID"):
+                current_app.logger.error(f"Unknown bank id {bank_id}")
+
+                return jsonify({"error": "Unknown bank"}), 404
+        else:
+            g.tenant = registry.by_host(request.host)
+
+
+def current_tenant():
+    if not has_app_context():
+        return None
+
+    if "tenant" not in g:
+        # 요청 밖(CLI 워커)에서는 TENANT 설정의 은행을 처리한다.
+        use_tenant(current_app.config.get("TENANT"))
+
+    return g.tenant
+
+
+def use_tenant(key):
+    """이후 `db.session` 의 쿼리를 key 은행의 DB 로 보내는 메서드.
+
+    Note:
+        key 가 None 이면 기본 DB 로 보낸다.
+    """
+    g.tenant = current_app.extensions["tenants"].tenants[key] if key else None
+
+
+def current_tenant_key():
+    """현재 tenant 의 key. 기본 DB 를 쓰는 경우 None 이다."""
+    tenant = current_tenant()
+
+    return tenant.key if tenant is not None else None
+
+
+def current_bank_id():
+    tenant = current_tenant()
+    if tenant is not None:
+        return tenant.bank_id
+
+    return current_app.config.get("BANK_ID")
+
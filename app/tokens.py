@@ -0,0 +1,229 @@
+import base64
+import hashlib
+import hmac
+import json
+import secrets
+import threading
+import time
+
+from flask import current_app
+from sqlalchemy import delete, select
+
+from app import db
+from app.models import TokenRevocation
+from app.sharding import current_partition
+from app.tenancy import current_tenant_key
+
+# HMAC-SHA256 키로 쓰는 SECRET_KEY 의 최소 길이
+MIN_SECRET_KEY_LENGTH = 16
+
+
+class TokenError(Exception):
+    pass
+
+
+class TokenUser:
+    """토큰에서 꺼낸 사용자 id 만 가진 가벼운 사용자 객체.
+
+    Note:
+        bearer 토큰으로 인증한 요청은 DB 에서 User 를 불러오지 않고 `g.user` 에
+        이 객체를 넣는다. view 들은 `g.user.id` 만 사용하므로 그대로 동작한다.
+    """
+
+    __slots__ = ("id",)
+
+    def __init__(self, user_id):
+        self.id = user_id
+
+
+class RevocationList:
+    """폐기된 토큰(jti)과 사용자별 폐기 시각을 DB 에 기록하고 확인하는 목록.
+
+    Note:
+        `TokenRevocation` 테이블에 두므로 한 워커에서 폐기한 토큰을 다른 워커도
+        거절한다. 폐기는 호출한 쪽의 트랜잭션에 추가되며 commit 은 호출한 쪽에서
+        수행한다. 토큰은 만료 시각이 지나면 어차피 거절되므로, 만료된 행은 새로
+        폐기할 때 정리한다. 사용자 폐기는 (은행, user_id) 로 기록하고 확인한다.
+        bearer 요청마다 DB 를 조회하지 않도록, 은행/shard 마다 만료되지 않은
+        폐기 행을 프로세스 메모리에 읽어 두고 `TOKEN_REVOCATION_TTL` 초마다 다시
+        읽는다. 이 프로세스에서 폐기한 토큰은 바로, 다른 워커에서 폐기한 토큰은
+        늦어도 그 시간 안에 거절된다.
+    """
+
+    __slots__ = ("_lock",)
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    def revoke(self, jti, user_id, expires_at):
+        self._prune(time.time())
+        db.session.add(
+            TokenRevocation(
+                jti=jti,
+                tenant=current_tenant_key(),
+                user_id=user_id,
+                expires_at=expires_at,
+            )
+        )
+        self._entry()[1].add(jti)
+
+    def revoke_user(self, user_id, ttl):
+        """user_id 에게 지금까지 발급된 모든 토큰을 폐기하는 메서드."""
+        now = int(time.time())
+        self._prune(now)
+        db.session.add(
+            TokenRevocation(
+                tenant=current_tenant_key(),
+                user_id=user_id,
+                issued_before=now,
+                expires_at=now + ttl,
+            )
+        )
+        users = self._entry()[2]
+        users[user_id] = max(users.get(user_id, 0), now)
+
+    def is_revoked(self, payload):
+        _, jtis, users = self._entry()
+        if payload["jti"] in jtis:
+            return True
+
+        issued_before = users.get(payload["uid"])
+
+        return issued_before is not None and issued_before >= payload["iat"]
+
+    def _entry(self):
+        # app 마다 (tenant, shard) -> (읽은 시각, 폐기된 jti 집합,
+        # user_id -> 폐기 시각) 표를 둔다.
+        cache = current_app.extensions.setdefault("token_revocations", {})
+        partition = current_partition()
+        now = time.monotonic()
+        entry = cache.get(partition)
+        if entry is not None and now - entry[0] < current_app.config.get(
+            "TOKEN_REVOCATION_TTL", 5
+        ):
+            return entry
+
+        with self._lock:
+            entry = cache.get(partition)
+            if entry is None or now - entry[0] >= current_app.config.get(
+                "TOKEN_REVOCATION_TTL", 5
+            ):
+                entry = cache[partition] = self._load(now)
+
+        return entry
+
+    def _load(self, now):
+        rows = db.session.execute(
+            select(
+                TokenRevocation.jti,
+                TokenRevocation.user_id,
+                TokenRevocation.issued_before,
+            ).where(
+                TokenRevocation.tenant == current_tenant_key(),
+                TokenRevocation.expires_at > time.time(),
+            )
+        )
+        jtis = set()
+        users = {}
+        for jti, user_id, issued_before in rows:
+            if jti is not None:
+                jtis.add(jti)
+            else:
+                users[user_id] = max(users.get(user_id, 0), issued_before)
+
+        return now, jtis, users
+
+    def _prune(self, now):
+        db.session.execute(
+            delete(TokenRevocation).where(TokenRevocation.expires_at <= now)
+        )
+
+
+revoked_tokens = RevocationList()
+
+
+def _b64encode(data):
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _b64decode(data):
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+def is_valid_secret_key(secret_key):
+    return (
+        isinstance(secret_key, str)
+        and len(secret_key) >= MIN_SECRET_KEY_LENGTH
+    )
+
+
+def _sign(secret_key, payload):
+    # 비어 있거나 짧은 키로 서명한 토큰은 쉽게 위조할 수 있다.
+    if not is_valid_secret_key(secret_key):
+        raise TokenError("Secret key is missing or too short")
+
+    return hmac.new(
+        secret_key.encode("utf-8"), payload.encode("ascii"), hashlib.sha256
+    ).digest()
+
+
+def issue_token(secret_key, user_id, ttl, tenant=None, shard=None):
+    """user_id 와 만료 시각을 담은 HMAC-SHA256 서명 토큰을 발급하는 메서드.
+
+    Note:
+        tenant 가 주어지면 발급한 은행(tenant key)을, shard 가 주어지면
+        사용자의 shard 를 함께 담는다.
+
+    Returns:
+        str: `<payload>.<signature>` 형식의 토큰.
+
+    Examples:
+        >>> issue_token("secret", 1, 3600)
+        "eyJ1aWQiOjEsIm...Q.tm3z..."
+    """
+    now = int(time.time())
+    claims = {
+        "uid": user_id,
+        "iat": now,
+        "exp": now + ttl,
+        "jti": secrets.token_hex(8),
+    }
+    if tenant is not None:
+        claims["tenant"] = tenant
+    if shard is not None:
+        claims["shard"] = shard
+    payload = _b64encode(
+        json.dumps(claims, separators=(",", ":")).encode("utf-8")
+    )
+
+    return f"{payload}.{_b64encode(_sign(secret_key, payload))}"
+
+
+def verify_token(secret_key, token):
+    """토큰의 서명과 만료 시각을 확인하고 payload 를 반환하는 메서드.
+
+    Note:
+        DB 를 조회하지 않는다. 폐기 목록은 사용자와 같은 DB 에 있으므로, 토큰의
+        은행(tenant)과 사용자의 shard 로 보낸 뒤 `revoked_tokens.is_revoked` 로
+        따로 확인한다.
+
+    Raises:
+        TokenError: 토큰 형식이 잘못되었거나, 서명이 틀렸거나, 만료된 경우.
+            SECRET_KEY 가 비어 있거나 짧은 경우.
+    """
+    try:
+        payload, signature = token.split(".")
+        is_valid = hmac.compare_digest(
+            _b64decode(signature), _sign(secret_key, payload)
+        )
+    except (ValueError, TypeError):
+        raise TokenError("Malformed token")
+
+    if not is_valid:
+        raise TokenError("Invalid token signature")
+
+    data = json.loads(_b64decode(payload))
+    if data["exp"] <= time.time():
+        raise TokenError("Token expired")
+
+    return data
@@ -0,0 +1,259 @@
+"""계좌 번호로 다른 사용자의 계좌에 이체하는 모듈.
+
+Note:
+    받는 계좌가 같은 shard 에 있으면 한 트랜잭션에서 `Account.transfer` 로 끝낸다.
+    다른 shard 에 있으면 두 DB 를 한 트랜잭션으로 묶을 수 없으므로 두 단계로 나눈다.
+
+    1. 준비: 보내는 shard 에서 출금과 함께 PREPARED 상태의 ShardTransfer("out") 를
+       commit 한다.
+    2. 반영: 받는 shard 에서 입금과 함께 같은 id 의 ShardTransfer("in") 를 commit
+       한다. "in" 행의 기본 키가 같은 이체의 중복 입금을 막는다.
+    3. 확정: 보내는 shard 의 "out" 행을 COMMITTED 로 바꾼다. 받는 계좌가 없으면
+       출금을 되돌리고 FAILED 로 바꾼다.
+
+    중간에 프로세스가 죽어 PREPARED 로 남은 이체는 `flask shards recover` 가
+    2, 3 단계를 다시 실행해 마무리한다. 각 단계는 여러 번 실행해도 결과가 같다.
+"""
+
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import click
+from flask import current_app
+from flask.cli import AppGroup, with_appcontext
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+
+from app import db, repository
+from app.directory import account_shard, build_directory
+from app.limits import (
+    check_withdrawal_limit,
+    record_withdrawal,
+    release_withdrawal,
+)
+from app.models import ShardTransfer, ShardTransferStatus
+from app.sharding import current_shard, use_shard
+
+shards_cli = AppGroup("shards", help="Shard maintenance.")
+
+
+def transfer_to_account_number(account, to_account_number, amount):
+    """account 에서 계좌 번호 to_account_number 의 계좌로 amount(Money) 를 이체하는 메서드.
+
+    Note:
+        commit 까지 수행한다. 다른 shard 로 이체한 뒤에는 session 의 객체가
+        떼어지므로, 호출한 쪽은 필요한 객체를 다시 불러와야 한다.
+        카드 인출과 같은 계좌 1회/일일 출금 한도를 적용한다.
+
+    Returns:
+        tuple[bool, str]: 성공 여부와 메시지.
+    """
+    error = check_withdrawal_limit(None, account, amount)
+    if error is not None:
+        return False, error
+
+    to_shard = account_shard(to_account_number)
+    if to_shard == current_shard():
+        to_account = repository.get_account_by_number(to_account_number)
+        if to_account is None:
+            return False, "FAILED: Target account not found."
+
+        if to_account.id == account.id:
+            return False, "Cannot transfer to the same account."
+
+        error = record_withdrawal(None, account, amount)
+        if error is not None:
+            return False, error
+
+        is_successful, message = account.transfer(to_account, amount)
+        if not is_successful:
+            release_withdrawal(None, account, amount)
+        db.session.commit()
+
+        return is_successful, message
+
+    error = record_withdrawal(None, account, amount)
+    if error is not None:
+        return False, error
+
+    if not account.move_balance(-amount):
+        release_withdrawal(None, account, amount)
+        return False, "FAILED: Insufficient balance for transfer."
+
+    transfer = ShardTransfer(
+        id=uuid.uuid4().hex,
+        direction="out",
+        account_id=account.id,
+        peer_shard=to_shard,
+        peer_account_number=to_account_number,
+        amount=amount.amount,
+        currency=amount.currency,
+        status=ShardTransferStatus.PREPARED,
+    )
+    db.session.add(transfer)
+    db.session.commit()
+
+    status = complete_transfer(transfer.id)
+    if status == ShardTransferStatus.FAILED:
+        return False, "FAILED: Target account not found."
+
+    return True, f"Transferred {amount.amount} to account {to_account_number}."
+
+
+def complete_transfer(transfer_id):
+    """현재 shard 의 PREPARED 이체를 받는 shard 에 반영하고 확정하는 메서드.
+
+    Returns:
+        ShardTransferStatus: 이체의 최종 상태.
+    """
+    source_shard = current_shard()
+    transfer = db.session.get(ShardTransfer, transfer_id)
+    if transfer.status != ShardTransferStatus.PREPARED:
+        return transfer.status
+
+    from_account_number = transfer.account.account_number
+    to_shard = transfer.peer_shard
+    to_account_number = transfer.peer_account_number
+    amount = transfer.money
+    # 다른 shard 의 같은 id 객체와 섞이지 않도록 session 을 비우고 shard 를 바꾼다.
+    db.session.commit()
+    db.session.expunge_all()
+
+    use_shard(to_shard)
+    try:
+        applied = apply_transfer(
+            transfer_id,
+            source_shard,
+            from_account_number,
+            to_account_number,
+            amount,
+        )
+        db.session.expunge_all()
+    finally:
+        use_shard(source_shard)
+
+    status = (
+        ShardTransferStatus.COMMITTED
+        if applied
+        else ShardTransferStatus.FAILED
+    )
+    claimed = db.session.execute(
+        update(ShardTransfer)
+        .where(
+            ShardTransfer.id == transfer_id,
+            ShardTransfer.status == ShardTransferStatus.PREPARED,
+        )
+        .values(status=status, updated_at=datetime.now(timezone.utc))
+    ).rowcount
+    if not claimed:
+        # 다른 프로세스(복구 작업)가 먼저 확정했다.
+        db.session.rollback()
+
+        return db.session.get(ShardTransfer, transfer_id).status
+
+    if not applied:
+        transfer = db.session.get(ShardTransfer, transfer_id)
+        transfer.account.move_balance(amount)
+        current_app.logger.warning(
+            f"Cross-shard transfer {transfer_id} refunded: "
+            f"account {to_account_number} not found"
+        )
+    db.session.commit()
+
+    return status
+
+
+def apply_transfer(
+    transfer_id, from_shard, from_account_number, to_account_number, amount
+):
+    """받는 shard 에서 이체를 입금하는 메서드. 이미 입금했으면 다시 하지 않는다.
+
+    Returns:
+        bool: 입금했거나 이미 입금되어 있으면 True, 받는 계좌가 없으면 False.
+    """
+    if db.session.get(ShardTransfer, transfer_id) is not None:
+        return True
+
+    to_account = repository.get_account_by_number(to_account_number)
+    if to_account is None:
+        db.session.rollback()
+
+        return False
+
+    to_account.move_balance(amount)
+    db.session.add(
+        ShardTransfer(
+            id=transfer_id,
+            direction="in",
+            account_id=to_account.id,
+            peer_shard=from_shard,
+            peer_account_number=from_account_number,
+            amount=amount.amount,
+            currency=amount.currency,
+            status=ShardTransferStatus.COMMITTED,
+        )
+    )
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # 동시에 같은 이체를 반영한 쪽이 먼저 commit 했다.
+        db.session.rollback()
+        if db.session.get(ShardTransfer, transfer_id) is None:
+            raise
+
+    return True
+
+
+def recover_transfers(older_than=60):
+    """현재 shard 에서 older_than 초 넘게 PREPARED 로 남은 이체를 마무리하는 메서드.
+
+    Returns:
+        int: 마무리한 이체 수.
+    """
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=older_than)
+    transfer_ids = (
+        db.session.execute(
+            select(ShardTransfer.id).where(
+                ShardTransfer.status == ShardTransferStatus.PREPARED,
+                ShardTransfer.direction == "out",
+                ShardTransfer.created_at < cutoff,
+            )
+        )
+        .scalars()
+        .all()
+    )
+    for transfer_id in transfer_ids:
+        complete_transfer(transfer_id)
+
+    return len(transfer_ids)
+
+
+@shards_cli.command("recover")
+@click.option("--older-than", default=60, show_default=True)
+@with_appcontext
+def recover_command(older_than):
+    """Finish cross-shard transfers left PREPARED on this shard."""
+    recovered = recover_transfers(older_than)
+    click.echo(f"Recovered {recovered} cross-shard transfers.")
+
+
+@shards_cli.command("init-db")
+@with_appcontext
+def init_db_command():
+    """Create all tables on every shard (local development)."""
+    registry = current_app.extensions["shards"]
+    db.create_all()
+    for index in range(1, registry.count):
+        db.metadata.create_all(registry.engine(index))
+    click.echo(f"Created tables on {registry.count} shards.")
+
+
+@shards_cli.command("directory")
+@with_appcontext
+def directory_command():
+    """Record every shard's users, accounts and cards in the directory."""
+    users, accounts, cards = build_directory()
+    click.echo(
+        f"Added {users} users, {accounts} accounts and {cards} cards "
+        "to the directory."
+    )
@@ -1,10 +1,57 @@
+import json
+import queue
 import random
+from datetime import datetime, timezone
 
-from flask import Blueprint, jsonify, request, g, current_app
+from flask import Blueprint, Response, jsonify, request, g, current_app
 from flask.views import MethodView
-
-from app import db
-from app.models import Account, Card, AccountNumber
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm.exc import StaleDataError
+
+from app import db, repository
+from app.archive import account_number_archived, close_account
+from app.card_number import (
+    hash_card_number,
+    mask_card_number,
+    validate_card_number,
+)
+from app.directory import (
+    claim_account_number,
+    claim_cards,
+    release_cards,
+)
+from app.etags import conflict, if_match_failed, with_etag
+from app.existence import (
+    ACCOUNT_NUMBERS,
+    CARDS,
+    count_inserts,
+    might_exist,
+    record,
+)
+from app.models import (
+    Account,
+    Card,
+    AccountNumber,
+    CardStatus,
+    StandingOrder,
+    TransferInterval,
+    as_naive_utc,
+    insert_or_ignore,
+    is_unique_violation,
+    utcnow,
+)
+from app.money import CURRENCY_EXPONENTS, Money, MoneyError
+from app.outbox import emit
+from app.pubsub import balance_channel, broker, publish_balance
+from app.rate_limit import rate_limit
+from app.rollups import (
+    parse_summary_range,
+    summarize_accounts,
+    summarize_cards,
+)
+from app.sharding import current_shard, shard_count
+from app.tenancy import current_bank_id
+from app.transfers import transfer_to_account_number
 from app.views.auth_views import login_required
 
 bp = Blueprint("accounts", __name__, url_prefix="/accounts")
@@ -17,33 +64,91 @@ def create_account_number() -> str:
         만약 새롭게 생성한 계좌 번호가 Database에서 특정 계좌가 이미 사용하고 있거나
         현재 소멸된 계좌가 사용했던 번호일 경우, 새로운 번호를 겹치지 않을 때 까지 재생성함.
         이미 다른 계좌가 사용하고 있는 계좌 번호 혹은 소멸된 계좌가 사용했던 계좌 번호 모두
-        AccountNumber 모델을 통해 확인할 수 있다.
+        AccountNumber 모델을 통해 확인할 수 있다. 오래전에 소멸된 계좌의 번호는
+        ArchivedAccountNumber 로 옮겨지므로 `account_number_archived` 로 함께
+        확인한다.
+        shard 로 나눈 경우 다른 shard 의 계좌와 겹치지 않도록 고른 번호를 전역
+        목록(`claim_account_number`)에 넣어 확인한다. 뒤 7자리 일련번호는 shard
+        수로 나눈 나머지가 현재 shard 가 되도록 만들어 새 계좌끼리는 겹치지 않는다.
+        존재 확인 filter 가 틀려 쓰던 번호를 돌려줄 수 있으므로, 만든 번호는
+        `add_account` 처럼 INSERT 의 기본 키 위반으로 한 번 더 확인한다.
 
     Returns:
-        str: 13자리의 계좌 번호이며 앞 6자리는 은행 식별 번호가 포함된다.
+        str: 13자리의 계좌 번호이며 앞 6자리는 현재 요청 은행(tenant)의 식별 번호이다.
 
     Examples:
         >>> create_account_number()
         "5555110123456"
     """
-    bank_id = current_app.config.get("BANK_ID")
-    account_number = bank_id + "".join(
-        random.choice("0123456789") for _ in range(7)
-    )
-    while db.session.get(AccountNumber, account_number) is not None:
-        account_number = bank_id + "".join(
-            random.choice("0123456789") for _ in range(7)
-        )
+    bank_id = current_bank_id()
+    shards = shard_count()
+    shard = current_shard()
+
+    def generate():
+        serial = random.randrange(10**7 // shards) * shards + shard
+        return f"{bank_id}{serial:07d}"
+
+    def is_taken(number):
+        # filter 에 없는 번호는 DB 에도 없으므로 조회하지 않는다.
+        if (
+            might_exist(ACCOUNT_NUMBERS, number)
+            and db.session.get(AccountNumber, number) is not None
+        ):
+            return True
+
+        if account_number_archived(number):
+            return True
+
+        return not claim_account_number(number)
+
+    account_number = generate()
+    while is_taken(account_number):
+        account_number = generate()
 
     return account_number
 
 
+def add_account(user_id, name, password, retries=3):
+    """새 계좌 번호로 계좌를 만들어 flush 하는 메서드.
+
+    Note:
+        존재 확인 filter 밖에서 넣은 번호를 다시 고르면 AccountNumber 의 기본 키
+        위반이 난다. 그 번호를 filter 에 넣고 다른 번호로 다시 만든다.
+        commit 은 호출한 쪽에서 수행한다.
+
+    Returns:
+        Account: 만든 계좌.
+    """
+    for _ in range(retries):
+        account_number = create_account_number()
+        new_account = Account(
+            user_id=user_id,
+            name=name,
+            password=password,
+            account_number=account_number,
+        )
+        db.session.add(AccountNumber(number=account_number))
+        db.session.add(new_account)
+        try:
+            db.session.flush()
+        except IntegrityError:
+            db.session.rollback()
+            if db.session.get(AccountNumber, account_number) is None:
+                raise
+
+            record(ACCOUNT_NUMBERS, account_number)
+        else:
+            return new_account
+
+    raise RuntimeError("Could not allocate an account number.")
+
+
 class AccountListView(MethodView):
     decorators = [login_required]
 
     def get(self):
         user_id = g.user.id
-        accounts = Account.query.filter_by(user_id=user_id).all()
+        accounts = repository.get_accounts_by_user(user_id)
 
         accounts_list = [account.to_dict() for account in accounts]
         current_app.logger.info(
@@ -65,16 +170,8 @@ class AccountListView(MethodView):
             error = "Password is required."
 
         if error is None:
-            account_number = create_account_number()
-            new_account = Account(
-                user_id=user_id,
-                name=name,
-                password=password,
-                account_number=account_number,
-            )
-            new_account_number = AccountNumber(number=account_number)
-            db.session.add(new_account_number)
-            db.session.add(new_account)
+            new_account = add_account(user_id, name, password)
+            emit("account.created", new_account.id, user_id)
             db.session.commit()
 
             current_app.logger.info(
@@ -116,7 +213,10 @@ class AccountView(MethodView):
 
         current_app.logger.info(f"Fetched details for account id {account_id}")
 
-        return jsonify(account.to_dict_in_detail()), 200
+        return (
+            with_etag(jsonify(account.to_dict_in_detail()), account.version),
+            200,
+        )
 
     def put(self, account_id):
         account = Account.query.get(account_id)
@@ -133,6 +233,9 @@ class AccountView(MethodView):
 
             return jsonify({"error": "Not authorized"}), 403
 
+        if if_match_failed(account.version):
+            return conflict(account.version)
+
         account_name = request.json.get("name", None)
         current_password = request.json.get("current_password", None)
         new_password = request.json.get("new_password", None)
@@ -178,16 +281,31 @@ class AccountView(MethodView):
 
             account.password = new_password
 
-        db.session.commit()
+        emit(
+            "account.updated",
+            account.id,
+            account.user_id,
+            name_changed=bool(account_name),
+            password_changed=bool(new_password),
+        )
+        try:
+            db.session.commit()
+        except StaleDataError:
+            db.session.rollback()
+
+            return conflict()
 
         current_app.logger.info(f"Account id {account_id} updated successfully")
 
         return (
-            jsonify(
-                {
-                    "message": "Account updated successfully",
-                    "account": account.to_dict_in_detail(),
-                }
+            with_etag(
+                jsonify(
+                    {
+                        "message": "Account updated successfully",
+                        "account": account.to_dict_in_detail(),
+                    }
+                ),
+                account.version,
             ),
             200,
         )
@@ -207,7 +325,9 @@ class AccountView(MethodView):
 
             return jsonify({"error": "Not authorized"}), 403
 
+        close_account(account)
         db.session.delete(account)
+        emit("account.deleted", account_id, account.user_id)
         db.session.commit()
 
         current_app.logger.info(f"Account id {account_id} deleted successfully")
@@ -215,14 +335,73 @@ class AccountView(MethodView):
         return jsonify({"message": "Account deleted successfully"}), 200
 
 
+def format_balance_event(account_id, currency, balance):
+    data = json.dumps(
+        {"account_id": account_id, "currency": currency, "balance": balance}
+    )
+
+    return f"event: balance\ndata: {data}\n\n"
+
+
+class AccountBalanceStreamView(MethodView):
+    """계좌 잔액이 바뀔 때마다 새 잔액을 SSE 로 보내는 뷰.
+
+    Note:
+        처음에 현재 잔액을 한 번 보내고, 이후에는 프로세스 내 broker 에서
+        잔액 변경 메시지를 기다린다. 기다리는 동안에는 DB 커넥션을 잡지 않으며,
+        `BALANCE_STREAM_KEEPALIVE` 초마다 keep-alive 주석만 보낸다.
+        연결마다 워커 스레드 하나를 쓰므로 threaded/gevent 서버로 띄워야 한다.
+    """
+
+    decorators = [login_required]
+
+    def get(self, account_id):
+        account, error_response = get_own_account(account_id)
+        if error_response is not None:
+            return error_response
+
+        channel = balance_channel(account_id)
+        subscriber = broker.subscribe(channel)
+        balances = account.get_balances()
+        keepalive = current_app.config.get("BALANCE_STREAM_KEEPALIVE", 15)
+        # 읽기만 했으므로 트랜잭션을 끝내 커넥션을 풀에 돌려준다.
+        db.session.rollback()
+
+        current_app.logger.info(
+            f"Balance stream opened for account id {account_id}"
+        )
+
+        def generate():
+            try:
+                for currency, balance in balances.items():
+                    yield format_balance_event(account_id, currency, balance)
+
+                while True:
+                    try:
+                        message = subscriber.get(timeout=keepalive)
+                    except queue.Empty:
+                        yield ": keep-alive\n\n"
+                        continue
+
+                    yield format_balance_event(
+                        account_id, message["currency"], message["balance"]
+                    )
+            finally:
+                broker.unsubscribe(channel, subscriber)
+
+        return Response(
+            generate(),
+            mimetype="text/event-stream",
+            headers={"Cache-Control": "no-cache"},
+        )
+
+
 class AccountCardListView(MethodView):
     decorators = [login_required]
 
     def get(self, account_id):
         user_id = g.user.id
-        cards = Card.query.filter_by(
-            user_id=user_id, account_id=account_id
-        ).all()
+        cards = repository.get_cards_by_user_and_account(user_id, account_id)
 
         cards_list = [card.to_dict() for card in cards]
 
@@ -233,36 +412,57 @@ class AccountCardListView(MethodView):
     def post(self, account_id):
         user_id = g.user.id
         card_number = request.json.get("card_number")
-        error = None
-
-        if not card_number:
-            error = "Card number is required."
-        elif len(card_number) != 16:
-            error = "Card number should be 16 digits."
-        elif Card.query.filter_by(card_number=card_number).first() is not None:
-            error = "A card with number '{}' is already registered.".format(
-                card_number
-            )
+        error = validate_card_number(card_number)
 
         if error is None:
+            # 없는 계좌나 다른 사용자의 계좌에는 카드를 등록하지 않는다.
+            account, error_response = get_own_account(account_id)
+            if error_response is not None:
+                return error_response
+
+            # 중복 카드 번호는 미리 조회하지 않고 UNIQUE 제약 위반으로 확인한다.
+            # 다른 shard 에 등록된 번호는 전역 목록이 거절한다.
             new_card = Card(
                 user_id=user_id, account_id=account_id, card_number=card_number
             )
-            db.session.add(new_card)
-            db.session.commit()
+            registered = bool(claim_cards([new_card.card_number_hash]))
+            if registered:
+                db.session.add(new_card)
+                try:
+                    db.session.flush()
+                    emit(
+                        "card.registered",
+                        new_card.id,
+                        user_id,
+                        account_id=account_id,
+                        state=new_card.state.value.lower(),
+                    )
+                    db.session.commit()
+                except IntegrityError as e:
+                    db.session.rollback()
+                    if not is_unique_violation(e, "card", "card_number_hash"):
+                        raise
+
+                    registered = False
+
+            if registered:
+                current_app.logger.info(
+                    f"Card registered successfully for account id {account_id}"
+                )
 
-            current_app.logger.info(
-                f"Card registered successfully for account id {account_id}"
-            )
+                return (
+                    jsonify(
+                        {
+                            "message": "Card registered successfully",
+                            "card": new_card.to_dict(),
+                        }
+                    ),
+                    201,
+                )
 
-            return (
-                jsonify(
-                    {
-                        "message": "Card registered successfully",
-                        "card": new_card.to_dict(),
-                    }
-                ),
-                201,
+            # 오류 메시지는 로그에도 남으므로 카드 번호를 가린다.
+            error = "A card with number '{}' is already registered.".format(
+                mask_card_number(card_number)
             )
 
         current_app.logger.error(error)
@@ -270,11 +470,127 @@ class AccountCardListView(MethodView):
         return jsonify({"error": error}), 400
 
 
+class AccountCardBulkView(MethodView):
+    """여러 카드 번호를 INSERT 한 번으로 등록하고 충돌한 번호를 알려 주는 뷰."""
+
+    decorators = [login_required]
+
+    def post(self, account_id):
+        user_id = g.user.id
+        card_numbers = request.json.get("card_numbers")
+        limit = current_app.config.get("BULK_CARD_REGISTRATION_LIMIT", 1000)
+        error = None
+
+        if not card_numbers or not isinstance(card_numbers, list):
+            error = "Card numbers are required."
+        elif len(card_numbers) > limit:
+            error = f"At most {limit} cards can be registered at once."
+
+        if error is not None:
+            current_app.logger.error(error)
+
+            return jsonify({"error": error}), 400
+
+        account = db.session.get(Account, account_id)
+
+        if account is None:
+            current_app.logger.error(f"Account id {account_id} not found")
+
+            return jsonify({"error": "Account not found"}), 404
+
+        if account.user_id != user_id:
+            current_app.logger.error(
+                f"Not authorized for user id {user_id} for account id {account_id}"
+            )
+
+            return jsonify({"error": "Not authorized"}), 403
+
+        # 한 번에 나누어 목록 크기에 비례하는 시간만 쓴다. 올바른 번호는
+        # 중복을 빼고 처음 나온 순서를 지킨다.
+        invalid = []
+        candidates = {}
+        for number in card_numbers:
+            if validate_card_number(number) is not None:
+                invalid.append(number)
+            else:
+                candidates[number] = None
+        candidates = list(candidates)
+
+        registered = []
+        hashes = {number: hash_card_number(number) for number in candidates}
+        # 다른 shard 에 등록된 번호는 전역 목록이 거절하므로 충돌로 돌려준다.
+        claimed = claim_cards(hashes.values())
+        claimed = [
+            number for number in candidates if hashes[number] in claimed
+        ]
+        if claimed:
+            # ORM 을 거치지 않는 INSERT 이므로 존재 확인 filter 에 직접 넣는다.
+            record(CARDS, *(hashes[number] for number in claimed))
+            numbers = {
+                card_hash: number for number, card_hash in hashes.items()
+            }
+            stmt = (
+                insert_or_ignore(Card, ["card_number_hash"])
+                .values(
+                    [
+                        {
+                            "user_id": user_id,
+                            "account_id": account_id,
+                            "card_number_hash": hashes[number],
+                            "card_last4": number[-4:],
+                            "state": CardStatus.DISABLED,
+                        }
+                        for number in claimed
+                    ]
+                )
+                .returning(Card.id, Card.card_number_hash)
+            )
+            registered = [
+                {"id": card_id, "card_number": numbers[card_hash]}
+                for card_id, card_hash in db.session.execute(stmt)
+            ]
+            count_inserts(CARDS, len(registered))
+            for card in registered:
+                emit(
+                    "card.registered",
+                    card["id"],
+                    user_id,
+                    account_id=account_id,
+                    state=CardStatus.DISABLED.value.lower(),
+                )
+            db.session.commit()
+
+        registered_numbers = {card["card_number"] for card in registered}
+        collisions = [
+            mask_card_number(number)
+            for number in candidates
+            if number not in registered_numbers
+        ]
+        for card in registered:
+            card["card_number"] = mask_card_number(card["card_number"])
+
+        current_app.logger.info(
+            f"Registered {len(registered)} cards for account id {account_id}, "
+            f"{len(collisions)} already registered, {len(invalid)} invalid"
+        )
+
+        return (
+            jsonify(
+                {
+                    "cards": registered,
+                    "collisions": collisions,
+                    "invalid": invalid,
+                }
+            ),
+            201,
+        )
+
+
 class AccountCardView(MethodView):
     decorators = [login_required]
 
     def get(self, account_id, card_id):
-        card = Card.query.filter_by(id=card_id, account_id=account_id).first()
+        card = repository.get_account_card(account_id, card_id)
 
         if card is None:
             current_app.logger.error(
@@ -297,7 +613,7 @@ class AccountCardView(MethodView):
         return jsonify(card.to_dict()), 200
 
     def delete(self, account_id, card_id):
-        card = Card.query.filter_by(id=card_id, account_id=account_id).first()
+        card = repository.get_account_card(account_id, card_id)
 
         if card is None:
             current_app.logger.error(
@@ -313,8 +629,11 @@ class AccountCardView(MethodView):
 
             return jsonify({"error": "Not authorized"}), 403
 
+        card_number_hash = card.card_number_hash
         db.session.delete(card)
+        emit("card.deleted", card_id, card.user_id, account_id=account_id)
         db.session.commit()
+        release_cards([card_number_hash])
 
         current_app.logger.info(
             f"Card id {card_id} deleted successfully for account id {account_id}"
@@ -323,15 +642,449 @@ class AccountCardView(MethodView):
         return jsonify({"message": "Card deleted successfully"}), 200
 
 
+class AccountCardStateView(MethodView):
+    """계좌에 등록된 모든 카드를 한 번에 활성화/비활성화하는 뷰."""
+
+    decorators = [login_required]
+
+    def __init__(self, state):
+        self.state = state
+
+    def put(self, account_id):
+        account = db.session.get(Account, account_id)
+
+        if account is None:
+            current_app.logger.error(f"Account id {account_id} not found")
+
+            return jsonify({"error": "Account not found"}), 404
+
+        if account.user_id != g.user.id:
+            current_app.logger.error(
+                f"Not authorized for user id {g.user.id} for account id {account_id}"
+            )
+
+            return jsonify({"error": "Not authorized"}), 403
+
+        card_ids = Card.bulk_change_state(
+            self.state, user_id=g.user.id, account_id=account_id
+        )
+        for card_id in card_ids:
+            emit(
+                "card.state_changed",
+                card_id,
+                g.user.id,
+                account_id=account_id,
+                state=self.state.value.lower(),
+            )
+        db.session.commit()
+
+        current_app.logger.info(
+            f"Changed {len(card_ids)} cards to {self.state.value} "
+            f"for account id {account_id}"
+        )
+
+        return (
+            jsonify({"state": self.state.value.lower(), "cards": card_ids}),
+            200,
+        )
+
+
+def get_own_account(account_id):
+    """로그인한 사용자의 계좌를 찾고, 없거나 권한이 없으면 오류 응답을 반환하는 메서드.
+
+    Returns:
+        tuple: (Account, None) 또는 (None, 오류 응답).
+    """
+    account = db.session.get(Account, account_id)
+
+    if account is None:
+        current_app.logger.error(f"Account id {account_id} not found")
+
+        return None, (jsonify({"error": "Account not found"}), 404)
+
+    if account.user_id != g.user.id:
+        current_app.logger.error(
+            f"Not authorized for user id {g.user.id} for account id {account_id}"
+        )
+
+        return None, (jsonify({"error": "Not authorized"}), 403)
+
+    return account, None
+
+
+def parse_start_at(value):
+    if value is None:
+        return utcnow()
+
+    start_at = datetime.fromisoformat(value)
+    if start_at.tzinfo is None:
+        start_at = start_at.replace(tzinfo=timezone.utc)
+
+    return start_at.astimezone(timezone.utc)
+
+
+class AccountStandingOrderListView(MethodView):
+    """계좌에서 나가는 예약/정기 이체 지시 목록 조회 및 등록 뷰."""
+
+    decorators = [login_required]
+
+    def get(self, account_id):
+        account, error_response = get_own_account(account_id)
+        if error_response is not None:
+            return error_response
+
+        orders = (
+            StandingOrder.query.filter_by(from_account_id=account_id)
+            .order_by(StandingOrder.id)
+            .all()
+        )
+
+        return (
+            jsonify({"standing_orders": [o.to_dict() for o in orders]}),
+            200,
+        )
+
+    def post(self, account_id):
+        account, error_response = get_own_account(account_id)
+        if error_response is not None:
+            return error_response
+
+        to_account_id = request.json.get("to_account_id")
+        interval = request.json.get("interval", "once")
+        error = None
+
+        try:
+            amount = Money.from_request(
+                request.json.get("amount"), request.json.get("currency")
+            )
+            start_at = parse_start_at(request.json.get("start_at"))
+        except (MoneyError, TypeError, ValueError) as e:
+            error = str(e)
+
+        if error is None:
+            to_account = (
+                db.session.get(Account, to_account_id)
+                if isinstance(to_account_id, int)
+                else None
+            )
+
+            if to_account is None or to_account.user_id != g.user.id:
+                error = "Target account not found."
+            elif to_account.id == account.id:
+                error = "Cannot transfer to the same account."
+            elif str(interval).upper() not in TransferInterval.__members__:
+                error = f"Unsupported interval: {interval}"
+
+        if error is not None:
+            current_app.logger.error(error)
+
+            return jsonify({"error": error}), 400
+
+        order = StandingOrder(
+            user_id=g.user.id,
+            from_account_id=account.id,
+            to_account_id=to_account.id,
+            amount=amount.amount,
+            currency=amount.currency,
+            interval=TransferInterval[interval.upper()],
+            start_at=as_naive_utc(start_at),
+            next_run_at=as_naive_utc(start_at),
+        )
+        db.session.add(order)
+        db.session.flush()
+        emit(
+            "standing_order.created",
+            order.id,
+            g.user.id,
+            from_account_id=order.from_account_id,
+            to_account_id=order.to_account_id,
+            interval=order.interval.value.lower(),
+        )
+        db.session.commit()
+
+        current_app.logger.info(
+            f"Standing order id {order.id} created for account id {account_id}"
+        )
+
+        return jsonify(order.to_dict()), 201
+
+
+class AccountStandingOrderView(MethodView):
+    decorators = [login_required]
+
+    def delete(self, account_id, order_id):
+        account, error_response = get_own_account(account_id)
+        if error_response is not None:
+            return error_response
+
+        order = db.session.get(StandingOrder, order_id)
+        if order is None or order.from_account_id != account_id:
+            current_app.logger.error(f"Standing order id {order_id} not found")
+
+            return jsonify({"error": "Standing order not found"}), 404
+
+        db.session.delete(order)
+        emit("standing_order.deleted", order_id, g.user.id)
+        db.session.commit()
+
+        current_app.logger.info(f"Standing order id {order_id} deleted")
+
+        return jsonify({"message": "Standing order deleted successfully"}), 200
+
+
+def transfer_account_key(account_id):
+    # 계좌 주인 확인 전에 세므로 사용자별로 따로 센다. (withdraw_card_key 참고)
+    return (g.user.id, account_id)
+
+
+class AccountTransferView(MethodView):
+    """계좌 번호로 다른 계좌(다른 사용자, 다른 shard 포함)에 이체하는 뷰."""
+
+    decorators = [login_required]
+
+    @rate_limit("TRANSFER_RATE_LIMIT_PER_ACCOUNT", transfer_account_key)
+    def post(self, account_id):
+        account, error_response = get_own_account(account_id)
+        if error_response is not None:
+            return error_response
+
+        if not account.verify_password(request.json.get("account_password")):
+            error_msg = "Invalid account password"
+            current_app.logger.error(error_msg)
+
+            return jsonify({"error": error_msg}), 401
+
+        to_account_number = request.json.get("to_account_number")
+        error = None
+
+        try:
+            amount = Money.from_request(
+                request.json.get("amount"), request.json.get("currency")
+            )
+        except MoneyError as e:
+            error = str(e)
+
+        if error is None and not (
+            isinstance(to_account_number, str)
+            and len(to_account_number) == 13
+            and to_account_number.isdigit()
+        ):
+            error = "Target account number should be 13 digits."
+
+        if error is None:
+            try:
+                is_successful, message = transfer_to_account_number(
+                    account, to_account_number, amount
+                )
+            except MoneyError as e:
+                db.session.rollback()
+                is_successful, message = False, str(e)
+
+            if not is_successful:
+                error = message
+
+        if error is not None:
+            current_app.logger.error(error)
+
+            return jsonify({"error": error}), 400
+
+        # 다른 shard 로 이체하면 session 이 비워지므로 계좌를 다시 불러온다.
+        account = db.session.get(Account, account_id)
+        publish_balance(account, amount.currency)
+        balance = account.get_balance(amount.currency).amount
+        current_app.logger.info(f"{message}, now balance: {balance}")
+
+        return (
+            jsonify(
+                {
+                    "message": message,
+                    "balance": balance,
+                    "currency": amount.currency,
+                }
+            ),
+            200,
+        )
+
+
+def parse_summary_args():
+    """요약 조회의 공통 쿼리 인자를 확인하는 메서드.
+
+    Returns:
+        tuple: ((start, end, period, currency), None) 또는 (None, 오류 응답).
+    """
+    try:
+        start, end, period = parse_summary_range(
+            request.args, current_app.config.get("SUMMARY_MAX_DAYS", 366)
+        )
+    except ValueError as e:
+        current_app.logger.error(f"Invalid summary range: {e}")
+
+        return None, (jsonify({"error": str(e)}), 400)
+
+    currency = request.args.get("currency")
+    if currency is not None:
+        currency = currency.upper()
+        if currency not in CURRENCY_EXPONENTS:
+            error = f"Unsupported currency: {currency}"
+            current_app.logger.error(error)
+
+            return None, (jsonify({"error": error}), 400)
+
+    return (start, end, period, currency), None
+
+
+class AccountSummaryView(MethodView):
+    """계좌의 기간별 입출금 요약 조회 뷰.
+
+    Note:
+        원장이 아니라 일별 집계(DailyRollup)만 읽는다.
+        `?from=YYYY-MM-DD&to=YYYY-MM-DD&period=day|month&currency=KRW`
+    """
+
+    decorators = [login_required]
+
+    def get(self, account_id):
+        account, error_response = get_own_account(account_id)
+        if error_response is not None:
+            return error_response
+
+        args, error_response = parse_summary_args()
+        if error_response is not None:
+            return error_response
+
+        start, end, period, currency = args
+        summary = summarize_accounts(
+            [account_id], start, end, period, currency
+        )
+
+        return (
+            jsonify(
+                {
+                    "account_id": account_id,
+                    "from": start.isoformat(),
+                    "to": end.isoformat(),
+                    "period": period,
+                    "totals": summary["totals"],
+                    "periods": summary["periods"],
+                    "cards": summarize_cards(account_id, start, end, currency),
+                }
+            ),
+            200,
+        )
+
+
+class AccountsSummaryView(MethodView):
+    """여러 계좌(기본은 내 모든 계좌)의 입출금 요약을 한 번에 조회하는 뷰.
+
+    Note:
+        `?account_ids=1,2,3` 으로 계좌를 고를 수 있으며, 나머지 인자는
+        AccountSummaryView 와 같다. 계좌 수와 관계없이 집계 조회는 한 번이다.
+    """
+
+    decorators = [login_required]
+
+    def get(self):
+        user_id = g.user.id
+        own_ids = {
+            account.id for account in repository.get_accounts_by_user(user_id)
+        }
+
+        account_ids = request.args.get("account_ids")
+        if account_ids:
+            try:
+                account_ids = {int(i) for i in account_ids.split(",")}
+            except ValueError:
+                error = "Account ids should be comma separated integers."
+                current_app.logger.error(error)
+
+                return jsonify({"error": error}), 400
+
+            if not account_ids <= own_ids:
+                current_app.logger.error(
+                    f"Not authorized for user id {user_id} for account ids "
+                    f"{sorted(account_ids - own_ids)}"
+                )
+
+                return jsonify({"error": "Not authorized"}), 403
+        else:
+            account_ids = own_ids
+
+        args, error_response = parse_summary_args()
+        if error_response is not None:
+            return error_response
+
+        start, end, period, currency = args
+        summary = summarize_accounts(
+            sorted(account_ids), start, end, period, currency
+        )
+        current_app.logger.info(
+            f"Summarized {len(account_ids)} accounts for user id {user_id}"
+        )
+
+        return (
+            jsonify(
+                {
+                    "account_ids": sorted(account_ids),
+                    "from": start.isoformat(),
+                    "to": end.isoformat(),
+                    "period": period,
+                    **summary,
+                }
+            ),
+            200,
+        )
+
+
 bp.add_url_rule("/", view_func=AccountListView.as_view("account_list"))
+bp.add_url_rule(
+    "/summary", view_func=AccountsSummaryView.as_view("accounts_summary")
+)
 bp.add_url_rule(
     "/<int:account_id>", view_func=AccountView.as_view("account_detail")
 )
+bp.add_url_rule(
+    "/<int:account_id>/balance/stream",
+    view_func=AccountBalanceStreamView.as_view("account_balance_stream"),
+)
+bp.add_url_rule(
+    "/<int:account_id>/transfers",
+    view_func=AccountTransferView.as_view("account_transfers"),
+)
+bp.add_url_rule(
+    "/<int:account_id>/summary",
+    view_func=AccountSummaryView.as_view("account_summary"),
+)
 bp.add_url_rule(
     "/<int:account_id>/cards",
     view_func=AccountCardListView.as_view("account_card_list"),
 )
+bp.add_url_rule(
+    "/<int:account_id>/cards/bulk",
+    view_func=AccountCardBulkView.as_view("account_card_bulk"),
+)
+bp.add_url_rule(
+    "/<int:account_id>/cards/enable",
+    view_func=AccountCardStateView.as_view(
+        "account_cards_enable", CardStatus.ENABLED
+    ),
+)
+bp.add_url_rule(
+    "/<int:account_id>/cards/disable",
+    view_func=AccountCardStateView.as_view(
+        "account_cards_disable", CardStatus.DISABLED
+    ),
+)
 bp.add_url_rule(
     "/<int:account_id>/cards/<int:card_id>",
     view_func=AccountCardView.as_view("account_card_detail"),
 )
+bp.add_url_rule(
+    "/<int:account_id>/standing-orders",
+    view_func=AccountStandingOrderListView.as_view(
+        "account_standing_order_list"
+    ),
+)
+bp.add_url_rule(
+    "/<int:account_id>/standing-orders/<int:order_id>",
+    view_func=AccountStandingOrderView.as_view("account_standing_order"),
+)
@@ -11,20 +11,76 @@ from flask import (
     current_app,
 )
 from flask.views import MethodView
-
-from app.models import User
-from app import db
+from sqlalchemy.exc import IntegrityError
+
+from app.models import User, is_unique_violation
+from app import db, repository
+from app.rate_limit import rate_limit, client_ip, request_email
+from app.directory import (
+    register_user,
+    route_to_email,
+    route_to_user,
+)
+from app.sharding import current_shard, shard_count, shard_for_email, use_shard
+from app.tenancy import current_tenant_key
+from app.tokens import (
+    TokenError,
+    TokenUser,
+    issue_token,
+    revoked_tokens,
+    verify_token,
+)
 
 bp = Blueprint("auth", __name__, url_prefix="/auth")
 
 
+def get_bearer_token():
+    authorization = request.headers.get("Authorization", "")
+    scheme, _, token = authorization.partition(" ")
+
+    if scheme.lower() != "bearer" or not token:
+        return None
+
+    return token
+
+
 @bp.before_app_request
 def load_logged_in_user():
+    g.token = None
+    token = get_bearer_token()
+
+    if token is not None:
+        # bearer 토큰 인증은 서명과 폐기 목록만 확인하고 사용자를 불러오지
+        # 않는다.
+        try:
+            g.token = verify_token(current_app.config["SECRET_KEY"], token)
+        except TokenError as e:
+            current_app.logger.warning(f"Rejected bearer token: {e}")
+            g.user = None
+        else:
+            # 다른 은행에서 발급된 토큰의 사용자 id 는 이 은행의 사용자가 아니다.
+            if g.token.get("tenant") != current_tenant_key():
+                current_app.logger.warning("Rejected bearer token: wrong bank")
+                g.token = None
+                g.user = None
+            else:
+                route_to_user(g.token["uid"], g.token.get("shard"))
+                if revoked_tokens.is_revoked(g.token):
+                    current_app.logger.warning(
+                        "Rejected bearer token: revoked"
+                    )
+                    g.token = None
+                    g.user = None
+                else:
+                    g.user = TokenUser(g.token["uid"])
+        return
+
     user_id = session.get("user_id")
 
-    if user_id is None:
+    if user_id is None or session.get("tenant") != current_tenant_key():
         g.user = None
     else:
+        route_to_user(user_id, session.get("shard"))
         g.user = db.session.get(User, user_id)
         current_app.logger.info(f"Loaded user with id {user_id}")
 
@@ -34,6 +90,9 @@ def login_required(view):
     def wrapped_view(**kwargs):
         if g.user is None:
             current_app.logger.warning("Unauthorized access attempt")
+            if get_bearer_token() is not None:
+                return jsonify({"error": "Invalid or expired token"}), 401
+
             return redirect(url_for("auth.login"))
 
         return view(**kwargs)
@@ -41,6 +100,41 @@ def login_required(view):
     return wrapped_view
 
 
+def create_user(username, email, password):
+    """사용자를 만들고, 실패하면 오류 메시지를 반환하는 메서드.
+
+    Note:
+        중복 이메일은 미리 조회하지 않고 UNIQUE 제약 위반으로 확인한다.
+        여러 shard 로 나눈 경우 이메일 해시로 shard 를 고르고, 전역 목록에
+        이메일을 먼저 등록해 전체에서 중복을 막고 user_id 를 받는다.
+    """
+    user_id = None
+    if shard_count() > 1:
+        shard = shard_for_email(email)
+        user_id = register_user(email, shard)
+        if user_id is None:
+            return "E-mail {} is already registered.".format(email)
+        use_shard(shard)
+
+    new_user = User(
+        id=user_id,
+        name=username,
+        email=email,
+        password=password,
+    )
+    db.session.add(new_user)
+    try:
+        db.session.commit()
+    except IntegrityError as e:
+        db.session.rollback()
+        if not is_unique_violation(e, "user", "email"):
+            raise
+
+        return "E-mail {} is already registered.".format(email)
+
+    return None
+
+
 class UserCreateView(MethodView):
     def post(self):
         username = request.json.get("username")
@@ -54,13 +148,11 @@ class UserCreateView(MethodView):
             error = "E-mail is required."
         elif not password:
             error = "Password is required."
-        elif User.query.filter_by(email=email).first() is not None:
-            error = "E-mail {} is already registered.".format(email)
 
         if error is None:
-            new_user = User(name=username, email=email, password=password)
-            db.session.add(new_user)
-            db.session.commit()
+            error = create_user(username, email, password)
+
+        if error is None:
             current_app.logger.info(f"Created new user with email {email}")
 
             return jsonify({"message": "Account created successfully"})
@@ -80,12 +172,15 @@ class LogInView(MethodView):
 
         return jsonify({"message": "Please Log into Bering Bank!"}), 200
 
+    @rate_limit("LOGIN_RATE_LIMIT_PER_IP", client_ip)
+    @rate_limit("LOGIN_RATE_LIMIT_PER_EMAIL", request_email)
     def post(self):
         email = request.json.get("email")
         password = request.json.get("password")
         error = None
 
-        user = User.query.filter_by(email=email).first()
+        route_to_email(email)
+        user = repository.get_user_by_email(email)
 
         if user is None:
             error = "Incorrect username."
@@ -95,6 +190,8 @@ class LogInView(MethodView):
         if error is None:
             session.clear()
             session["user_id"] = user.id
+            session["tenant"] = current_tenant_key()
+            session["shard"] = current_shard()
             current_app.logger.info(f"User {email} logged in successfully.")
 
             return jsonify({"message": "Logged in successfully"})
@@ -106,6 +203,54 @@ class LogInView(MethodView):
         return jsonify({"error": error}), 400
 
 
+class TokenView(MethodView):
+    """이메일/비밀번호를 확인하고 bearer 토큰을 발급하는 뷰."""
+
+    @rate_limit("LOGIN_RATE_LIMIT_PER_IP", client_ip)
+    @rate_limit("LOGIN_RATE_LIMIT_PER_EMAIL", request_email)
+    def post(self):
+        email = request.json.get("email")
+        password = request.json.get("password")
+
+        route_to_email(email)
+        user = repository.get_user_by_email(email)
+
+        if user is None or not user.verify_password(password):
+            current_app.logger.error(f"Token request failed for user {email}")
+
+            return jsonify({"error": "Incorrect e-mail or password."}), 400
+
+        ttl = current_app.config.get("AUTH_TOKEN_TTL", 3600)
+        token = issue_token(
+            current_app.config["SECRET_KEY"],
+            user.id,
+            ttl,
+            tenant=current_tenant_key(),
+            shard=current_shard(),
+        )
+        current_app.logger.info(f"Issued bearer token for user {email}")
+
+        return jsonify(
+            {"access_token": token, "token_type": "Bearer", "expires_in": ttl}
+        )
+
+
+class TokenRevokeView(MethodView):
+    decorators = [login_required]
+
+    def post(self):
+        if g.token is None:
+            return jsonify({"error": "Bearer token is required."}), 400
+
+        revoked_tokens.revoke(g.token["jti"], g.token["uid"], g.token["exp"])
+        db.session.commit()
+        current_app.logger.info(
+            f"Revoked bearer token for user id {g.token['uid']}"
+        )
+
+        return jsonify({"message": "Token revoked successfully"})
+
+
 class LogOutView(MethodView):
     decorators = [login_required]
 
@@ -119,3 +264,7 @@ class LogOutView(MethodView):
 bp.add_url_rule("/create", view_func=UserCreateView.as_view("create_user"))
 bp.add_url_rule("/login", view_func=LogInView.as_view("login"))
 bp.add_url_rule("/logout", view_func=LogOutView.as_view("logout"))
+bp.add_url_rule("/token", view_func=TokenView.as_view("token"))
+bp.add_url_rule(
+    "/token/revoke", view_func=TokenRevokeView.as_view("token_revoke")
+)
@@ -1,9 +1,14 @@
 from flask import Blueprint, jsonify, request, g, current_app
 from flask.views import MethodView
 
-from app import db
+from app import db, repository
+from app.card_number import get_issuer, validate_card_number
+from app.card_state import CardStateError
 from app.models import Card, Account
-from app.card_state import Disabled, Enabled
+from app.money import Money, MoneyError
+from app.outbox import emit
+from app.pubsub import publish_balance
+from app.rate_limit import rate_limit
 from app.views.auth_views import login_required
 
 bp = Blueprint("cards", __name__, url_prefix="/cards")
@@ -14,7 +19,7 @@ class CardListView(MethodView):
 
     def get(self):
         user_id = g.user.id
-        cards = Card.query.filter_by(user_id=user_id).all()
+        cards = repository.get_cards_by_user(user_id)
 
         card_list = [card.to_dict() for card in cards]
 
@@ -41,6 +46,43 @@ class CardView(MethodView):
         return jsonify(card.to_dict()), 200
 
 
+class CardLookupView(MethodView):
+    """카드 번호로 카드를 찾는 뷰 (ATM/POS 단말 조회용).
+
+    Note:
+        번호를 해시해 `card_number_hash` 인덱스를 한 번 조회하며,
+        응답에는 BIN 으로 찾은 발급사를 함께 담는다.
+    """
+
+    decorators = [login_required]
+
+    def get(self):
+        card_number = request.args.get("number")
+        error = validate_card_number(card_number)
+        if error is not None:
+            current_app.logger.error(error)
+
+            return jsonify({"error": error}), 400
+
+        card = repository.get_card_by_number(card_number)
+        if card is None:
+            error_msg = "Card not found"
+            current_app.logger.error(error_msg)
+
+            return jsonify({"error": "Card not found"}), 404
+
+        if not card.verify_owner(g.user):
+            error_msg = "Not authorized"
+            current_app.logger.error(error_msg)
+
+            return jsonify({"error": "Not authorized"}), 403
+
+        return (
+            jsonify(dict(card.to_dict(), issuer=get_issuer(card_number))),
+            200,
+        )
+
+
 class EnableCardView(MethodView):
     decorators = [login_required]
 
@@ -58,13 +100,25 @@ class EnableCardView(MethodView):
 
             return jsonify({"error": "Not authorized"}), 403
 
-        if isinstance(card.state, Enabled):
-            warning_msg = "The card is already enabled"
-            current_app.logger.warning(warning_msg)
+        try:
+            changed = card.enable()
+        except CardStateError as e:
+            current_app.logger.error(str(e))
+
+            return jsonify({"error": str(e)}), 409
 
-            return jsonify({"error": warning_msg}), 400
+        if not changed:
+            current_app.logger.warning("The card is already enabled")
 
-        card.enable()
+            return jsonify(card.to_dict()), 200
+
+        emit(
+            "card.state_changed",
+            card.id,
+            card.user_id,
+            account_id=card.account_id,
+            state=card.state.value.lower(),
+        )
         db.session.commit()
 
         current_app.logger.info("The card is successfully enabled")
@@ -89,13 +143,25 @@ class DisableCardView(MethodView):
 
             return jsonify({"error": "Not authorized"}), 403
 
-        if isinstance(card.state, Disabled):
-            warning_msg = "The card is already disabled"
-            current_app.logger.warning(warning_msg)
+        try:
+            changed = card.disable()
+        except CardStateError as e:
+            current_app.logger.error(str(e))
+
+            return jsonify({"error": str(e)}), 409
 
-            return jsonify({"warning": warning_msg}), 400
+        if not changed:
+            current_app.logger.warning("The card is already disabled")
 
-        card.disable()
+            return jsonify(card.to_dict()), 200
+
+        emit(
+            "card.state_changed",
+            card.id,
+            card.user_id,
+            account_id=card.account_id,
+            state=card.state.value.lower(),
+        )
         db.session.commit()
 
         current_app.logger.info("The card is successfully disabled")
@@ -103,9 +169,16 @@ class DisableCardView(MethodView):
         return jsonify(card.to_dict()), 200
 
 
+def withdraw_card_key(card_id):
+    # 카드 주인 확인 전에 세므로, 다른 사용자의 요청이 주인의 한도를 쓰지
+    # 않도록 사용자별로 따로 센다.
+    return (g.user.id, card_id)
+
+
 class WithdrawView(MethodView):
     decorators = [login_required]
 
+    @rate_limit("WITHDRAW_RATE_LIMIT_PER_CARD", withdraw_card_key)
     def post(self, card_id):
         card = db.session.get(Card, card_id)
         if card is None:
@@ -129,7 +202,6 @@ class WithdrawView(MethodView):
 
             return jsonify(error=error_msg), 404
 
-        amount = request.json.get("amount")
         account_password = request.json.get("account_password")
 
         if not account.verify_password(account_password):
@@ -138,12 +210,23 @@ class WithdrawView(MethodView):
 
             return jsonify({"error": error_msg}), 401
 
-        # TODO@Ando: 일정 금액 이상 인출 시, 알림 이용하기. (알림 시스템 구축)
-        is_successful, message = card.withdraw(account, amount)
+        try:
+            amount = Money.from_request(
+                request.json.get("amount"), request.json.get("currency")
+            )
+            # TODO@Ando: 일정 금액 이상 인출 시, 알림 이용하기. (알림 시스템 구축)
+            is_successful, message = card.withdraw(account, amount)
+        except MoneyError as e:
+            db.session.rollback()
+            current_app.logger.error(str(e))
+
+            return jsonify({"error": str(e)}), 400
+
         db.session.commit()
 
-        balance = card.account.balance
+        balance = account.get_balance(amount.currency).amount
         if is_successful:
+            publish_balance(account, amount.currency)
             current_app.logger.info(f"{message}, now balance: {balance}")
         else:
             current_app.logger.warning(f"{message}, now balance: {balance}")
@@ -154,6 +237,7 @@ class WithdrawView(MethodView):
                     "message": message,
                     "card": card.to_dict(),
                     "balance": balance,
+                    "currency": amount.currency,
                 }
             ),
             200,
@@ -186,12 +270,26 @@ class DepositView(MethodView):
 
             return jsonify(error=error_msg), 404
 
-        amount = request.json.get("amount")
+        try:
+            amount = Money.from_request(
+                request.json.get("amount"), request.json.get("currency")
+            )
+        except MoneyError as e:
+            current_app.logger.error(str(e))
+
+            return jsonify({"error": str(e)}), 400
+
+        is_successful, message = card.deposit(account, amount)
+        if not is_successful:
+            db.session.rollback()
+            current_app.logger.warning(message)
+
+            return jsonify({"error": message}), 400
 
-        message = card.deposit(account, amount)
         db.session.commit()
+        publish_balance(account, amount.currency)
 
-        balance = card.account.balance
+        balance = account.get_balance(amount.currency).amount
         current_app.logger.info(f"{message}, now balance: {balance}")
 
         return (
@@ -200,6 +298,7 @@ class DepositView(MethodView):
                     "message": message,
                     "card": card.to_dict(),
                     "balance": balance,
+                    "currency": amount.currency,
                 }
             ),
             200,
@@ -228,10 +327,16 @@ class BalanceView(MethodView):
             f"Balance check successful, now balance: {balance}"
         )
 
-        return jsonify({"balance": balance}), 200
+        return (
+            jsonify(
+                {"balance": balance, "balances": card.account.get_balances()}
+            ),
+            200,
+        )
 
 
 bp.add_url_rule("/", view_func=CardListView.as_view("card"))
+bp.add_url_rule("/lookup", view_func=CardLookupView.as_view("card_lookup"))
 bp.add_url_rule("/<int:card_id>", view_func=CardView.as_view("card_detail"))
 bp.add_url_rule(
     "/<int:card_id>/enable", view_func=EnableCardView.as_view("enable_card")
@@ -0,0 +1,118 @@
+import hmac
+import json
+from functools import wraps
+
+from flask import (
+    Blueprint,
+    Response,
+    current_app,
+    jsonify,
+    request,
+    stream_with_context,
+)
+from flask.views import MethodView
+
+from app import db
+from app.outbox import read_events
+from app.sharding import shard_count, use_shard
+
+bp = Blueprint("events", __name__, url_prefix="/events")
+
+
+def api_key_required(view):
+    """`X-API-Key` 헤더가 `EVENTS_API_KEY` 설정과 같은 요청만 허용하는 데코레이터.
+
+    Note:
+        이벤트는 모든 사용자의 변경을 담으므로 로그인 세션이 아니라
+        내부 소비자(이상 거래 탐지, 분석)용 키로만 읽을 수 있다.
+    """
+
+    @wraps(view)
+    def wrapped_view(**kwargs):
+        api_key = current_app.config.get("EVENTS_API_KEY")
+        given = request.headers.get("X-API-Key", "")
+
+        if not api_key or not hmac.compare_digest(given, api_key):
+            current_app.logger.error("Invalid events API key")
+
+            return jsonify({"error": "Not authorized"}), 403
+
+        return view(**kwargs)
+
+    return wrapped_view
+
+
+def format_sse(event):
+    return (
+        f"id: {event.id}\n"
+        f"event: {event.type}\n"
+        f"data: {json.dumps(event.to_dict(), ensure_ascii=False)}\n\n"
+    )
+
+
+class EventListView(MethodView):
+    """outbox 이벤트를 offset 순서로 읽는 뷰.
+
+    Note:
+        - JSON: `?after=<offset>&limit=<n>&wait=<초>` 로 long-poll 한다.
+          응답의 `next` 를 다음 요청의 after 로 넘기면 된다.
+        - `Accept: text/event-stream`: SSE 로 계속 내보낸다. 다시 연결할 때는
+          `Last-Event-ID` 헤더의 offset 부터 이어서 읽는다.
+        - 여러 shard 로 나눈 경우 outbox 와 offset 은 shard 마다 따로 있으므로
+          `?shard=<번호>` 로 shard 별로 읽는다 (기본 0).
+    """
+
+    decorators = [api_key_required]
+
+    def get(self):
+        shard = request.args.get("shard", 0, type=int)
+        if not 0 <= shard < shard_count():
+            current_app.logger.error(f"Unknown shard {shard}")
+
+            return jsonify({"error": "Unknown shard"}), 400
+
+        use_shard(shard)
+        after = request.args.get("after", type=int)
+        if after is None:
+            last_event_id = request.headers.get("Last-Event-ID", "")
+            after = int(last_event_id) if last_event_id.isdigit() else 0
+        limit = min(request.args.get("limit", 100, type=int), 1000)
+
+        if request.accept_mimetypes.best == "text/event-stream":
+            return self.stream(after, limit)
+
+        wait = min(request.args.get("wait", 0, type=float), 30)
+        events, next_offset = read_events(after, limit, timeout=wait)
+
+        return (
+            jsonify(
+                {
+                    "events": [event.to_dict() for event in events],
+                    "next": next_offset,
+                }
+            ),
+            200,
+        )
+
+    def stream(self, after, limit):
+        keepalive = current_app.config.get("EVENTS_SSE_KEEPALIVE", 15)
+
+        def generate(after):
+            while True:
+                events, after = read_events(after, limit, timeout=keepalive)
+                if not events:
+                    yield ": keep-alive\n\n"
+                    continue
+
+                for event in events:
+                    yield format_sse(event)
+                db.session.rollback()
+
+        return Response(
+            stream_with_context(generate(after)),
+            mimetype="text/event-stream",
+            headers={"Cache-Control": "no-cache"},
+        )
+
+
+bp.add_url_rule("/", view_func=EventListView.as_view("event_list"))
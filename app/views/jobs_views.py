@@ -0,0 +1,87 @@
+from flask import Blueprint, jsonify, g, current_app, send_from_directory
+from flask.views import MethodView
+
+from app import db
+from app.models import Job, JobStatus
+from app.tasks import get_export_dir
+from app.views.auth_views import login_required
+
+bp = Blueprint("jobs", __name__, url_prefix="/jobs")
+
+
+class JobListView(MethodView):
+    decorators = [login_required]
+
+    def get(self):
+        user_id = g.user.id
+        jobs = (
+            Job.query.filter_by(user_id=user_id)
+            .order_by(Job.id.desc())
+            .limit(50)
+            .all()
+        )
+
+        return jsonify({"jobs": [job.to_dict() for job in jobs]}), 200
+
+
+def get_own_job(job_id):
+    """로그인한 사용자의 작업과 오류 응답(없으면 None)을 반환하는 메서드."""
+    job = db.session.get(Job, job_id)
+
+    if job is None:
+        current_app.logger.error(f"Job id {job_id} not found")
+
+        return None, (jsonify({"error": "Job not found"}), 404)
+
+    if job.user_id != g.user.id:
+        current_app.logger.error(
+            f"Not authorized for user id {g.user.id} for job id {job_id}"
+        )
+
+        return None, (jsonify({"error": "Not authorized"}), 403)
+
+    return job, None
+
+
+class JobView(MethodView):
+    decorators = [login_required]
+
+    def get(self, job_id):
+        job, error = get_own_job(job_id)
+        if error is not None:
+            return error
+
+        return jsonify(job.to_dict()), 200
+
+
+class JobDownloadView(MethodView):
+    """끝난 작업이 만든 파일(예: 데이터 내보내기)을 내려받는 뷰.
+
+    Note:
+        파일은 EXPORT_DIR 에서 작업 결과의 파일 이름으로 찾는다. 워커와 웹
+        서버가 다른 호스트이면 EXPORT_DIR 은 함께 쓰는 저장소여야 한다.
+    """
+
+    decorators = [login_required]
+
+    def get(self, job_id):
+        job, error = get_own_job(job_id)
+        if error is not None:
+            return error
+
+        file_name = (job.result or {}).get("file")
+        if job.status != JobStatus.DONE or file_name is None:
+            current_app.logger.error(f"Job id {job_id} has no file")
+
+            return jsonify({"error": "Job has no file"}), 404
+
+        return send_from_directory(
+            get_export_dir(), file_name, as_attachment=True
+        )
+
+
+bp.add_url_rule("/", view_func=JobListView.as_view("job_list"))
+bp.add_url_rule("/<int:job_id>", view_func=JobView.as_view("job_detail"))
+bp.add_url_rule(
+    "/<int:job_id>/download", view_func=JobDownloadView.as_view("job_download")
+)
@@ -1,8 +1,14 @@
 from flask import Blueprint, jsonify, request, g, current_app
 from flask.views import MethodView
+from sqlalchemy.orm.exc import StaleDataError
 
 from app import db
-from app.models import User
+from app.directory import release_user
+from app.etags import conflict, if_match_failed, with_etag
+from app.jobs import enqueue
+from app.models import User, Card, CardStatus
+from app.outbox import emit
+from app.tokens import revoked_tokens
 from app.views.auth_views import login_required
 
 bp = Blueprint("users", __name__, url_prefix="/users")
@@ -17,12 +23,15 @@ class MeView(MethodView):
 
         current_app.logger.info(f"Fetched user info for id {user_id}")
 
-        return jsonify(user.to_dict()), 200
+        return with_etag(jsonify(user.to_dict()), user.version), 200
 
     def put(self):
         user_id = g.user.id
         user = db.session.get(User, user_id)
 
+        if if_match_failed(user.version):
+            return conflict(user.version)
+
         username = request.json.get("name", None)
         current_password = request.json.get("current_password", None)
         new_password = request.json.get("new_password", None)
@@ -49,23 +58,100 @@ class MeView(MethodView):
 
             user.password = new_password
 
-        db.session.commit()
+        emit(
+            "user.updated",
+            user_id,
+            user_id,
+            name_changed=bool(username),
+            password_changed=bool(new_password),
+        )
+        try:
+            db.session.commit()
+        except StaleDataError:
+            db.session.rollback()
+
+            return conflict()
+
         current_app.logger.info(
             f"User info updated successfully for user id {user_id}"
         )
 
-        return jsonify(user.to_dict()), 200
+        return with_etag(jsonify(user.to_dict()), user.version), 200
 
     def delete(self):
         user_id = g.user.id
         user = User.query.get(user_id)
 
         db.session.delete(user)
+        emit("user.deleted", user_id, user_id)
+        revoked_tokens.revoke_user(
+            user_id, current_app.config.get("AUTH_TOKEN_TTL", 3600)
+        )
         db.session.commit()
+        release_user(user_id)
 
         current_app.logger.info(f"Deleted user account for user id {user_id}")
 
         return jsonify({"message": "Account deleted successfully"}), 200
 
 
+class MyExportView(MethodView):
+    """내 계좌/카드 정보 내보내기를 백그라운드 작업으로 등록하는 뷰."""
+
+    decorators = [login_required]
+
+    def post(self):
+        user_id = g.user.id
+
+        job = enqueue("export_user_data", owner_id=user_id, user_id=user_id)
+        db.session.commit()
+
+        current_app.logger.info(
+            f"Queued data export job id {job.id} for user id {user_id}"
+        )
+
+        return jsonify({"message": "Export queued", "job": job.to_dict()}), 202
+
+
+class MyCardStateView(MethodView):
+    """로그인한 사용자의 모든 카드를 한 번에 활성화/비활성화하는 뷰."""
+
+    decorators = [login_required]
+
+    def __init__(self, state):
+        self.state = state
+
+    def put(self):
+        user_id = g.user.id
+
+        card_ids = Card.bulk_change_state(self.state, user_id=user_id)
+        for card_id in card_ids:
+            emit(
+                "card.state_changed",
+                card_id,
+                user_id,
+                state=self.state.value.lower(),
+            )
+        db.session.commit()
+
+        current_app.logger.info(
+            f"Changed {len(card_ids)} cards to {self.state.value} "
+            f"for user id {user_id}"
+        )
+
+        return (
+            jsonify({"state": self.state.value.lower(), "cards": card_ids}),
+            200,
+        )
+
+
 bp.add_url_rule("/me", view_func=MeView.as_view("me"))
+bp.add_url_rule("/me/export", view_func=MyExportView.as_view("my_export"))
+bp.add_url_rule(
+    "/me/cards/enable",
+    view_func=MyCardStateView.as_view("my_cards_enable", CardStatus.ENABLED),
+)
+bp.add_url_rule(
+    "/me/cards/disable",
+    view_func=MyCardStateView.as_view("my_cards_disable", CardStatus.DISABLED),
+)
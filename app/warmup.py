@@ -0,0 +1,97 @@
+from flask import current_app
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import configure_mappers
+
+from app import db, repository
+from app.card_state import CardStatus, get_card_state
+from app.existence import open_filters
+from app.models import User, Account, Card
+
+
+def open_connections(count):
+    """커넥션 풀에 count 개의 커넥션을 미리 열어 두는 메서드."""
+    connections = []
+    try:
+        for _ in range(count):
+            connections.append(db.engine.connect())
+    finally:
+        for connection in connections:
+            connection.close()
+
+    return len(connections)
+
+
+def run_hot_queries():
+    """views 에서 요청마다 실행하는 조회를 한 번씩 실행해 컴파일 캐시를 채우는 메서드.
+
+    Note:
+        존재하지 않는 id 로 조회하므로 결과는 없지만, 문장 컴파일 결과가
+        SQLAlchemy 의 compiled cache 에 남는다. 관계 로더는 실제 행이 있어야
+        실행되므로 카드가 하나라도 있으면 그 카드로 한 번씩 불러 본다.
+    """
+    db.session.get(User, 0)
+    db.session.get(Account, 0)
+    db.session.get(Card, 0)
+    repository.get_user_by_email("")
+    repository.get_accounts_by_user(0)
+    repository.get_cards_by_user(0)
+    repository.get_cards_by_user_and_account(0, 0)
+    repository.get_account_card(0, 0)
+    repository.get_card_by_number("")
+
+    card = Card.query.first()
+    if card is not None:
+        card.user.accounts
+        card.user.cards
+        card.account.cards
+
+    db.session.rollback()
+
+
+def warmup(app):
+    """워커가 요청을 받기 전에 커넥션, 컴파일 캐시, 카드 상태 객체를 준비하는 메서드.
+
+    Note:
+        `WARMUP_ON_START` 가 켜져 있으면 create_app 에서 호출되고, gunicorn 을
+        `preload_app` 으로 띄우는 경우에는 `post_fork` 에서 워커마다 호출한다.
+        열어 둘 커넥션 수는 `WARMUP_CONNECTIONS` 설정을 따른다.
+        존재 확인 filter(`app.existence`)도 이때 열거나 만든다.
+    """
+    configure_mappers()
+    for status in CardStatus:
+        get_card_state(status)
+
+    with app.app_context():
+        try:
+            opened = open_connections(app.config.get("WARMUP_CONNECTIONS", 1))
+            run_hot_queries()
+            filters = open_filters()
+        except SQLAlchemyError as e:
+            # 마이그레이션 전처럼 테이블이 없을 때도 app 은 떠야 한다.
+            current_app.logger.warning(f"Warmup skipped: {e}")
+            return
+        finally:
+            db.session.remove()
+
+        current_app.logger.info(
+            f"Warmed up with {opened} pooled connections "
+            f"and {filters} existence filters"
+        )
+
+
+def post_fork(server, worker):
+    """gunicorn `post_fork` 훅.
+
+    Note:
+        fork 전에 부모 프로세스가 연 커넥션은 워커끼리 공유하면 안 되므로
+        풀을 버리고(닫지는 않음) 워커 자신의 커넥션으로 다시 준비한다.
+
+    Examples:
+        # gunicorn.conf.py
+        from app.warmup import post_fork
+    """
+    app = worker.app.wsgi()
+    with app.app_context():
+        db.engine.dispose(close=False)
+
+    warmup(app)
@@ -0,0 +1,99 @@
+"""ORM Query 로 매번 조립하는 조회와 app.repository 의 미리 만든 문장 조회의
+조회 1회당 Python 오버헤드를 비교하는 마이크로벤치마크.
+
+인메모리 SQLite 를 사용하므로 측정값의 대부분은 문장 조립, 캐시 키 계산,
+ORM 결과 처리 같은 Python 쪽 비용이다.
+
+Usage:
+    python -m benchmarks.lookup_overhead [반복 횟수]
+"""
+
+import sys
+import time
+
+from app import db, create_core_app, repository
+from app.card_number import hash_card_number
+from app.models import User, Account, Card
+
+
+def measure(func, iterations, repeat=5):
+    func()
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(iterations):
+            func()
+        timings.append(time.perf_counter() - started)
+
+    return min(timings) / iterations * 1_000_000
+
+
+def main(iterations=2000):
+    app = create_core_app(
+        {
+            "SQLALCHEMY_DATABASE_URI": "sqlite://",
+            "SECRET_KEY": "bench_secret_key",
+            "SQLALCHEMY_TRACK_MODIFICATIONS": False,
+            "BANK_ID": "555511",
+        }
+    )
+    with app.app_context():
+        db.create_all()
+        user = User(name="bench", email="bench@example.com", password="pw")
+        db.session.add(user)
+        db.session.commit()
+        account = Account(
+            user_id=user.id,
+            name="bench",
+            password="pw",
+            account_number="5555110000000",
+        )
+        db.session.add(account)
+        db.session.commit()
+        card = Card(
+            user_id=user.id,
+            account_id=account.id,
+            card_number="0000000000000000",
+        )
+        db.session.add(card)
+        db.session.commit()
+        user_id, account_id, card_id = user.id, account.id, card.id
+
+        lookups = {
+            "user by email": (
+                lambda: User.query.filter_by(
+                    email="bench@example.com"
+                ).first(),
+                lambda: repository.get_user_by_email("bench@example.com"),
+            ),
+            "card by id and account": (
+                lambda: Card.query.filter_by(
+                    id=card_id, account_id=account_id
+                ).first(),
+                lambda: repository.get_account_card(account_id, card_id),
+            ),
+            "card by number": (
+                lambda: Card.query.filter_by(
+                    card_number_hash=hash_card_number("0000000000000000")
+                ).first(),
+                lambda: repository.get_card_by_number("0000000000000000"),
+            ),
+            "cards by user and account": (
+                lambda: Card.query.filter_by(
+                    user_id=user_id, account_id=account_id
+                ).all(),
+                lambda: repository.get_cards_by_user_and_account(
+                    user_id, account_id
+                ),
+            ),
+        }
+
+        print(f"{'lookup':<28}{'query':>12}{'repository':>14}")
+        for name, (query, repo) in lookups.items():
+            query_us = measure(query, iterations)
+            repo_us = measure(repo, iterations)
+            print(f"{name:<28}{query_us:>9.1f} us{repo_us:>11.1f} us")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:2]))
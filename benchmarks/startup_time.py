@@ -0,0 +1,79 @@
+"""create_core_app 과 create_app 의 콜드 스타트 비용을 비교하는 벤치마크.
+
+`python -X importtime` 으로 새 인터프리터에서 app 을 만들고, import 에 걸린 시간과
+전체 실행 시간, 가장 무거운 최상위 패키지를 출력한다.
+
+Usage:
+    python -m benchmarks.startup_time [반복 횟수]
+"""
+
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCRIPT = """
+from app import {factory}
+{factory}({{
+    "SQLALCHEMY_DATABASE_URI": "sqlite://",
+    "SECRET_KEY": "bench_secret_key",
+    "SQLALCHEMY_TRACK_MODIFICATIONS": False,
+    "BANK_ID": "555511",
+}})
+"""
+
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def run(factory):
+    started = time.perf_counter()
+    completed = subprocess.run(
+        [
+            sys.executable,
+            "-X",
+            "importtime",
+            "-c",
+            SCRIPT.format(factory=factory),
+        ],
+        cwd=ROOT_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    elapsed = time.perf_counter() - started
+
+    self_total = 0
+    top_level = {}
+    for line in completed.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match is None:
+            continue
+        self_us, cumulative_us, indent, name = match.groups()
+        self_total += int(self_us)
+        if len(indent) == 1:
+            package = name.split(".")[0]
+            top_level[package] = top_level.get(package, 0) + int(cumulative_us)
+
+    return elapsed * 1000, self_total / 1000, top_level
+
+
+def main(repeat=5):
+    for factory in ("create_core_app", "create_app"):
+        results = [run(factory) for _ in range(repeat)]
+        wall = statistics.median(result[0] for result in results)
+        imports = statistics.median(result[1] for result in results)
+        heaviest = sorted(
+            results[-1][2].items(), key=lambda item: item[1], reverse=True
+        )[:5]
+
+        print(f"{factory}: {wall:.1f} ms wall, {imports:.1f} ms imports")
+        for package, cumulative_us in heaviest:
+            print(f"    {package:<20} {cumulative_us / 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:2]))
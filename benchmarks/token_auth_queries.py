@@ -0,0 +1,102 @@
+"""세션 인증과 bearer 토큰 인증의 요청당 DB 쿼리 수를 비교하는 벤치마크.
+
+Usage:
+    python -m benchmarks.token_auth_queries [요청 수]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+from sqlalchemy import event
+
+from app import db, create_app
+from app.models import User, Account, Card
+
+
+def count_queries(engine, client, url, headers, requests):
+    queries = 0
+
+    def before_cursor_execute(*args):
+        nonlocal queries
+        queries += 1
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    started = time.perf_counter()
+    for _ in range(requests):
+        response = client.get(url, headers=headers)
+        assert response.status_code == 200, response.get_json()
+    elapsed = time.perf_counter() - started
+    event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+    return queries / requests, elapsed / requests * 1000
+
+
+def main(requests=200):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        app = create_app(
+            {
+                "SQLALCHEMY_DATABASE_URI": "sqlite:///{}".format(
+                    os.path.join(tmp_dir, "bench.db")
+                ),
+                "SECRET_KEY": "bench_secret_key",
+                "SQLALCHEMY_TRACK_MODIFICATIONS": False,
+                "BANK_ID": "555511",
+            }
+        )
+        with app.app_context():
+            db.create_all()
+            user = User(name="bench", email="bench@example.com", password="pw")
+            db.session.add(user)
+            db.session.commit()
+            account = Account(
+                user_id=user.id,
+                name="bench",
+                password="pw",
+                account_number="5555110000000",
+            )
+            db.session.add(account)
+            db.session.commit()
+            card = Card(
+                user_id=user.id,
+                account_id=account.id,
+                card_number="0000000000000000",
+            )
+            db.session.add(card)
+            db.session.commit()
+            engine = db.engine
+            url = f"/cards/{card.id}/balance"
+            credentials = {"email": "bench@example.com", "password": "pw"}
+
+        session_client = app.test_client()
+        session_client.post("/auth/login", json=credentials)
+
+        token_client = app.test_client()
+        token = token_client.post("/auth/token", json=credentials).get_json()[
+            "access_token"
+        ]
+
+        # 요청마다 새 app context(=새 세션)가 만들어지는 실제 서버와 같은 조건으로 잰다.
+        results = {
+            "session": count_queries(
+                engine, session_client, url, {}, requests
+            ),
+            "bearer": count_queries(
+                engine,
+                token_client,
+                url,
+                {"Authorization": f"Bearer {token}"},
+                requests,
+            ),
+        }
+
+    print(f"GET {url} x {requests}")
+    for mode, (queries, latency) in results.items():
+        print(
+            f"{mode:>8}: {queries:.2f} queries/request, {latency:.3f} ms/request"
+        )
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:2]))
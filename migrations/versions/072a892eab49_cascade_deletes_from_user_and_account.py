@@ -0,0 +1,47 @@
+"""cascade deletes from user and account
+
+Revision ID: 072a892eab49
+Revises: a3410f09440c
+Create Date: 2026-10-19 16:22:05.317362
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '072a892eab49'
+down_revision = 'a3410f09440c'
+branch_labels = None
+depends_on = None
+
+# The initial schema created unnamed foreign keys. This convention matches
+# PostgreSQL's default names and lets batch mode name the reflected SQLite
+# constraints so they can be dropped.
+naming_convention = {"fk": "%(table_name)s_%(column_0_name)s_fkey"}
+
+foreign_keys = [
+    ('account', 'user_id', 'user'),
+    ('card', 'user_id', 'user'),
+    ('card', 'account_id', 'account'),
+]
+
+
+def _replace_foreign_keys(ondelete):
+    for table, column, referred in foreign_keys:
+        with op.batch_alter_table(
+            table, schema=None, naming_convention=naming_convention
+        ) as batch_op:
+            name = f'{table}_{column}_fkey'
+            batch_op.drop_constraint(name, type_='foreignkey')
+            batch_op.create_foreign_key(
+                name, referred, [column], ['id'], ondelete=ondelete
+            )
+
+
+def upgrade():
+    _replace_foreign_keys('CASCADE')
+
+
+def downgrade():
+    _replace_foreign_keys(None)
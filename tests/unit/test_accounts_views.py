@@ -1,10 +1,13 @@
+import json
 import os
+from datetime import datetime
 import pytest
 import random
 from unittest import mock
 
 from app import db, create_app
-from app.models import User, Account, Card
+from app.card_number import hash_card_number, luhn_check_digit
+from app.models import User, Account, Card, CardStatus, StandingOrder
 
 
 @pytest.fixture
@@ -13,7 +16,7 @@ def app():
         "SQLALCHEMY_DATABASE_URI": "sqlite:///{}".format(
             os.path.join(os.path.dirname(__file__), "test.db")
         ),
-        "SECRET_KEY": "test_secret_key",
+        "SECRET_KEY": "test_secret_key_0123456789",
         "SQLALCHEMY_TRACK_MODIFICATIONS": False,
         "BANK_ID": "555511",
     }
@@ -65,7 +68,8 @@ def create_test_account(user_id):
 
 
 def create_test_card(user_id, account_id):
-    card_number = "".join(random.choice("0123456789") for _ in range(16))
+    card_number = "".join(random.choice("0123456789") for _ in range(15))
+    card_number += luhn_check_digit(card_number)
     card = Card(user_id=user_id, account_id=account_id, card_number=card_number)
     db.session.add(card)
     db.session.commit()
@@ -130,12 +134,16 @@ def test_register_card_to_account(client):
 
     response = client.post(
         f"/accounts/{account.id}/cards",
-        json={"card_number": "1234567890123456"},
+        json={"card_number": "1234567890123452"},
     )
     assert response.status_code == 201
     assert "card" in response.json
     assert response.json["card"]["account_id"] == account.id
-    assert response.json["card"]["card_number"] == "1234567890123456"
+    # 카드 번호는 마지막 4자리만 보여 주고 평문은 저장하지 않는다.
+    assert response.json["card"]["card_number"] == "************3452"
+    card = db.session.get(Card, response.json["card"]["id"])
+    assert card.card_last4 == "3452"
+    assert card.card_number_hash == hash_card_number("1234567890123452")
 
 
 @mock.patch("app.views.auth_views.current_app.logger")
@@ -145,15 +153,366 @@ def test_register_card_to_account_view_already_registered_card_number(
     user = create_test_user()
     login(client, user.email, "password123")
     account = create_test_account(user.id)
-    card = create_test_card(user.id, account.id)
+    db.session.add(
+        Card(
+            user_id=user.id,
+            account_id=account.id,
+            card_number="4111111111111111",
+        )
+    )
+    db.session.commit()
 
     response = client.post(
         f"/accounts/{account.id}/cards",
-        json={"card_number": card.card_number},
+        json={"card_number": "4111111111111111"},
     )
     assert response.status_code == 400
     assert "error" in response.json
     assert (
         response.json["error"]
-        == f"A card with number '{card.card_number}' is already registered."
+        == "A card with number '************1111' is already registered."
+    )
+
+
+@mock.patch("app.views.accounts_views.current_app.logger")
+def test_register_card_to_account_invalid_check_digit(mock_logging, client):
+    user = create_test_user()
+    login(client, user.email, "password123")
+    account = create_test_account(user.id)
+
+    response = client.post(
+        f"/accounts/{account.id}/cards",
+        json={"card_number": "1234567890123456"},
+    )
+    assert response.status_code == 400
+    assert response.json["error"] == "Card number is invalid."
+
+
+def test_register_card_to_missing_or_other_account(client):
+    user = create_test_user()
+    account = create_test_account(user.id)
+
+    other_user = User(
+        name="otheruser", email="otheruser@example.com", password="password123"
+    )
+    db.session.add(other_user)
+    db.session.commit()
+
+    login(client, other_user.email, "password123")
+    response = client.post(
+        f"/accounts/{account.id}/cards",
+        json={"card_number": "1234567890123452"},
+    )
+    assert response.status_code == 403
+    assert response.json["error"] == "Not authorized"
+
+    response = client.post(
+        f"/accounts/{account.id + 100}/cards",
+        json={"card_number": "1234567890123452"},
+    )
+    assert response.status_code == 404
+    assert response.json["error"] == "Account not found"
+    assert Card.query.count() == 0
+
+
+def test_register_cards_in_bulk(client):
+    user = create_test_user()
+    login(client, user.email, "password123")
+    account = create_test_account(user.id)
+    db.session.add(
+        Card(
+            user_id=user.id,
+            account_id=account.id,
+            card_number="4111111111111111",
+        )
+    )
+    db.session.commit()
+
+    response = client.post(
+        f"/accounts/{account.id}/cards/bulk",
+        json={
+            "card_numbers": [
+                "1111222233334444",
+                "4111111111111111",
+                "1111222233334444",
+                "1234",
+                "5555666677778884",
+            ]
+        },
+    )
+    assert response.status_code == 201
+    assert [c["card_number"] for c in response.json["cards"]] == [
+        "************4444",
+        "************8884",
+    ]
+    assert response.json["collisions"] == ["************1111"]
+    assert response.json["invalid"] == ["1234"]
+
+    cards = Card.query.filter_by(account_id=account.id).all()
+    assert len(cards) == 3
+    assert all(c.state == CardStatus.DISABLED for c in cards)
+
+
+@mock.patch("app.views.accounts_views.current_app.logger")
+def test_register_cards_in_bulk_over_limit(mock_logging, app, client):
+    app.config["BULK_CARD_REGISTRATION_LIMIT"] = 1
+    user = create_test_user()
+    login(client, user.email, "password123")
+    account = create_test_account(user.id)
+
+    response = client.post(
+        f"/accounts/{account.id}/cards/bulk",
+        json={"card_numbers": ["1111222233334444", "5555666677778884"]},
+    )
+    assert response.status_code == 400
+    assert (
+        response.json["error"] == "At most 1 cards can be registered at once."
+    )
+    assert Card.query.count() == 0
+
+
+def test_disable_all_cards_of_account(client):
+    user = create_test_user()
+    login(client, user.email, "password123")
+    account = create_test_account(user.id)
+    other_account = create_test_account(user.id)
+    card1 = create_test_card(user.id, account.id)
+    card2 = create_test_card(user.id, account.id)
+    card3 = create_test_card(user.id, other_account.id)
+    card1.enable()
+    card2.enable()
+    card3.enable()
+    db.session.commit()
+
+    response = client.put(f"/accounts/{account.id}/cards/disable")
+    assert response.status_code == 200
+    assert response.json["state"] == "disabled"
+    assert response.json["cards"] == sorted([card1.id, card2.id])
+
+    db.session.expire_all()
+    assert card1.state == CardStatus.DISABLED
+    assert card2.state == CardStatus.DISABLED
+    assert card3.state == CardStatus.ENABLED
+
+    response = client.put(f"/accounts/{account.id}/cards/disable")
+    assert response.json["cards"] == []
+
+
+def test_enable_all_cards_skips_expired_and_frozen_cards(client):
+    user = create_test_user()
+    login(client, user.email, "password123")
+    account = create_test_account(user.id)
+    disabled = create_test_card(user.id, account.id)
+    expired = create_test_card(user.id, account.id)
+    frozen = create_test_card(user.id, account.id)
+    expired.change_state(CardStatus.EXPIRED)
+    frozen.change_state(CardStatus.FROZEN)
+    db.session.commit()
+
+    response = client.put(f"/accounts/{account.id}/cards/enable")
+    assert response.status_code == 200
+    assert response.json["cards"] == [disabled.id]
+
+    db.session.expire_all()
+    assert expired.state == CardStatus.EXPIRED
+    assert frozen.state == CardStatus.FROZEN
+
+
+def test_enable_all_cards_of_account_not_authorized(client):
+    user = create_test_user()
+    account = create_test_account(user.id)
+    create_test_card(user.id, account.id)
+
+    other_user = User(
+        name="otheruser", email="otheruser@example.com", password="password123"
+    )
+    db.session.add(other_user)
+    db.session.commit()
+
+    login(client, other_user.email, "password123")
+    response = client.put(f"/accounts/{account.id}/cards/enable")
+    assert response.status_code == 403
+    assert response.json["error"] == "Not authorized"
+
+
+def test_create_and_delete_standing_order(client):
+    user = create_test_user()
+    login(client, user.email, "password123")
+    account = create_test_account(user.id)
+    other_account = create_test_account(user.id)
+
+    response = client.post(
+        f"/accounts/{account.id}/standing-orders",
+        json={
+            "to_account_id": other_account.id,
+            "amount": 50000,
+            "interval": "monthly",
+            "start_at": "2030-01-31T09:00:00",
+        },
+    )
+    assert response.status_code == 201
+    order_id = response.json["id"]
+    assert response.json["interval"] == "monthly"
+    assert response.json["next_run_at"] == "2030-01-31T09:00:00+00:00"
+
+    response = client.get(f"/accounts/{account.id}/standing-orders")
+    assert [o["id"] for o in response.json["standing_orders"]] == [order_id]
+
+    response = client.delete(
+        f"/accounts/{account.id}/standing-orders/{order_id}"
+    )
+    assert response.status_code == 200
+    assert StandingOrder.query.count() == 0
+
+
+def test_standing_order_start_at_is_stored_in_utc(client):
+    user = create_test_user()
+    login(client, user.email, "password123")
+    account = create_test_account(user.id)
+    other_account = create_test_account(user.id)
+
+    response = client.post(
+        f"/accounts/{account.id}/standing-orders",
+        json={
+            "to_account_id": other_account.id,
+            "amount": 50000,
+            "interval": "daily",
+            "start_at": "2030-01-31T09:00:00+09:00",
+        },
+    )
+    assert response.status_code == 201
+    assert response.json["next_run_at"] == "2030-01-31T00:00:00+00:00"
+
+    db.session.expire_all()
+    order = db.session.get(StandingOrder, response.json["id"])
+    assert order.next_run_at == datetime(2030, 1, 31, 0, 0)
+
+
+@mock.patch("app.views.accounts_views.current_app.logger")
+def test_create_standing_order_invalid(mock_logging, client):
+    user = create_test_user()
+    login(client, user.email, "password123")
+    account = create_test_account(user.id)
+
+    response = client.post(
+        f"/accounts/{account.id}/standing-orders",
+        json={"to_account_id": account.id, "amount": 100},
+    )
+    assert response.status_code == 400
+    assert response.json["error"] == "Cannot transfer to the same account."
+
+    response = client.post(
+        f"/accounts/{account.id}/standing-orders",
+        json={"to_account_id": account.id, "amount": 1.5},
+    )
+    assert response.status_code == 400
+
+
+def test_balance_stream_pushes_new_balance(client):
+    user = create_test_user()
+    login(client, user.email, "password123")
+    account = create_test_account(user.id)
+    card = create_test_card(user.id, account.id)
+    card.enable()
+    db.session.commit()
+
+    response = client.get(
+        f"/accounts/{account.id}/balance/stream", buffered=False
+    )
+    assert response.mimetype == "text/event-stream"
+    stream = iter(response.response)
+    assert json.loads(next(stream).decode().split("data: ")[1]) == {
+        "account_id": account.id,
+        "currency": "KRW",
+        "balance": 0,
+    }
+
+    client.post(f"/cards/{card.id}/deposit", json={"amount": 3000})
+
+    assert json.loads(next(stream).decode().split("data: ")[1]) == {
+        "account_id": account.id,
+        "currency": "KRW",
+        "balance": 3000,
+    }
+    response.close()
+
+
+def test_account_summary_from_rollups(client):
+    user = create_test_user()
+    login(client, user.email, "password123")
+    account = create_test_account(user.id)
+    card = create_test_card(user.id, account.id)
+    card.enable()
+    db.session.commit()
+
+    client.post(f"/cards/{card.id}/deposit", json={"amount": 5000})
+    client.post(
+        f"/cards/{card.id}/withdraw",
+        json={"amount": 2000, "account_password": "password"},
+    )
+
+    response = client.get(f"/accounts/{account.id}/summary?period=month")
+    assert response.status_code == 200
+    assert response.json["totals"] == [
+        {
+            "currency": "KRW",
+            "count": 2,
+            "amount_in": 5000,
+            "amount_out": 2000,
+            "net": 3000,
+        }
+    ]
+    assert len(response.json["periods"]) == 1
+    assert response.json["cards"][0]["card_id"] == card.id
+    assert response.json["cards"][0]["count"] == 2
+
+
+@mock.patch("app.views.accounts_views.current_app.logger")
+def test_account_summary_invalid_range(mock_logging, client):
+    user = create_test_user()
+    login(client, user.email, "password123")
+    account = create_test_account(user.id)
+
+    response = client.get(
+        f"/accounts/{account.id}/summary?from=2026-02-01&to=2026-01-01"
     )
+    assert response.status_code == 400
+    assert response.json["error"] == "'from' must not be after 'to'."
+
+
+@mock.patch("app.views.accounts_views.current_app.logger")
+def test_update_account_with_stale_etag(mock_logging, client):
+    user = create_test_user()
+    login(client, user.email, "password123")
+    account = create_test_account(user.id)
+    card = create_test_card(user.id, account.id)
+    card.enable()
+    db.session.commit()
+
+    etag = client.get(f"/accounts/{account.id}").headers["ETag"]
+    assert etag == '"1"'
+
+    # 입출금은 version 을 올리지 않으므로 ETag 가 그대로이다.
+    client.post(f"/cards/{card.id}/deposit", json={"amount": 3000})
+    assert client.get(f"/accounts/{account.id}").headers["ETag"] == etag
+
+    response = client.put(
+        f"/accounts/{account.id}",
+        json={"name": "Renamed"},
+        headers={"If-Match": etag},
+    )
+    assert response.status_code == 200
+    assert response.headers["ETag"] == '"2"'
+
+    response = client.put(
+        f"/accounts/{account.id}",
+        json={"name": "Stale"},
+        headers={"If-Match": etag},
+    )
+    assert response.status_code == 409
+    assert response.headers["ETag"] == '"2"'
+
+    db.session.expire_all()
+    account = db.session.get(Account, account.id)
+    assert account.name == "Renamed"
+    assert account.balance == 3000
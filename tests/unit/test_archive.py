@@ -0,0 +1,220 @@
+import os
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import select
+
+from app import db, create_app
+from app.archive import (
+    account_number_archived,
+    archive_account_numbers,
+    archive_closed_account,
+    archive_history,
+    partition_files,
+    read_history,
+    write_partition,
+)
+from app.bloom import LEGACY_HEADER, BloomFilter, MappedBloomFilter
+from app.jobs import run_worker
+from app.models import (
+    User,
+    Account,
+    AccountHistory,
+    AccountNumber,
+    ArchivedAccountNumber,
+    ArchivedHistory,
+    Card,
+    CardStatus,
+    ClosedAccount,
+    ClosedAccountHistory,
+)
+from app.money import Money
+from app.reconcile import reconcile
+
+
+@pytest.fixture
+def app(tmp_path):
+    test_config = {
+        "SQLALCHEMY_DATABASE_URI": "sqlite:///{}".format(
+            os.path.join(os.path.dirname(__file__), "test.db")
+        ),
+        "SECRET_KEY": "test_secret_key_0123456789",
+        "SQLALCHEMY_TRACK_MODIFICATIONS": False,
+        "BANK_ID": "555511",
+        "ARCHIVE_DIR": str(tmp_path / "archive"),
+    }
+    app = create_app(test_config)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def create_account_with_card(account_number="5555110000001"):
+    user = User(
+        name="testuser", email="testuser@example.com", password="password123"
+    )
+    db.session.add(user)
+    db.session.commit()
+    account = Account(
+        user_id=user.id,
+        name="Test Account",
+        password="password",
+        account_number=account_number,
+        balance=0,
+    )
+    db.session.add_all([account, AccountNumber(number=account_number)])
+    db.session.commit()
+    card = Card(
+        user_id=user.id,
+        account_id=account.id,
+        card_number="0000000000000001",
+        state=CardStatus.ENABLED,
+    )
+    db.session.add(card)
+    db.session.commit()
+
+    return card
+
+
+def age_history(days):
+    db.session.execute(
+        AccountHistory.__table__.update().values(
+            created_at=datetime.now(timezone.utc) - timedelta(days=days)
+        )
+    )
+    db.session.commit()
+
+
+def test_bloom_filter_round_trip(tmp_path):
+    bloom = BloomFilter.for_capacity(100)
+    for i in range(100):
+        bloom.add(f"555511{i:07d}")
+    bloom.save(tmp_path / "numbers.bloom")
+
+    loaded = BloomFilter.load(tmp_path / "numbers.bloom")
+    assert loaded.count == 100
+    assert all(f"555511{i:07d}" in loaded for i in range(100))
+    false_positives = sum(f"777711{i:07d}" in loaded for i in range(1000))
+    assert false_positives < 50
+
+
+def test_bloom_filter_reads_files_without_mark(tmp_path):
+    bloom = BloomFilter.for_capacity(100)
+    bloom.add("5555110000001")
+    path = tmp_path / "numbers.bloom"
+    with open(path, "wb") as f:
+        f.write(
+            LEGACY_HEADER.pack(
+                bloom.size, bloom.hashes, bloom.count, bloom.capacity
+            )
+        )
+        f.write(bloom.bits)
+
+    loaded = BloomFilter.load(path)
+    assert loaded.mark == 0
+    assert "5555110000001" in loaded
+    with pytest.raises(ValueError):
+        MappedBloomFilter(path)
+
+
+def test_archive_history_moves_old_rows(app, tmp_path):
+    card = create_account_with_card()
+    account = card.account
+    card.deposit(account, Money(5000))
+    card.withdraw(account, Money(2000))
+    db.session.commit()
+    age_history(400)
+    card.deposit(account, Money(100))
+    db.session.commit()
+
+    before = datetime.now(timezone.utc) - timedelta(days=365)
+    assert archive_history(before, batch_size=1) == 2
+
+    assert AccountHistory.query.count() == 1
+    archived = db.session.get(ArchivedHistory, (account.id, "KRW"))
+    assert archived.count == 2
+    assert archived.amount == 3000
+    assert len(partition_files("history")) == 2
+
+    rows = read_history(account.account_number)
+    assert [row["amount"] for row in rows] == [5000, -2000]
+
+    # 원장에 남은 내역과 보관한 합계를 더하면 잔액과 같다.
+    result = reconcile(
+        tmp_path / "report.csv", tmp_path / "watermark.json", workers=1
+    )
+    assert result["mismatches"] == 0
+
+
+def test_delete_account_archives_history(app, client):
+    card = create_account_with_card()
+    account = card.account
+    card.deposit(account, Money(5000))
+    db.session.commit()
+    account_id = account.id
+    account_number = account.account_number
+
+    client.post(
+        "/auth/login",
+        json={"email": "testuser@example.com", "password": "password123"},
+    )
+    response = client.delete(f"/accounts/{account_id}")
+    assert response.status_code == 200
+
+    # 보관 파일은 요청이 아니라 워커가 쓴다.
+    assert partition_files("accounts") == []
+    assert db.session.get(ClosedAccount, 1).account_number == account_number
+
+    assert run_worker(app, concurrency=1, once=True) == 1
+    assert [row["amount"] for row in read_history(account_number)] == [5000]
+    assert len(partition_files("accounts")) == 1
+    assert db.session.execute(select(ClosedAccount)).first() is None
+    assert db.session.execute(select(ClosedAccountHistory)).first() is None
+
+    # 다시 실행한 작업은 아무것도 바꾸지 않는다.
+    assert archive_closed_account(1) == 0
+    assert len(partition_files("history")) == 1
+
+
+def test_archived_account_numbers_stay_reserved(app):
+    card = create_account_with_card()
+    db.session.delete(card.account)
+    db.session.add(AccountNumber(number="5555110000002"))
+    db.session.add(
+        Account(
+            user_id=card.user_id,
+            name="Open Account",
+            password="password",
+            account_number="5555110000002",
+        )
+    )
+    db.session.commit()
+
+    assert archive_account_numbers() == 1
+
+    assert db.session.get(AccountNumber, "5555110000001") is None
+    assert db.session.get(AccountNumber, "5555110000002") is not None
+    assert account_number_archived("5555110000001")
+    assert not account_number_archived("5555110000002")
+    assert db.session.get(ArchivedAccountNumber, "5555110000001") is not None
+
+
+def test_legacy_archived_account_numbers_are_imported(app):
+    write_partition(
+        "account_numbers", "2025-01", ("number",), [("5555110000003",)]
+    )
+    assert account_number_archived("5555110000003")
+
+    result = app.test_cli_runner().invoke(args=["archive", "run"])
+    assert "0 history rows and 1 account numbers" in result.output
+
+    assert partition_files("account_numbers") == []
+    assert db.session.get(ArchivedAccountNumber, "5555110000003") is not None
+    assert account_number_archived("5555110000003")
@@ -1,15 +1,19 @@
 import os
+import time
 import pytest
+from unittest import mock
 
 from app import db, create_app
-from app.models import User
+from app.models import TokenRevocation, User
+from app.rate_limit import token_buckets
+from app.tokens import TokenError, issue_token
 
 
 @pytest.fixture
 def app():
     test_config = {
         "SQLALCHEMY_DATABASE_URI": "sqlite:///{}".format(os.path.join(os.path.dirname(__file__), "test.db")),
-        "SECRET_KEY": "test_secret_key",
+        "SECRET_KEY": "test_secret_key_0123456789",
         "SQLALCHEMY_TRACK_MODIFICATIONS": False,
         "BANK_ID": "555511"
     }
@@ -40,6 +44,23 @@ def test_create_user(client):
     assert data["message"] == "Account created successfully"
 
 
+@mock.patch("app.views.auth_views.current_app.logger")
+def test_create_user_duplicate_email(mock_logging, client):
+    payload = {
+        "username": "testuser",
+        "email": "testuser@example.com",
+        "password": "password123",
+    }
+    assert client.post("/auth/create", json=payload).status_code == 200
+
+    response = client.post("/auth/create", json=payload)
+    assert response.status_code == 400
+    assert (
+        response.json["error"]
+        == "E-mail testuser@example.com is already registered."
+    )
+
+
 def test_login(client):
     user = User(name="testuser", email="testuser@example.com", password="password123")
     db.session.add(user)
@@ -78,4 +99,138 @@ def login(client, email, password):
     )
     assert response.status_code == 200
     assert "message" in response.json
-    assert response.json["message"] == "Logged in successfully"
\ No newline at end of file
+    assert response.json["message"] == "Logged in successfully"
+
+def test_login_rate_limited_per_email(app, client):
+    app.config["LOGIN_RATE_LIMIT_PER_EMAIL"] = (2, 60)
+    token_buckets.clear()
+    user = User(name="testuser", email="testuser@example.com", password="password123")
+    db.session.add(user)
+    db.session.commit()
+
+    for _ in range(2):
+        response = client.post(
+            "/auth/login",
+            json={"email": "testuser@example.com", "password": "wrong"},
+        )
+        assert response.status_code == 400
+
+    with mock.patch.object(User, "verify_password") as mock_verify:
+        response = client.post(
+            "/auth/login",
+            json={"email": "TestUser@Example.com", "password": "password123"},
+        )
+        mock_verify.assert_not_called()
+
+    assert response.status_code == 429
+    assert response.get_json()["error"] == "Too many requests"
+
+    response = client.post(
+        "/auth/login",
+        json={"email": "other@example.com", "password": "password123"},
+    )
+    assert response.status_code == 400
+    token_buckets.clear()
+
+
+def test_bearer_token_auth(client):
+    user = User(name="testuser", email="testuser@example.com", password="password123")
+    db.session.add(user)
+    db.session.commit()
+
+    response = client.post(
+        "/auth/token",
+        json={"email": "testuser@example.com", "password": "password123"},
+    )
+    assert response.status_code == 200
+    token = response.get_json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+
+    with mock.patch("app.views.auth_views.db.session.get") as mock_get:
+        response = client.get("/accounts/", headers=headers)
+        mock_get.assert_not_called()
+    assert response.status_code == 200
+
+    response = client.post("/auth/token/revoke", headers=headers)
+    assert response.status_code == 200
+
+    response = client.get("/accounts/", headers=headers)
+    assert response.status_code == 401
+
+    # 폐기 목록은 DB 에 있으므로 다른 워커도 같은 토큰을 거절한다.
+    revocation = TokenRevocation.query.one()
+    assert revocation.user_id == user.id
+    assert revocation.jti is not None
+
+
+def test_deleted_user_tokens_are_revoked(client):
+    user = User(
+        name="testuser", email="testuser@example.com", password="password123"
+    )
+    db.session.add(user)
+    db.session.commit()
+
+    tokens = []
+    for _ in range(2):
+        response = client.post(
+            "/auth/token",
+            json={"email": "testuser@example.com", "password": "password123"},
+        )
+        tokens.append(response.get_json()["access_token"])
+
+    response = client.delete(
+        "/users/me", headers={"Authorization": f"Bearer {tokens[0]}"}
+    )
+    assert response.status_code == 200
+
+    for token in tokens:
+        response = client.get(
+            "/accounts/", headers={"Authorization": f"Bearer {token}"}
+        )
+        assert response.status_code == 401
+
+
+@pytest.mark.parametrize("secret_key", [None, "", "short"])
+def test_app_refuses_weak_secret_key(secret_key):
+    with pytest.raises(RuntimeError):
+        create_app({"SECRET_KEY": secret_key, "BANK_ID": "555511"})
+
+    with pytest.raises(TokenError):
+        issue_token(secret_key, 1, 3600)
+
+
+def test_bearer_token_invalid_signature(client):
+    response = client.get(
+        "/accounts/", headers={"Authorization": "Bearer abc.def"}
+    )
+    assert response.status_code == 401
+    assert response.get_json()["error"] == "Invalid or expired token"
+
+
+def test_revocations_are_cached_between_refreshes(app, client):
+    user = User(
+        name="testuser", email="testuser@example.com", password="password123"
+    )
+    db.session.add(user)
+    db.session.commit()
+    response = client.post(
+        "/auth/token",
+        json={"email": "testuser@example.com", "password": "password123"},
+    )
+    token = response.get_json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    assert client.get("/accounts/", headers=headers).status_code == 200
+
+    # 다른 워커가 폐기한 토큰은 다음에 목록을 다시 읽을 때부터 거절된다.
+    db.session.add(
+        TokenRevocation(
+            user_id=user.id,
+            issued_before=int(time.time()) + 1,
+            expires_at=int(time.time()) + 3600,
+        )
+    )
+    db.session.commit()
+    assert client.get("/accounts/", headers=headers).status_code == 200
+
+    app.config["TOKEN_REVOCATION_TTL"] = 0
+    assert client.get("/accounts/", headers=headers).status_code == 401
@@ -0,0 +1,50 @@
+import pytest
+
+from app.card_number import (
+    BinTrie,
+    is_luhn_valid,
+    luhn_check_digit,
+    validate_card_number,
+)
+
+
+@pytest.mark.parametrize(
+    "number, valid",
+    [
+        ("4111111111111111", True),
+        ("5555110000000005", True),
+        ("79927398713", True),
+        ("4111111111111112", False),
+        ("1234567890123456", False),
+    ],
+)
+def test_luhn(number, valid):
+    assert is_luhn_valid(number) is valid
+
+
+def test_luhn_check_digit():
+    assert luhn_check_digit("411111111111111") == "1"
+    assert luhn_check_digit("555511000000000") == "5"
+
+
+@pytest.mark.parametrize(
+    "number, error",
+    [
+        (None, "Card number is required."),
+        ("41111111", "Card number should be 16 digits."),
+        ("41111111111111a1", "Card number should be 16 digits."),
+        ("4111111111111112", "Card number is invalid."),
+        ("4111111111111111", None),
+    ],
+)
+def test_validate_card_number(number, error):
+    assert validate_card_number(number) == error
+
+
+def test_bin_trie_longest_prefix():
+    trie = BinTrie({"4": "visa", "55": "mastercard", "555511": "bering"})
+
+    assert trie.match("4111111111111111") == "visa"
+    assert trie.match("5555110000000005") == "bering"
+    assert trie.match("5555120000000004") == "mastercard"
+    assert trie.match("1234567890123452") is None
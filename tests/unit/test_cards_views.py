@@ -1,10 +1,22 @@
 import os
+from datetime import datetime, timezone
+from decimal import Decimal
 import pytest
 import random
 from unittest import mock
 
 from app import db, create_app
-from app.models import Card, Account, User
+from app.limits import SlidingWindowCounter, velocity_counter
+from app.models import (
+    Card,
+    Account,
+    User,
+    CardStatus,
+    FxRate,
+    WithdrawalUsage,
+)
+from app.money import Money, fx_rates
+from app.rate_limit import token_buckets
 
 
 @pytest.fixture
@@ -13,7 +25,7 @@ def app():
         "SQLALCHEMY_DATABASE_URI": "sqlite:///{}".format(
             os.path.join(os.path.dirname(__file__), "test.db")
         ),
-        "SECRET_KEY": "test_secret_key",
+        "SECRET_KEY": "test_secret_key_0123456789",
         "SQLALCHEMY_TRACK_MODIFICATIONS": False,
         "BANK_ID": "555511",
     }
@@ -21,6 +33,7 @@ def app():
     with app.app_context():
         db.create_all()
         yield app
+        fx_rates.clear()
         db.session.remove()
         db.drop_all()
 
@@ -98,7 +111,37 @@ def test_get_card_detail(mock_logging, client):
     assert "id" in response.json
     assert response.json["id"] == card.id
     assert "card_number" in response.json
-    assert response.json["card_number"] == card.card_number
+    assert response.json["card_number"] == card.masked_card_number
+
+
+def test_lookup_card_by_number(app, client):
+    app.config["CARD_BINS"] = {"55": "mastercard", "555511": "bering"}
+    user = create_test_user()
+    login(client, user.email, "password123")
+    account = create_test_account(user.id)
+    card = Card(
+        user_id=user.id, account_id=account.id, card_number="5555110000000005"
+    )
+    db.session.add(card)
+    db.session.commit()
+
+    response = client.get("/cards/lookup?number=5555110000000005")
+    assert response.status_code == 200
+    assert response.json["id"] == card.id
+    assert response.json["issuer"] == "bering"
+
+
+@mock.patch("app.views.cards_views.current_app.logger")
+def test_lookup_card_by_number_not_found(mock_logging, client):
+    user = create_test_user()
+    login(client, user.email, "password123")
+
+    response = client.get("/cards/lookup?number=5555110000000005")
+    assert response.status_code == 404
+
+    response = client.get("/cards/lookup?number=5555110000000004")
+    assert response.status_code == 400
+    assert response.json["error"] == "Card number is invalid."
 
 
 @mock.patch("app.views.users_views.current_app.logger")
@@ -188,7 +231,7 @@ def test_withdraw(mock_logging, client):
     account = create_test_account(user.id)
     card = create_test_card(user.id, account.id)
     card.enable()
-    card.deposit(account, 100000)
+    card.deposit(account, Money(100000))
 
     response = client.post(
         f"/cards/{card.id}/withdraw",
@@ -202,6 +245,74 @@ def test_withdraw(mock_logging, client):
     assert response.json["balance"] == 50000
 
 
+@pytest.mark.parametrize("amount", ["50000", 500.5, -1, None])
+@mock.patch("app.views.cards_views.current_app.logger")
+def test_withdraw_invalid_amount(mock_logging, client, amount):
+    user = create_test_user()
+    login(client, user.email, "password123")
+    account = create_test_account(user.id)
+    card = create_test_card(user.id, account.id)
+    card.enable()
+    card.deposit(account, Money(100000))
+    db.session.commit()
+
+    response = client.post(
+        f"/cards/{card.id}/withdraw",
+        json={"amount": amount, "account_password": "password"},
+    )
+    assert response.status_code == 400
+    assert "error" in response.json
+    assert account.balance == 100000
+
+
+@mock.patch("app.views.cards_views.current_app.logger")
+def test_foreign_currency_balance(mock_logging, app, client):
+    app.config["CARD_DAILY_WITHDRAWAL_LIMIT"] = 20000
+    db.session.add(FxRate(currency="USD", rate=Decimal("1000")))
+    db.session.commit()
+    user = create_test_user()
+    login(client, user.email, "password123")
+    account = create_test_account(user.id)
+    card = create_test_card(user.id, account.id)
+    card.enable()
+    db.session.commit()
+
+    response = client.post(
+        f"/cards/{card.id}/deposit",
+        json={"amount": 5000, "currency": "USD"},
+    )
+    assert response.json["balance"] == 5000
+    assert response.json["currency"] == "USD"
+
+    response = client.post(
+        f"/cards/{card.id}/withdraw",
+        json={
+            "amount": 1500,
+            "currency": "USD",
+            "account_password": "password",
+        },
+    )
+    assert response.json["message"] == "Withdrawing 1500 from active card."
+    assert response.json["balance"] == 3500
+
+    # 15 USD = 15000 KRW 를 이미 인출했으므로 10 USD 더 인출하면 일일 한도 초과.
+    response = client.post(
+        f"/cards/{card.id}/withdraw",
+        json={
+            "amount": 1000,
+            "currency": "USD",
+            "account_password": "password",
+        },
+    )
+    assert (
+        response.json["message"]
+        == "FAILED: Daily card withdrawal limit exceeded."
+    )
+
+    response = client.get(f"/cards/{card.id}/balance")
+    assert response.json["balances"] == {"KRW": 0, "USD": 3500}
+
+
 @mock.patch("app.views.users_views.current_app.logger")
 def test_withdraw_insufficient_balance(mock_logging, client):
     user = create_test_user()
@@ -325,3 +436,285 @@ def test_check_balance_using_card_not_authorized(mock_logging, client):
     assert response.status_code == 403
     assert "error" in response.json
     assert response.json["error"] == "Not authorized"
+
+
+@mock.patch("app.views.users_views.current_app.logger")
+def test_enable_card_already_enabled(mock_logging, client):
+    user = create_test_user()
+    login(client, user.email, "password123")
+    account = create_test_account(user.id)
+    card = create_test_card(user.id, account.id)
+    card.enable()
+    db.session.commit()
+
+    with mock.patch.object(db.session, "commit") as mock_commit:
+        response = client.put(f"/cards/{card.id}/enable")
+        mock_commit.assert_not_called()
+
+    assert response.status_code == 200
+    assert response.json["status"] == "enabled"
+
+
+@mock.patch("app.views.cards_views.current_app.logger")
+def test_enable_expired_card_is_rejected(mock_logging, client):
+    user = create_test_user()
+    login(client, user.email, "password123")
+    account = create_test_account(user.id)
+    card = create_test_card(user.id, account.id)
+    card.change_state(CardStatus.EXPIRED)
+    db.session.commit()
+
+    response = client.put(f"/cards/{card.id}/enable")
+    assert response.status_code == 409
+    assert response.json["error"] == (
+        "Cannot change card to enabled. Card is expired."
+    )
+
+    db.session.expire_all()
+    assert card.state == CardStatus.EXPIRED
+
+
+@mock.patch("app.views.users_views.current_app.logger")
+def test_withdraw_disabled_card(mock_logging, client):
+    user = create_test_user()
+    login(client, user.email, "password123")
+    account = create_test_account(user.id)
+    card = create_test_card(user.id, account.id)
+
+    response = client.post(
+        f"/cards/{card.id}/withdraw",
+        json={"amount": 50000, "account_password": "password"},
+    )
+    assert response.status_code == 200
+    assert response.json["message"] == "Cannot withdraw. Card is blocked."
+    assert response.json["balance"] == 0
+
+
+@mock.patch("app.views.cards_views.current_app.logger")
+def test_deposit_disabled_card(mock_logging, client):
+    user = create_test_user()
+    login(client, user.email, "password123")
+    account = create_test_account(user.id)
+    card = create_test_card(user.id, account.id)
+
+    with mock.patch("app.views.cards_views.publish_balance") as mock_publish:
+        response = client.post(
+            f"/cards/{card.id}/deposit", json={"amount": 50000}
+        )
+        mock_publish.assert_not_called()
+
+    assert response.status_code == 400
+    assert response.json["error"] == "Cannot deposit. Card is blocked."
+    db.session.expire_all()
+    assert account.balance == 0
+
+
+@mock.patch("app.views.users_views.current_app.logger")
+def test_frozen_card_allows_deposit_only(mock_logging, client):
+    user = create_test_user()
+    login(client, user.email, "password123")
+    account = create_test_account(user.id)
+    card = create_test_card(user.id, account.id)
+    card.change_state(CardStatus.FROZEN)
+    db.session.commit()
+
+    response = client.post(f"/cards/{card.id}/deposit", json={"amount": 1000})
+    assert response.json["balance"] == 1000
+
+    response = client.post(
+        f"/cards/{card.id}/withdraw",
+        json={"amount": 500, "account_password": "password"},
+    )
+    assert response.json["message"] == "Cannot withdraw. Card is frozen."
+    assert response.json["balance"] == 1000
+
+
+@mock.patch("app.views.users_views.current_app.logger")
+def test_withdraw_daily_limit(mock_logging, app, client):
+    app.config["CARD_DAILY_WITHDRAWAL_LIMIT"] = 70000
+    user = create_test_user()
+    login(client, user.email, "password123")
+    account = create_test_account(user.id)
+    card = create_test_card(user.id, account.id)
+    card.enable()
+    card.deposit(account, Money(100000))
+    db.session.commit()
+
+    response = client.post(
+        f"/cards/{card.id}/withdraw",
+        json={"amount": 50000, "account_password": "password"},
+    )
+    assert response.json["balance"] == 50000
+
+    response = client.post(
+        f"/cards/{card.id}/withdraw",
+        json={"amount": 30000, "account_password": "password"},
+    )
+    assert (
+        response.json["message"]
+        == "FAILED: Daily card withdrawal limit exceeded."
+    )
+    assert response.json["balance"] == 50000
+
+    usage = db.session.get(
+        WithdrawalUsage, ("card", card.id, datetime.now(timezone.utc).date())
+    )
+    assert (usage.amount, usage.count) == (50000, 1)
+
+
+def test_recording_withdrawal_rechecks_daily_limit(app):
+    app.config["ACCOUNT_DAILY_WITHDRAWAL_LIMIT"] = 70000
+    user = create_test_user()
+    account = create_test_account(user.id)
+    card = create_test_card(user.id, account.id)
+    card.enable()
+    card.deposit(account, Money(100000))
+    today = datetime.now(timezone.utc).date()
+    # 한도 확인 뒤에 다른 요청이 먼저 인출한 경우
+    db.session.add(
+        WithdrawalUsage(
+            subject="account", subject_id=account.id, day=today, amount=60000
+        )
+    )
+    db.session.commit()
+
+    with mock.patch(
+        "app.card_state.check_withdrawal_limit", return_value=None
+    ):
+        is_successful, message = card.withdraw(account, Money(20000))
+    db.session.commit()
+
+    assert not is_successful
+    assert message == "FAILED: Daily account withdrawal limit exceeded."
+    assert account.balance == 100000
+    usage = db.session.get(WithdrawalUsage, ("card", card.id, today))
+    assert (usage.amount, usage.count) == (0, 0)
+    usage = db.session.get(WithdrawalUsage, ("account", account.id, today))
+    assert (usage.amount, usage.count) == (60000, 0)
+
+
+def test_insufficient_balance_releases_usage(app):
+    app.config["CARD_DAILY_WITHDRAWAL_LIMIT"] = 70000
+    user = create_test_user()
+    account = create_test_account(user.id)
+    card = create_test_card(user.id, account.id)
+    card.enable()
+    card.deposit(account, Money(10000))
+    db.session.commit()
+
+    is_successful, _ = card.withdraw(account, Money(20000))
+    db.session.commit()
+
+    assert not is_successful
+    usage = db.session.get(
+        WithdrawalUsage, ("card", card.id, datetime.now(timezone.utc).date())
+    )
+    assert (usage.amount, usage.count) == (0, 0)
+
+
+def test_velocity_counter_evicts_idle_keys():
+    counter = SlidingWindowCounter(
+        window_seconds=60, bucket_count=12, max_keys=2
+    )
+    counter.add("a", now=0)
+    counter.add("b", now=50)
+
+    # "a" 는 윈도우 안에 기록이 없으므로 정리되고 "b" 는 남는다.
+    assert counter.add("c", now=100) == 1
+    assert counter.count("a", now=100) == 0
+    assert counter.count("b", now=100) == 1
+    assert sorted(counter._rings) == ["b", "c"]
+
+
+@mock.patch("app.views.users_views.current_app.logger")
+def test_refused_withdrawal_records_no_usage(mock_logging, app, client):
+    app.config["WITHDRAWAL_LIMIT_PER_TRANSACTION"] = 10000
+    user = create_test_user()
+    login(client, user.email, "password123")
+    account = create_test_account(user.id)
+    card = create_test_card(user.id, account.id)
+    card.enable()
+    card.deposit(account, Money(100000))
+    db.session.commit()
+
+    response = client.post(
+        f"/cards/{card.id}/withdraw",
+        json={"amount": 50000, "account_password": "password"},
+    )
+    assert (
+        response.json["message"]
+        == "FAILED: Per-transaction withdrawal limit exceeded."
+    )
+    assert WithdrawalUsage.query.count() == 0
+
+
+@mock.patch("app.views.users_views.current_app.logger")
+def test_withdraw_velocity_limit(mock_logging, app, client):
+    app.config["CARD_WITHDRAWAL_VELOCITY_LIMIT"] = 2
+    velocity_counter.clear()
+    user = create_test_user()
+    login(client, user.email, "password123")
+    account = create_test_account(user.id)
+    card = create_test_card(user.id, account.id)
+    card.enable()
+    card.deposit(account, Money(100000))
+    db.session.commit()
+
+    for _ in range(2):
+        response = client.post(
+            f"/cards/{card.id}/withdraw",
+            json={"amount": 1000, "account_password": "password"},
+        )
+        assert response.json["balance"] < 100000
+
+    response = client.post(
+        f"/cards/{card.id}/withdraw",
+        json={"amount": 1000, "account_password": "password"},
+    )
+    assert (
+        response.json["message"]
+        == "FAILED: Too many withdrawals in a short time."
+    )
+    assert response.json["balance"] == 98000
+    velocity_counter.clear()
+
+
+@mock.patch("app.views.users_views.current_app.logger")
+def test_withdraw_rate_limit_is_per_user(mock_logging, app, client):
+    app.config["WITHDRAW_RATE_LIMIT_PER_CARD"] = (2, 60)
+    token_buckets.clear()
+    owner = create_test_user()
+    account = create_test_account(owner.id)
+    card = create_test_card(owner.id, account.id)
+    card.enable()
+    card.deposit(account, Money(100000))
+    db.session.commit()
+
+    other = User(
+        name="otheruser", email="otheruser@example.com", password="password123"
+    )
+    db.session.add(other)
+    db.session.commit()
+
+    login(client, other.email, "password123")
+    for _ in range(2):
+        response = client.post(
+            f"/cards/{card.id}/withdraw",
+            json={"amount": 1000, "account_password": "password"},
+        )
+        assert response.status_code == 403
+    response = client.post(
+        f"/cards/{card.id}/withdraw",
+        json={"amount": 1000, "account_password": "password"},
+    )
+    assert response.status_code == 429
+
+    # 다른 사용자의 시도는 카드 주인의 한도를 쓰지 않는다.
+    client.post("/auth/logout")
+    login(client, owner.email, "password123")
+    response = client.post(
+        f"/cards/{card.id}/withdraw",
+        json={"amount": 1000, "account_password": "password"},
+    )
+    assert response.status_code == 200
+    token_buckets.clear()
@@ -0,0 +1,181 @@
+import json
+import os
+from datetime import timedelta
+import pytest
+from unittest import mock
+
+from app import db, create_app
+from app.models import User, OutboxEvent, utcnow
+from app.outbox import emit, read_events, sink_to_file
+
+API_KEY = "test_events_key"
+
+
+@pytest.fixture
+def app():
+    test_config = {
+        "SQLALCHEMY_DATABASE_URI": "sqlite:///{}".format(
+            os.path.join(os.path.dirname(__file__), "test.db")
+        ),
+        "SECRET_KEY": "test_secret_key_0123456789",
+        "SQLALCHEMY_TRACK_MODIFICATIONS": False,
+        "BANK_ID": "555511",
+        "EVENTS_API_KEY": API_KEY,
+    }
+    app = create_app(test_config)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def login(client, email, password):
+    response = client.post(
+        "/auth/login",
+        json={"email": email, "password": password},
+    )
+    assert response.status_code == 200
+    assert "message" in response.json
+    assert response.json["message"] == "Logged in successfully"
+
+
+def create_test_user():
+    user = User(
+        name="testuser", email="testuser@example.com", password="password123"
+    )
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+def test_mutating_views_append_events(client):
+    user = create_test_user()
+    login(client, user.email, "password123")
+
+    response = client.post(
+        "/accounts/", json={"name": "Test Account", "password": "password"}
+    )
+    account_id = response.json["account"]["id"]
+    response = client.post(
+        f"/accounts/{account_id}/cards",
+        json={"card_number": "4111111111111111"},
+    )
+    card_id = response.json["card"]["id"]
+    client.put(f"/cards/{card_id}/enable")
+    client.post(f"/cards/{card_id}/deposit", json={"amount": 1000})
+
+    response = client.get("/events/", headers={"X-API-Key": API_KEY})
+    assert response.status_code == 200
+    events = response.json["events"]
+    assert [event["type"] for event in events] == [
+        "account.created",
+        "card.registered",
+        "card.state_changed",
+        "account.balance_changed",
+    ]
+    assert events[2]["data"] == {"account_id": account_id, "state": "enabled"}
+    assert events[3]["data"]["balance"] == 1000
+    assert response.json["next"] == events[-1]["offset"]
+
+    response = client.get(
+        f"/events/?after={response.json['next']}",
+        headers={"X-API-Key": API_KEY},
+    )
+    assert response.json["events"] == []
+
+
+@mock.patch("app.views.events_views.current_app.logger")
+def test_events_require_api_key(mock_logging, client):
+    response = client.get("/events/", headers={"X-API-Key": "wrong"})
+    assert response.status_code == 403
+
+
+def test_events_server_sent_stream(client):
+    emit("user.updated", 1, 1)
+    emit("user.updated", 2, 2)
+    db.session.commit()
+
+    response = client.get(
+        "/events/",
+        headers={
+            "X-API-Key": API_KEY,
+            "Accept": "text/event-stream",
+            "Last-Event-ID": "1",
+        },
+        buffered=False,
+    )
+    assert response.mimetype == "text/event-stream"
+    chunk = next(response.response)
+    response.close()
+
+    chunk = chunk.decode() if isinstance(chunk, bytes) else chunk
+    assert chunk.startswith("id: 2\nevent: user.updated\n")
+
+
+def test_file_sink_resumes_from_offset(app, tmp_path):
+    path = tmp_path / "events.jsonl"
+    emit("user.updated", 1, 1)
+    db.session.commit()
+
+    assert sink_to_file(str(path)) == 1
+
+    emit("user.deleted", 1, 1)
+    db.session.commit()
+
+    assert sink_to_file(str(path)) == 1
+    assert sink_to_file(str(path)) == 0
+
+    with open(path) as f:
+        lines = [json.loads(line) for line in f]
+    assert [line["type"] for line in lines] == ["user.updated", "user.deleted"]
+    assert [line["offset"] for line in lines] == [
+        event.id for event in OutboxEvent.query.order_by(OutboxEvent.id)
+    ]
+
+
+def test_events_after_uncommitted_offset_are_held_back(app):
+    # id 2 는 아직 commit 되지 않은 트랜잭션이 잡고 있다.
+    db.session.add_all(
+        [
+            OutboxEvent(id=1, type="user.updated", aggregate_id=1),
+            OutboxEvent(id=3, type="user.updated", aggregate_id=3),
+        ]
+    )
+    db.session.commit()
+
+    events, offset = read_events(0)
+    assert [event.id for event in events] == [1]
+    assert offset == 1
+
+    db.session.add(OutboxEvent(id=2, type="user.deleted", aggregate_id=2))
+    db.session.commit()
+
+    events, offset = read_events(offset, types=("user.updated",))
+    assert [event.id for event in events] == [3]
+    assert offset == 3
+
+
+def test_rolled_back_offset_is_skipped_after_timeout(app):
+    app.config["OUTBOX_GAP_TIMEOUT"] = 10
+    db.session.add_all(
+        [
+            OutboxEvent(id=1, type="user.updated", aggregate_id=1),
+            OutboxEvent(
+                id=3,
+                type="user.updated",
+                aggregate_id=3,
+                created_at=utcnow() - timedelta(seconds=11),
+            ),
+        ]
+    )
+    db.session.commit()
+
+    events, offset = read_events(0)
+    assert [event.id for event in events] == [1, 3]
+    assert offset == 3
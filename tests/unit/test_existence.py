@@ -0,0 +1,239 @@
+import os
+from unittest import mock
+
+import pytest
+from sqlalchemy import event
+
+from app import db, create_app, create_core_app
+from app.card_number import hash_card_number, luhn_check_digit
+from app.existence import (
+    ACCOUNT_NUMBERS,
+    CARDS,
+    ExistenceFilters,
+    might_exist,
+)
+from app.models import (
+    User,
+    Account,
+    AccountNumber,
+    ExistenceCounter,
+    increment_or_insert,
+)
+from app.repository import get_account_by_number
+from app.sharding import current_partition
+
+
+@pytest.fixture
+def app(tmp_path):
+    test_config = {
+        "SQLALCHEMY_DATABASE_URI": "sqlite:///{}".format(
+            os.path.join(os.path.dirname(__file__), "test.db")
+        ),
+        "SECRET_KEY": "test_secret_key_0123456789",
+        "SQLALCHEMY_TRACK_MODIFICATIONS": False,
+        "BANK_ID": "555511",
+        "EXISTENCE_FILTERS": True,
+        "EXISTENCE_FILTER_DIR": str(tmp_path / "filters"),
+        "EXISTENCE_FILTER_CAPACITY": 1000,
+    }
+    app = create_app(test_config)
+    with app.app_context():
+        db.create_all()
+        yield app
+        app.extensions["existence_filters"].close()
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def login_with_account(client):
+    user = User(
+        name="testuser", email="testuser@example.com", password="password123"
+    )
+    db.session.add(user)
+    db.session.commit()
+    account = Account(
+        user_id=user.id,
+        name="Test Account",
+        password="password",
+        account_number="5555110000001",
+    )
+    db.session.add_all([account, AccountNumber(number="5555110000001")])
+    db.session.commit()
+    client.post(
+        "/auth/login",
+        json={"email": user.email, "password": "password123"},
+    )
+
+    return account
+
+
+def card_number(serial):
+    partial = f"{serial:015d}"
+
+    return partial + luhn_check_digit(partial)
+
+
+def capture_statements():
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", before_cursor_execute)
+
+    return statements, lambda: event.remove(
+        db.engine, "before_cursor_execute", before_cursor_execute
+    )
+
+
+def test_inserts_are_shared_with_other_workers(app, client):
+    account = login_with_account(client)
+    # 다른 워커: 같은 파일을 mmap 으로 여는 별도의 filter 표
+    other = ExistenceFilters(app.config["EXISTENCE_FILTER_DIR"], 1000)
+    partition = current_partition()
+    number = card_number(1)
+    assert hash_card_number(number) not in other.get(partition, CARDS)
+
+    response = client.post(
+        f"/accounts/{account.id}/cards", json={"card_number": number}
+    )
+    assert response.status_code == 201
+    response = client.post(
+        f"/accounts/{account.id}/cards/bulk",
+        json={"card_numbers": [card_number(2)]},
+    )
+    assert response.status_code == 201
+
+    assert hash_card_number(number) in other.get(partition, CARDS)
+    assert hash_card_number(card_number(2)) in other.get(partition, CARDS)
+    assert "5555110000001" in other.get(partition, ACCOUNT_NUMBERS)
+    other.close()
+
+
+def test_definite_miss_skips_database(app, client):
+    login_with_account(client)
+    assert might_exist(ACCOUNT_NUMBERS, "5555110000001")
+    assert not might_exist(ACCOUNT_NUMBERS, "5555110000002")
+    # 처음 쓸 때 filter 를 만드는 조회는 세지 않는다.
+    assert not might_exist(CARDS, hash_card_number(card_number(3)))
+
+    statements, stop = capture_statements()
+    response = client.get(f"/cards/lookup?number={card_number(3)}")
+    stop()
+
+    assert response.status_code == 404
+    assert not any("FROM card" in statement for statement in statements)
+
+
+def test_filter_is_built_from_existing_rows(app, tmp_path):
+    db.session.add(AccountNumber(number="5555110000009"))
+    db.session.commit()
+
+    filters = ExistenceFilters(str(tmp_path / "rebuilt"), 1000)
+    assert "5555110000009" in filters.get(current_partition(), ACCOUNT_NUMBERS)
+    filters.close()
+
+
+def insert_account_number(number):
+    # ORM 을 거치지 않아 filter 에 기록되지 않는 INSERT
+    db.session.execute(AccountNumber.__table__.insert().values(number=number))
+    db.session.commit()
+
+
+def test_filter_behind_database_is_not_trusted(app):
+    filters = app.extensions["existence_filters"]
+    filters.check_interval = 0
+    assert not might_exist(ACCOUNT_NUMBERS, "5555110000005")
+
+    # 다른 호스트는 자기 filter 에 넣고 DB 의 INSERT 수만 더한다.
+    insert_account_number("5555110000005")
+    increment_or_insert(
+        ExistenceCounter, {"kind": ACCOUNT_NUMBERS}, inserted=1
+    )
+    db.session.commit()
+    assert might_exist(ACCOUNT_NUMBERS, "5555110000005")
+    assert might_exist(ACCOUNT_NUMBERS, "5555110000006")
+    assert not might_exist(CARDS, hash_card_number(card_number(1)))
+
+    result = app.test_cli_runner().invoke(args=["filters", "rebuild"])
+    assert "Rebuilt account_numbers filter with 1 keys." in result.output
+    assert might_exist(ACCOUNT_NUMBERS, "5555110000005")
+    assert not might_exist(ACCOUNT_NUMBERS, "5555110000006")
+
+
+def test_own_inserts_keep_filter_trusted(app, client):
+    filters = app.extensions["existence_filters"]
+    filters.check_interval = 0
+    login_with_account(client)
+
+    db.session.add(AccountNumber(number="5555110000007"))
+    db.session.flush()
+    db.session.rollback()
+    assert not might_exist(ACCOUNT_NUMBERS, "5555110000008")
+
+    # 같은 파일을 여는 다른 워커도 commit 한 INSERT 를 mark 로 본다.
+    other = ExistenceFilters(app.config["EXISTENCE_FILTER_DIR"], 1000)
+    bloom = other.get(current_partition(), ACCOUNT_NUMBERS)
+    assert other.is_complete(current_partition(), ACCOUNT_NUMBERS, bloom)
+    other.close()
+
+
+def test_transfer_target_found_without_filter(app, client):
+    account = login_with_account(client)
+    insert_account_number("5555110000005")
+    db.session.execute(
+        Account.__table__.insert().values(
+            user_id=account.user_id,
+            name="Outside",
+            password_hash="x",
+            account_number="5555110000005",
+        )
+    )
+    db.session.commit()
+    assert not might_exist(ACCOUNT_NUMBERS, "5555110000005")
+
+    # 이체 받는 계좌는 filter 가 없다고 해도 DB 에서 찾는다.
+    assert get_account_by_number("5555110000005") is not None
+
+
+@mock.patch("app.views.accounts_views.random.randrange")
+def test_account_number_taken_outside_filter_is_skipped(
+    mock_randrange, app, client
+):
+    login_with_account(client)
+    insert_account_number("5555110000005")
+    mock_randrange.side_effect = [5, 6]
+
+    response = client.post(
+        "/accounts/", json={"name": "New Account", "password": "password"}
+    )
+    assert response.status_code == 201
+    assert response.json["account"]["account_number"] == "5555110000006"
+    assert might_exist(ACCOUNT_NUMBERS, "5555110000005")
+
+
+def test_core_app_opens_filters_only_for_filter_commands(tmp_path):
+    core_app = create_core_app(
+        {
+            "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'core.db'}",
+            "SECRET_KEY": "test_secret_key_0123456789",
+            "BANK_ID": "555511",
+            "EXISTENCE_FILTERS": True,
+            "EXISTENCE_FILTER_DIR": str(tmp_path / "filters"),
+        }
+    )
+    assert "existence_filters" not in core_app.extensions
+    # 명령의 모듈은 그 명령을 찾을 때 등록한다.
+    assert "filters" not in core_app.cli.commands
+    with core_app.app_context():
+        db.create_all()
+
+    result = core_app.test_cli_runner().invoke(args=["filters", "rebuild"])
+    assert "Rebuilt account_numbers filter with 0 keys." in result.output
+    assert "filters" in core_app.cli.commands
+    core_app.extensions["existence_filters"].close()
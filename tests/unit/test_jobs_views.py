@@ -0,0 +1,225 @@
+import json
+import os
+from datetime import date, timedelta
+import pytest
+from unittest import mock
+
+from sqlalchemy import update
+
+from app import db, create_app
+from app.jobs import TASKS, claim_next_job, enqueue, run_job, run_worker
+from app.models import (
+    User,
+    Account,
+    Card,
+    Job,
+    JobStatus,
+    WithdrawalUsage,
+    utcnow,
+)
+
+
+@pytest.fixture
+def app(tmp_path):
+    test_config = {
+        "SQLALCHEMY_DATABASE_URI": "sqlite:///{}".format(
+            os.path.join(os.path.dirname(__file__), "test.db")
+        ),
+        "SECRET_KEY": "test_secret_key_0123456789",
+        "SQLALCHEMY_TRACK_MODIFICATIONS": False,
+        "BANK_ID": "555511",
+        "EXPORT_DIR": str(tmp_path),
+    }
+    app = create_app(test_config)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def login(client, email, password):
+    response = client.post(
+        "/auth/login",
+        json={"email": email, "password": password},
+    )
+    assert response.status_code == 200
+    assert "message" in response.json
+    assert response.json["message"] == "Logged in successfully"
+
+
+def create_test_user():
+    user = User(
+        name="testuser", email="testuser@example.com", password="password123"
+    )
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+@mock.patch("app.jobs.current_app.logger")
+def test_export_job_is_queued_and_polled(mock_logging, app, client):
+    user = create_test_user()
+    login(client, user.email, "password123")
+
+    response = client.post("/users/me/export")
+    assert response.status_code == 202
+    job_id = response.json["job"]["id"]
+    assert response.json["job"]["status"] == "pending"
+
+    assert run_worker(app, once=True) == 1
+
+    response = client.get(f"/jobs/{job_id}")
+    assert response.status_code == 200
+    assert response.json["status"] == "done"
+    assert "file" not in response.json["result"]
+    download_url = response.json["result"]["download_url"]
+    assert download_url == f"/jobs/{job_id}/download"
+
+    response = client.get(download_url)
+    assert response.status_code == 200
+    assert json.loads(response.data)["user"]["e-mail"] == user.email
+
+
+@mock.patch("app.views.jobs_views.current_app.logger")
+def test_download_requires_own_finished_job(mock_logging, app, client):
+    user = create_test_user()
+    other = User(
+        name="other", email="other@example.com", password="password123"
+    )
+    db.session.add(other)
+    db.session.commit()
+    job = enqueue("export_user_data", owner_id=other.id, user_id=other.id)
+    own_job = enqueue("export_user_data", owner_id=user.id, user_id=user.id)
+    db.session.commit()
+    login(client, user.email, "password123")
+
+    assert client.get(f"/jobs/{job.id}/download").status_code == 403
+    # 아직 실행하지 않은 작업에는 파일이 없다.
+    assert client.get(f"/jobs/{own_job.id}/download").status_code == 404
+
+
+@mock.patch("app.jobs.current_app.logger")
+def test_export_masks_card_numbers(mock_logging, app):
+    user = create_test_user()
+    account = Account(
+        user_id=user.id,
+        name="Test Account",
+        password="password",
+        account_number="5555110000001",
+    )
+    db.session.add(account)
+    db.session.commit()
+    db.session.add(
+        Card(
+            user_id=user.id,
+            account_id=account.id,
+            card_number="4111111111111111",
+        )
+    )
+    db.session.commit()
+
+    job = enqueue("export_user_data", user_id=user.id)
+    db.session.commit()
+    run_worker(app, once=True)
+
+    db.session.expire_all()
+    with open(os.path.join(app.config["EXPORT_DIR"], job.result["file"])) as f:
+        cards = json.load(f)["cards"]
+    assert [card["card_number"] for card in cards] == ["************1111"]
+
+
+@mock.patch("app.jobs.current_app.logger")
+def test_failed_job_records_error(mock_logging, app):
+    job = enqueue("export_user_data", user_id=404)
+    db.session.commit()
+
+    run_worker(app, once=True)
+
+    db.session.expire_all()
+    assert job.status == JobStatus.FAILED
+    assert job.error == "ValueError: User id 404 not found"
+    assert job.to_dict()["error"] == "Job failed"
+
+
+@mock.patch("app.jobs.current_app.logger")
+def test_purge_deleted_user_data(mock_logging, app):
+    db.session.add(
+        WithdrawalUsage(
+            subject="card", subject_id=1, day=date.today(), amount=1, count=1
+        )
+    )
+    db.session.commit()
+
+    job = enqueue("purge_deleted_user_data")
+    db.session.commit()
+    run_worker(app, once=True)
+
+    db.session.expire_all()
+    assert job.status == JobStatus.DONE
+    assert job.result == {"card": 1, "account": 0}
+    assert WithdrawalUsage.query.count() == 0
+
+
+@mock.patch("app.jobs.current_app.logger")
+def test_expired_lease_is_reclaimed(mock_logging, app):
+    job = enqueue("purge_deleted_user_data")
+    db.session.commit()
+    assert claim_next_job() == job.id
+    # 실행 중인 다른 워커의 작업은 가져가지 않는다.
+    assert claim_next_job() is None
+
+    # 워커가 죽어 임대를 연장하지 못했다.
+    db.session.execute(
+        update(Job).values(lease_expires_at=utcnow() - timedelta(seconds=1))
+    )
+    db.session.commit()
+
+    assert run_worker(app, once=True) == 1
+    db.session.expire_all()
+    assert job.status == JobStatus.DONE
+    assert job.attempts == 2
+    assert job.lease_expires_at is None
+
+
+@mock.patch("app.jobs.current_app.logger")
+def test_job_fails_after_max_attempts(mock_logging, app):
+    app.config["JOB_MAX_ATTEMPTS"] = 1
+    job = enqueue("purge_deleted_user_data")
+    db.session.commit()
+    assert claim_next_job() == job.id
+    db.session.execute(
+        update(Job).values(lease_expires_at=utcnow() - timedelta(seconds=1))
+    )
+    db.session.commit()
+
+    assert claim_next_job() is None
+    db.session.expire_all()
+    assert job.status == JobStatus.FAILED
+    assert job.error == "Lease expired after 1 attempts"
+
+
+@mock.patch("app.jobs.current_app.logger")
+def test_job_that_lost_its_lease_discards_result(mock_logging, app):
+    def slow_task():
+        # 실행하는 동안 임대가 끝나 다른 워커가 다시 가져갔다.
+        db.session.execute(update(Job).values(attempts=Job.attempts + 1))
+        db.session.commit()
+
+        return "stale"
+
+    job = enqueue("purge_deleted_user_data")
+    db.session.commit()
+    claim_next_job()
+
+    with mock.patch.dict(TASKS, {"purge_deleted_user_data": slow_task}):
+        run_job(job.id)
+
+    db.session.expire_all()
+    assert job.status == JobStatus.RUNNING
+    assert job.result is None
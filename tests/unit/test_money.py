@@ -0,0 +1,85 @@
+import os
+from decimal import Decimal
+import pytest
+
+from app import db, create_app
+from app.models import FxRate
+from app.money import Money, MoneyError, fx_rates
+
+
+@pytest.fixture
+def app():
+    test_config = {
+        "SQLALCHEMY_DATABASE_URI": "sqlite:///{}".format(
+            os.path.join(os.path.dirname(__file__), "test.db")
+        ),
+        "SECRET_KEY": "test_secret_key_0123456789",
+        "SQLALCHEMY_TRACK_MODIFICATIONS": False,
+        "BANK_ID": "555511",
+    }
+    app = create_app(test_config)
+    with app.app_context():
+        db.create_all()
+        fx_rates.clear()
+        yield app
+        fx_rates.clear()
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.mark.parametrize("amount", [10.5, "100", True, None])
+def test_money_rejects_non_integer_amount(amount):
+    with pytest.raises(MoneyError):
+        Money(amount)
+
+
+def test_money_from_request():
+    assert Money.from_request(1500, "usd") == Money(1500, "USD")
+
+    with pytest.raises(MoneyError, match="positive"):
+        Money.from_request(0)
+    with pytest.raises(MoneyError, match="Unsupported currency"):
+        Money.from_request(100, "XYZ")
+
+
+def test_money_arithmetic():
+    assert Money(1500, "USD") - Money(500, "USD") == Money(1000, "USD")
+    assert -Money(300) == Money(-300, "KRW")
+    assert Money(100) < Money(200)
+
+    with pytest.raises(MoneyError, match="Currency mismatch"):
+        Money(100, "USD") + Money(100, "EUR")
+    with pytest.raises(MoneyError, match="Currency mismatch"):
+        Money(100, "USD") < Money(100)
+
+
+def test_fx_rates_convert_between_minor_units(app):
+    db.session.add_all(
+        [
+            FxRate(currency="USD", rate=Decimal("1380.50")),
+            FxRate(currency="JPY", rate=Decimal("9.2")),
+        ]
+    )
+    db.session.commit()
+
+    assert fx_rates.to_base(Money(1000, "USD")) == Money(13805, "KRW")
+    assert fx_rates.convert(Money(13805), "USD") == Money(1000, "USD")
+    assert fx_rates.convert(Money(100, "USD"), "JPY") == Money(150, "JPY")
+
+
+def test_fx_rates_are_cached_until_ttl(app):
+    db.session.add(FxRate(currency="USD", rate=Decimal("1000")))
+    db.session.commit()
+    assert fx_rates.to_base(Money(100, "USD")) == Money(1000)
+
+    db.session.get(FxRate, "USD").rate = Decimal("2000")
+    db.session.commit()
+    assert fx_rates.to_base(Money(100, "USD")) == Money(1000)
+
+    app.config["FX_RATES_TTL"] = 0
+    assert fx_rates.to_base(Money(100, "USD")) == Money(2000)
+
+
+def test_fx_rates_missing_rate(app):
+    with pytest.raises(MoneyError, match="No exchange rate for EUR"):
+        fx_rates.to_base(Money(100, "EUR"))
@@ -0,0 +1,131 @@
+import os
+import pytest
+from unittest import mock
+
+from sqlalchemy import event, text
+
+from app import db, create_app
+from app.models import User, Account, Card
+from app.profiling import _before_cursor_execute
+
+
+@pytest.fixture
+def app():
+    test_config = {
+        "SQLALCHEMY_DATABASE_URI": "sqlite:///{}".format(
+            os.path.join(os.path.dirname(__file__), "test.db")
+        ),
+        "SECRET_KEY": "test_secret_key_0123456789",
+        "SQLALCHEMY_TRACK_MODIFICATIONS": False,
+        "BANK_ID": "555511",
+        "SQL_PROFILING": True,
+        "SQL_PROFILING_HEADERS": True,
+        "SQL_PROFILING_SAMPLE_RATE": 1.0,
+        "SQL_SLOW_QUERY_MS": None,
+    }
+    app = create_app(test_config)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def login(client, email, password):
+    response = client.post(
+        "/auth/login",
+        json={"email": email, "password": password},
+    )
+    assert response.status_code == 200
+
+
+def create_user_with_cards(count):
+    user = User(
+        name="testuser", email="testuser@example.com", password="password123"
+    )
+    db.session.add(user)
+    db.session.commit()
+
+    for i in range(count):
+        account = Account(
+            user_id=user.id,
+            name=f"Account {i}",
+            password="password",
+            account_number=f"555511{i:07d}",
+        )
+        db.session.add(account)
+        db.session.commit()
+        db.session.add(
+            Card(
+                user_id=user.id, account_id=account.id, card_number=f"{i:016d}"
+            )
+        )
+        db.session.commit()
+
+    return user
+
+
+def test_query_stats_headers(client):
+    user = create_user_with_cards(1)
+    login(client, user.email, "password123")
+    db.session.remove()
+
+    response = client.get("/users/me")
+    assert response.status_code == 200
+    assert int(response.headers["X-DB-Query-Count"]) >= 1
+    assert float(response.headers["X-DB-Time-ms"]) >= 0
+    assert response.headers["X-DB-Duplicate-Queries"] == "0"
+
+
+@mock.patch("app.profiling.slow_query_logger")
+def test_repeated_queries_are_reported(mock_logger, client):
+    user = create_user_with_cards(3)
+    login(client, user.email, "password123")
+    db.session.remove()
+
+    # 카드마다 계좌를 따로 불러오는 N+1 패턴
+    response = client.get("/cards/")
+    assert response.status_code == 200
+    assert int(response.headers["X-DB-Duplicate-Queries"]) >= 2
+    mock_logger.warning.assert_called_once()
+    assert "Repeated queries on GET /cards/" in (
+        mock_logger.warning.call_args.args[0]
+    )
+
+
+def test_failed_query_pops_start_time(app):
+    with db.engine.connect() as conn:
+        with pytest.raises(Exception):
+            conn.execute(text("SELECT * FROM missing_table"))
+        assert conn.info["query_start_time"] == []
+
+
+def test_shard_and_tenant_engines_are_profiled(app, tmp_path):
+    shards = app.extensions["shards"]
+    shards.uris.append(f"sqlite:///{tmp_path / 'shard1.db'}")
+    tenants = create_app(
+        {
+            "SQLALCHEMY_DATABASE_URI": "sqlite://",
+            "SECRET_KEY": "test_secret_key_0123456789",
+            "SQL_PROFILING": True,
+            "TENANTS": {
+                "acme": {
+                    "bank_id": "777711",
+                    "database_uri": f"sqlite:///{tmp_path / 'acme.db'}",
+                },
+            },
+        }
+    ).extensions["tenants"]
+
+    for engine in (shards.engine(1), tenants.engine("acme")):
+        assert event.contains(
+            engine, "before_cursor_execute", _before_cursor_execute
+        )
+
+    shards.dispose()
+    tenants.dispose()
@@ -0,0 +1,115 @@
+import os
+import threading
+import pytest
+from unittest import mock
+
+from app import db, create_app
+from app.outbox import emit, read_events
+from app.pubsub import Broker, balance_channel, broker, run_outbox_fanout
+
+
+@pytest.fixture
+def app():
+    test_config = {
+        "SQLALCHEMY_DATABASE_URI": "sqlite:///{}".format(
+            os.path.join(os.path.dirname(__file__), "test.db")
+        ),
+        "SECRET_KEY": "test_secret_key_0123456789",
+        "SQLALCHEMY_TRACK_MODIFICATIONS": False,
+        "BANK_ID": "555511",
+    }
+    app = create_app(test_config)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def test_broker_drops_oldest_message_for_slow_subscriber():
+    test_broker = Broker(maxsize=2)
+    subscriber = test_broker.subscribe("channel")
+    other = test_broker.subscribe("other")
+
+    for balance in (1, 2, 3):
+        assert test_broker.publish("channel", balance) == 1
+
+    assert subscriber.get_nowait() == 2
+    assert subscriber.get_nowait() == 3
+    assert other.empty()
+
+    test_broker.unsubscribe("channel", subscriber)
+    assert test_broker.publish("channel", 4) == 0
+
+
+def test_outbox_fanout_publishes_balance_changes(app):
+    subscriber = broker.subscribe(balance_channel(7))
+    stop = threading.Event()
+    thread = threading.Thread(
+        target=run_outbox_fanout,
+        args=(app,),
+        kwargs={"poll_timeout": 0.1, "stop": stop, "after": 0},
+    )
+    thread.start()
+    try:
+        emit("user.updated", 1, 1)
+        emit(
+            "account.balance_changed",
+            7,
+            1,
+            card_id=None,
+            amount=500,
+            currency="KRW",
+            balance=500,
+        )
+        db.session.commit()
+
+        message = subscriber.get(timeout=5)
+    finally:
+        stop.set()
+        thread.join()
+        broker.unsubscribe(balance_channel(7), subscriber)
+
+    assert message == {"account_id": 7, "currency": "KRW", "balance": 500}
+
+
+def test_outbox_fanout_survives_database_errors(app):
+    subscriber = broker.subscribe(balance_channel(7))
+    stop = threading.Event()
+    calls = []
+
+    def flaky_read_events(*args, **kwargs):
+        calls.append(args)
+        if len(calls) == 1:
+            raise RuntimeError("database is unavailable")
+        return read_events(*args, **kwargs)
+
+    emit(
+        "account.balance_changed",
+        7,
+        1,
+        card_id=None,
+        amount=500,
+        currency="KRW",
+        balance=500,
+    )
+    db.session.commit()
+
+    with mock.patch(
+        "app.pubsub.read_events", side_effect=flaky_read_events
+    ), mock.patch.object(app.logger, "exception") as mock_exception:
+        thread = threading.Thread(
+            target=run_outbox_fanout,
+            args=(app,),
+            kwargs={"poll_timeout": 0.1, "stop": stop, "after": 0},
+        )
+        thread.start()
+        try:
+            message = subscriber.get(timeout=5)
+        finally:
+            stop.set()
+            thread.join()
+            broker.unsubscribe(balance_channel(7), subscriber)
+
+    assert message == {"account_id": 7, "currency": "KRW", "balance": 500}
+    mock_exception.assert_called_once()
@@ -0,0 +1,82 @@
+import os
+import pytest
+from sqlalchemy import select, text
+
+from app import db, create_app
+from app.models import User, Account, Card
+from app.warmup import warmup
+
+
+@pytest.fixture
+def app():
+    test_config = {
+        "SQLALCHEMY_DATABASE_URI": "sqlite:///{}".format(
+            os.path.join(os.path.dirname(__file__), "test.db")
+        ),
+        "SECRET_KEY": "test_secret_key_0123456789",
+        "SQLALCHEMY_TRACK_MODIFICATIONS": False,
+        "BANK_ID": "555511",
+    }
+    app = create_app(test_config)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+# views 에서 요청마다 실행되는 조회 쿼리 목록.
+HOT_QUERIES = {
+    "user_by_email": select(User).filter_by(email="a@example.com"),
+    "accounts_by_user": select(Account).filter_by(user_id=1),
+    "cards_by_user": select(Card).filter_by(user_id=1),
+    "cards_by_user_and_account": select(Card).filter_by(
+        user_id=1, account_id=1
+    ),
+    "card_by_id_and_account": select(Card).filter_by(id=1, account_id=1),
+    "card_by_number_hash": select(Card).filter_by(card_number_hash="0" * 64),
+    "cards_of_account": select(Card).filter_by(account_id=1),
+}
+
+
+def explain(statement):
+    compiled = statement.compile(
+        dialect=db.engine.dialect, compile_kwargs={"literal_binds": True}
+    )
+    rows = db.session.execute(text(f"EXPLAIN QUERY PLAN {compiled}"))
+    return [row.detail for row in rows]
+
+
+@pytest.mark.parametrize("name", HOT_QUERIES)
+def test_hot_query_uses_index(app, name):
+    plan = explain(HOT_QUERIES[name])
+
+    assert not any(
+        detail.startswith("SCAN") for detail in plan
+    ), f"{name} falls back to a full table scan: {plan}"
+
+
+def test_warmup_opens_connections_and_fills_cache(app):
+    app.config["WARMUP_CONNECTIONS"] = 3
+    user = User(name="testuser", email="a@example.com", password="pw")
+    db.session.add(user)
+    db.session.commit()
+    account = Account(
+        user_id=user.id,
+        name="Test Account",
+        password="pw",
+        account_number="5555110000000",
+    )
+    db.session.add(account)
+    db.session.commit()
+    db.session.add(
+        Card(user_id=user.id, account_id=account.id, card_number="0" * 16)
+    )
+    db.session.commit()
+    db.session.remove()
+    db.engine.dispose()
+
+    warmup(app)
+
+    assert db.engine.pool.checkedin() == 3
+    assert len(db.engine._compiled_cache) > 0
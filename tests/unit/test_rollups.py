@@ -0,0 +1,191 @@
+import os
+from datetime import date, datetime, timezone
+
+import pytest
+from sqlalchemy import event
+
+from app import db, create_app
+from app.models import (
+    User,
+    Account,
+    AccountHistory,
+    Card,
+    CardStatus,
+    DailyRollup,
+)
+from app.money import Money
+from app.rollups import (
+    parse_summary_range,
+    rebuild_rollups,
+    summarize_accounts,
+)
+
+
+@pytest.fixture
+def app():
+    test_config = {
+        "SQLALCHEMY_DATABASE_URI": "sqlite:///{}".format(
+            os.path.join(os.path.dirname(__file__), "test.db")
+        ),
+        "SECRET_KEY": "test_secret_key_0123456789",
+        "SQLALCHEMY_TRACK_MODIFICATIONS": False,
+        "BANK_ID": "555511",
+    }
+    app = create_app(test_config)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def create_accounts_with_cards(count):
+    user = User(
+        name="testuser", email="testuser@example.com", password="password123"
+    )
+    db.session.add(user)
+    db.session.commit()
+
+    cards = []
+    for i in range(count):
+        account = Account(
+            user_id=user.id,
+            name=f"Account {i}",
+            password="password",
+            account_number=f"555511{i:07d}",
+            balance=0,
+        )
+        db.session.add(account)
+        db.session.commit()
+        card = Card(
+            user_id=user.id,
+            account_id=account.id,
+            card_number=f"{i:016d}",
+            state=CardStatus.ENABLED,
+        )
+        db.session.add(card)
+        db.session.commit()
+        cards.append(card)
+
+    return cards
+
+
+def rollup_rows():
+    return {
+        (r.account_id, r.card_id, r.currency): (
+            r.count,
+            r.amount_in,
+            r.amount_out,
+        )
+        for r in DailyRollup.query.all()
+    }
+
+
+def test_move_balance_updates_account_and_card_rollups(app):
+    card = create_accounts_with_cards(1)[0]
+    card.deposit(card.account, Money(1000))
+    card.withdraw(card.account, Money(300))
+    card.account.move_balance(Money(500, "USD"))
+    db.session.commit()
+
+    account_id = card.account.id
+    assert rollup_rows() == {
+        (account_id, 0, "KRW"): (2, 1000, 300),
+        (account_id, card.id, "KRW"): (2, 1000, 300),
+        (account_id, 0, "USD"): (1, 500, 0),
+    }
+
+
+def test_summarize_accounts_in_one_query(app):
+    cards = create_accounts_with_cards(3)
+    for i, card in enumerate(cards):
+        card.deposit(card.account, Money(1000 * (i + 1)))
+    cards[0].account.transfer(cards[1].account, Money(400))
+    db.session.commit()
+
+    today = datetime.now(timezone.utc).date()
+    account_ids = [card.account.id for card in cards[:2]]
+    summary = summarize_accounts(account_ids, today, today, "month")
+
+    assert summary["totals"] == [
+        {
+            "currency": "KRW",
+            "count": 4,
+            "amount_in": 3400,
+            "amount_out": 400,
+            "net": 3000,
+        }
+    ]
+    assert [row["account_id"] for row in summary["accounts"]] == account_ids
+    assert summary["periods"][0]["period"] == today.strftime("%Y-%m")
+
+
+def test_rebuild_rollups_matches_incremental(app):
+    cards = create_accounts_with_cards(2)
+    for card in cards:
+        card.deposit(card.account, Money(1000))
+        card.withdraw(card.account, Money(300))
+    cards[0].account.transfer(cards[1].account, Money(200))
+    db.session.commit()
+    expected = rollup_rows()
+
+    DailyRollup.query.delete()
+    db.session.commit()
+
+    assert rebuild_rollups() == len(expected)
+    assert rollup_rows() == expected
+
+
+def test_parse_summary_range_limits():
+    assert parse_summary_range(
+        {"from": "2026-01-01", "to": "2026-01-31", "period": "month"}, 366
+    ) == (date(2026, 1, 1), date(2026, 1, 31), "month")
+
+    with pytest.raises(ValueError):
+        parse_summary_range({"from": "2025-01-01", "to": "2026-06-01"}, 366)
+
+    with pytest.raises(ValueError):
+        parse_summary_range({"period": "week"}, 366)
+
+
+def test_move_balance_upserts_rollups_without_reading(app):
+    card = create_accounts_with_cards(1)[0]
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        card.deposit(card.account, Money(1000))
+        card.deposit(card.account, Money(500))
+        db.session.commit()
+    finally:
+        event.remove(db.engine, "before_cursor_execute", before_cursor_execute)
+
+    rollup_statements = [s for s in statements if "daily_rollup" in s]
+    assert len(rollup_statements) == 4
+    assert all("ON CONFLICT" in s for s in rollup_statements)
+    assert rollup_rows()[(card.account.id, card.id, "KRW")] == (2, 1500, 0)
+
+
+@pytest.mark.parametrize("currency", ["KRW", "USD"])
+def test_move_balance_rejects_overdraft_in_the_update(app, currency):
+    card, other = create_accounts_with_cards(2)
+    account = card.account
+    assert account.move_balance(Money(1000, currency), card)
+    db.session.commit()
+
+    # 잔액 확인 없이 호출해도 UPDATE 조건이 잔액보다 큰 출금을 막는다.
+    assert account.move_balance(Money(-800, currency), card)
+    assert not account.move_balance(Money(-800, currency), card)
+    db.session.commit()
+
+    assert account.get_balance(currency) == Money(200, currency)
+    assert AccountHistory.query.count() == 2
+    assert rollup_rows()[(account.id, card.id, currency)] == (2, 1000, 800)
+
+    success, message = account.transfer(other.account, Money(300, currency))
+    assert not success
+    assert "Insufficient balance" in message
+    assert other.account.get_balance(currency) == Money(0, currency)
@@ -0,0 +1,200 @@
+import os
+from datetime import datetime, timedelta, timezone
+import pytest
+from unittest import mock
+
+from app import db, create_app
+from app.models import (
+    User,
+    Account,
+    StandingOrder,
+    TransferInterval,
+    add_months,
+    as_naive_utc,
+)
+from app.money import Money
+from app.scheduler import StandingOrderScheduler, TimingWheel
+
+
+@pytest.fixture
+def app():
+    test_config = {
+        "SQLALCHEMY_DATABASE_URI": "sqlite:///{}".format(
+            os.path.join(os.path.dirname(__file__), "test.db")
+        ),
+        "SECRET_KEY": "test_secret_key_0123456789",
+        "SQLALCHEMY_TRACK_MODIFICATIONS": False,
+        "BANK_ID": "555511",
+    }
+    app = create_app(test_config)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def create_accounts(balance):
+    user = User(
+        name="testuser", email="testuser@example.com", password="password123"
+    )
+    db.session.add(user)
+    db.session.commit()
+
+    accounts = []
+    for i in range(2):
+        account = Account(
+            user_id=user.id,
+            name=f"Account {i}",
+            password="password",
+            account_number=f"555511{i:07d}",
+            balance=0,
+        )
+        db.session.add(account)
+        db.session.commit()
+        accounts.append(account)
+
+    accounts[0].move_balance(Money(balance))
+    db.session.commit()
+
+    return user, accounts
+
+
+def create_order(user, accounts, interval, start_at, amount=1000):
+    order = StandingOrder(
+        user_id=user.id,
+        from_account_id=accounts[0].id,
+        to_account_id=accounts[1].id,
+        amount=amount,
+        interval=interval,
+        start_at=start_at,
+        next_run_at=start_at,
+    )
+    db.session.add(order)
+    db.session.commit()
+
+    return order
+
+
+def test_timing_wheel_returns_due_items_only():
+    wheel = TimingWheel(tick=1, size=10, now=0)
+    wheel.schedule(3, "a")
+    wheel.schedule(3, "b")
+    wheel.schedule(7, "c")
+    wheel.schedule(25, "far")
+
+    assert wheel.advance(2) == []
+    assert wheel.advance(3) == ["a", "b"]
+    assert wheel.advance(20) == ["c"]
+    assert wheel.advance(25) == ["far"]
+
+
+def test_timing_wheel_catches_up_after_downtime():
+    wheel = TimingWheel(tick=1, size=10, now=0)
+    wheel.schedule(5, "a")
+    wheel.schedule(50, "b")
+    wheel.schedule(500, "c")
+
+    assert sorted(wheel.advance(100)) == ["a", "b"]
+    # 이미 지난 시각으로 예약하면 다음 advance 에서 바로 꺼낸다.
+    wheel.schedule(1, "late")
+    assert wheel.advance(100) == ["late"]
+
+
+def test_add_months_clamps_to_month_end():
+    start = datetime(2024, 1, 31, tzinfo=timezone.utc)
+
+    assert add_months(start, 1) == datetime(2024, 2, 29, tzinfo=timezone.utc)
+    assert add_months(start, 2) == datetime(2024, 3, 31, tzinfo=timezone.utc)
+    assert add_months(start, 12) == datetime(2025, 1, 31, tzinfo=timezone.utc)
+
+
+def test_scheduler_runs_missed_monthly_transfers(app):
+    user, accounts = create_accounts(balance=10000)
+    now = datetime.now(timezone.utc)
+    order = create_order(
+        user, accounts, TransferInterval.MONTHLY, add_months(now, -2)
+    )
+    future = create_order(
+        user, accounts, TransferInterval.DAILY, now + timedelta(hours=2)
+    )
+
+    scheduler = StandingOrderScheduler(tick=1, window=3600, now=now)
+    assert scheduler.tick(now) == 3
+
+    db.session.expire_all()
+    assert accounts[0].balance == 7000
+    assert accounts[1].balance == 3000
+    assert order.run_count == 3
+    assert order.next_run_at.replace(tzinfo=timezone.utc) > now
+    assert future.run_count == 0
+    assert future.id not in scheduler.scheduled
+
+    # 이미 실행한 회차는 다시 실행하지 않는다.
+    assert scheduler.tick(now + timedelta(seconds=1)) == 0
+
+
+@mock.patch("app.scheduler.current_app.logger")
+def test_scheduler_records_failed_transfer(mock_logging, app):
+    user, accounts = create_accounts(balance=500)
+    now = datetime.now(timezone.utc)
+    order = create_order(user, accounts, TransferInterval.ONCE, now)
+
+    scheduler = StandingOrderScheduler(tick=1, window=60, now=now)
+    assert scheduler.tick(now) == 1
+
+    db.session.expire_all()
+    assert not order.active
+    assert order.last_error == "FAILED: Insufficient balance for transfer."
+    assert accounts[0].balance == 500
+
+
+@mock.patch("app.scheduler.current_app.logger")
+def test_scheduler_survives_failing_order(mock_logging, app):
+    user, accounts = create_accounts(balance=10000)
+    now = datetime.now(timezone.utc)
+    broken = create_order(user, accounts, TransferInterval.ONCE, now)
+    order = create_order(user, accounts, TransferInterval.ONCE, now)
+
+    transfer = Account.transfer
+
+    def fail_first_order(self, to_account, amount):
+        if db.session.get(StandingOrder, broken.id).run_count == 1:
+            raise RuntimeError("boom")
+
+        return transfer(self, to_account, amount)
+
+    scheduler = StandingOrderScheduler(tick=1, window=60, now=now)
+    with mock.patch.object(Account, "transfer", fail_first_order):
+        assert scheduler.tick(now) == 1
+    mock_logging.exception.assert_called_once()
+
+    db.session.expire_all()
+    # 오류가 난 회차는 되돌려져 다음 load 에서 다시 실행된다.
+    assert broken.active and broken.run_count == 0
+    assert not order.active
+    assert accounts[1].balance == 1000
+
+    scheduler.load(now)
+    assert scheduler.tick(now) == 1
+    db.session.expire_all()
+    assert not broken.active
+    assert accounts[1].balance == 2000
+
+
+def test_next_run_at_is_stored_as_naive_utc(app):
+    user, accounts = create_accounts(balance=10000)
+    kst = timezone(timedelta(hours=9))
+    start_at = datetime(2024, 1, 1, 9, 0, tzinfo=kst)
+    order = create_order(
+        user, accounts, TransferInterval.DAILY, as_naive_utc(start_at)
+    )
+
+    scheduler = StandingOrderScheduler(
+        tick=1, window=60, now=start_at.astimezone(timezone.utc)
+    )
+    scheduler.tick(datetime(2024, 1, 1, 0, 0, 30, tzinfo=timezone.utc))
+
+    db.session.expire_all()
+    assert order.run_count == 1
+    assert order.next_run_at == datetime(2024, 1, 2, 0, 0)
@@ -0,0 +1,372 @@
+import os
+from unittest import mock
+import pytest
+
+from app import db, create_app
+from app.card_number import luhn_check_digit
+from app.models import (
+    Account,
+    AccountNumber,
+    CardShard,
+    ShardTransfer,
+    ShardTransferStatus,
+    User,
+    UserShard,
+)
+from app.money import Money
+from app.rate_limit import token_buckets
+from app.sharding import use_shard
+from app.transfers import recover_transfers
+
+# 2개 shard 에서 alice 는 shard 1, bob 은 shard 0 에 만들어진다.
+ALICE = "alice@example.com"
+BOB = "bob@example.com"
+
+
+@pytest.fixture
+def app(tmp_path):
+    test_config = {
+        "SQLALCHEMY_DATABASE_URI": "sqlite:///{}".format(
+            os.path.join(os.path.dirname(__file__), "test.db")
+        ),
+        "SECRET_KEY": "test_secret_key_0123456789",
+        "SQLALCHEMY_TRACK_MODIFICATIONS": False,
+        "BANK_ID": "555511",
+        "SHARDS": [f"sqlite:///{tmp_path / 'shard1.db'}"],
+        "ARCHIVE_DIR": str(tmp_path / "archive"),
+        "EXPORT_DIR": str(tmp_path / "exports"),
+    }
+    app = create_app(test_config)
+    result = app.test_cli_runner().invoke(args=["shards", "init-db"])
+    assert "Created tables on 2 shards." in result.output
+
+    # 요청마다 app context(= session)가 따로 있어야 shard 별 객체가 섞이지 않는다.
+    yield app
+
+    with app.app_context():
+        db.session.remove()
+        db.drop_all()
+        app.extensions["shards"].dispose()
+
+
+def sign_up(app, email):
+    client = app.test_client()
+    response = client.post(
+        "/auth/create",
+        json={"username": "user", "email": email, "password": "password123"},
+    )
+    assert response.status_code == 200
+    response = client.post(
+        "/auth/login", json={"email": email, "password": "password123"}
+    )
+    assert response.status_code == 200
+
+    return client
+
+
+def create_account(client, balance=0):
+    response = client.post(
+        "/accounts/", json={"name": "Account", "password": "password"}
+    )
+    assert response.status_code == 201
+    account = response.json["account"]
+    if balance:
+        with client.application.app_context():
+            use_shard(int(account["account_number"][-7:]) % 2)
+            db.session.get(Account, account["id"]).move_balance(Money(balance))
+            db.session.commit()
+
+    return account
+
+
+def get_balance(app, shard, account_id):
+    with app.app_context():
+        use_shard(shard)
+        return db.session.get(Account, account_id).balance
+
+
+def test_users_and_accounts_live_on_their_shard(app):
+    alice = sign_up(app, ALICE)
+    bob = sign_up(app, BOB)
+    alice_account = create_account(alice)
+    bob_account = create_account(bob)
+
+    assert int(alice_account["account_number"][-7:]) % 2 == 1
+    assert int(bob_account["account_number"][-7:]) % 2 == 0
+    # 계좌 id 는 shard 마다 따로 매겨진다.
+    assert alice_account["id"] == bob_account["id"] == 1
+
+    with app.app_context():
+        use_shard(1)
+        users = User.query.all()
+        assert [user.email for user in users] == [ALICE]
+        # user_id 는 shard 0 의 전역 목록에서 매기므로 shard 가 달라도 겹치지 않는다.
+        db.session.expunge_all()
+        use_shard(0)
+        assert {(entry.email, entry.shard) for entry in UserShard.query} == {
+            (ALICE, 1),
+            (BOB, 0),
+        }
+        assert len({entry.id for entry in UserShard.query}) == 2
+
+    assert [a["id"] for a in alice.get("/accounts/").json["accounts"]] == [1]
+    assert [a["id"] for a in bob.get("/accounts/").json["accounts"]] == [1]
+
+
+def test_cross_shard_transfer(app):
+    alice = sign_up(app, ALICE)
+    bob = sign_up(app, BOB)
+    alice_account = create_account(alice, balance=10000)
+    bob_account = create_account(bob)
+
+    response = alice.post(
+        f"/accounts/{alice_account['id']}/transfers",
+        json={
+            "to_account_number": bob_account["account_number"],
+            "amount": 3000,
+            "account_password": "password",
+        },
+    )
+    assert response.status_code == 200
+    assert response.json["balance"] == 7000
+    assert get_balance(app, 0, bob_account["id"]) == 3000
+
+    with app.app_context():
+        use_shard(1)
+        out = ShardTransfer.query.one()
+        assert out.status == ShardTransferStatus.COMMITTED
+        # 같은 id 의 "in" 행과 섞이지 않도록 shard 를 바꾸기 전에 session 을 비운다.
+        db.session.expunge_all()
+        use_shard(0)
+        assert ShardTransfer.query.one().direction == "in"
+
+
+def test_cross_shard_transfer_to_missing_account_is_refunded(app):
+    alice = sign_up(app, ALICE)
+    alice_account = create_account(alice, balance=10000)
+
+    response = alice.post(
+        f"/accounts/{alice_account['id']}/transfers",
+        json={
+            "to_account_number": "5555110000002",
+            "amount": 3000,
+            "account_password": "password",
+        },
+    )
+    assert response.status_code == 400
+    assert response.json["error"] == "FAILED: Target account not found."
+    assert get_balance(app, 1, alice_account["id"]) == 10000
+
+    with app.app_context():
+        use_shard(1)
+        assert ShardTransfer.query.one().status == ShardTransferStatus.FAILED
+
+
+def test_transfers_share_the_account_withdrawal_limits(app):
+    app.config["ACCOUNT_DAILY_WITHDRAWAL_LIMIT"] = 5000
+    app.config["TRANSFER_RATE_LIMIT_PER_ACCOUNT"] = (3, 60)
+    token_buckets.clear()
+    alice = sign_up(app, ALICE)
+    bob = sign_up(app, BOB)
+    alice_account = create_account(alice, balance=10000)
+    bob_account = create_account(bob)
+
+    def transfer(amount, password="password"):
+        return alice.post(
+            f"/accounts/{alice_account['id']}/transfers",
+            json={
+                "to_account_number": bob_account["account_number"],
+                "amount": amount,
+                "account_password": password,
+            },
+        )
+
+    assert transfer(3000).status_code == 200
+    response = transfer(3000)
+    assert response.status_code == 400
+    assert response.json["error"] == (
+        "FAILED: Daily account withdrawal limit exceeded."
+    )
+    # 비밀번호를 계속 대입해 보지 못하도록 요청 수도 제한한다.
+    assert transfer(1000, password="wrong").status_code == 401
+    assert transfer(1000).status_code == 429
+    assert get_balance(app, 1, alice_account["id"]) == 7000
+    token_buckets.clear()
+
+
+def test_recover_prepared_transfer_credits_once(app):
+    alice = sign_up(app, ALICE)
+    bob = sign_up(app, BOB)
+    alice_account = create_account(alice, balance=10000)
+    bob_account = create_account(bob)
+
+    # 1단계(출금)만 commit 되고 프로세스가 죽은 이체.
+    with app.app_context():
+        use_shard(1)
+        account = db.session.get(Account, alice_account["id"])
+        account.move_balance(Money(-2000))
+        db.session.add(
+            ShardTransfer(
+                id="a" * 32,
+                direction="out",
+                account_id=account.id,
+                peer_shard=0,
+                peer_account_number=bob_account["account_number"],
+                amount=2000,
+                currency="KRW",
+                status=ShardTransferStatus.PREPARED,
+            )
+        )
+        db.session.commit()
+
+        assert recover_transfers(older_than=0) == 1
+        assert recover_transfers(older_than=0) == 0
+
+    assert get_balance(app, 1, alice_account["id"]) == 8000
+    assert get_balance(app, 0, bob_account["id"]) == 2000
+
+
+def test_transfer_to_account_from_before_sharding(app):
+    # SHARDS 를 켜기 전에 shard 0 에 만든 계좌는 일련번호가 홀수여도 shard 0 에
+    # 있다.
+    legacy_number = "5555110000001"
+    with app.app_context():
+        carol = User(name="carol", email="carol@example.com", password="pw")
+        db.session.add(carol)
+        db.session.commit()
+        db.session.add(AccountNumber(number=legacy_number))
+        db.session.add(
+            Account(
+                user_id=carol.id,
+                name="Legacy",
+                password="password",
+                account_number=legacy_number,
+            )
+        )
+        db.session.commit()
+
+    alice = sign_up(app, ALICE)
+    alice_account = create_account(alice, balance=10000)
+
+    def transfer():
+        return alice.post(
+            f"/accounts/{alice_account['id']}/transfers",
+            json={
+                "to_account_number": legacy_number,
+                "amount": 1000,
+                "account_password": "password",
+            },
+        )
+
+    # 목록에 넣기 전에도 목록에 없는 번호는 shard 0 에서 찾는다.
+    assert transfer().status_code == 200
+    result = app.test_cli_runner().invoke(args=["shards", "directory"])
+    assert "1 accounts" in result.output
+    assert transfer().status_code == 200
+    assert get_balance(app, 0, 1) == 2000
+
+    # 목록에 있는 기존 계좌 번호는 다른 shard 의 새 계좌에 주지 않는다.
+    with mock.patch(
+        "app.views.accounts_views.random.randrange", side_effect=[0, 1]
+    ):
+        account = create_account(alice)
+    assert account["account_number"] == "5555110000003"
+
+
+def card_number(serial):
+    partial = f"{serial:015d}"
+
+    return partial + luhn_check_digit(partial)
+
+
+def test_users_from_before_sharding_keep_working(app):
+    # SHARDS 를 켜기 전에 만든 사용자는 이메일 해시와 관계없이 shard 0 에 있다.
+    with app.app_context():
+        db.session.add(User(name="alice", email=ALICE, password="password123"))
+        db.session.commit()
+
+    alice = app.test_client()
+    response = alice.post(
+        "/auth/login", json={"email": ALICE, "password": "password123"}
+    )
+    assert response.status_code == 200
+    account = create_account(alice)
+    assert alice.get("/accounts/").json["accounts"][0]["id"] == account["id"]
+    response = alice.post(
+        "/auth/token", json={"email": ALICE, "password": "password123"}
+    )
+    headers = {"Authorization": f"Bearer {response.json['access_token']}"}
+    assert alice.get("/accounts/", headers=headers).status_code == 200
+
+    # 새 사용자는 기존 사용자의 id 를 받지 않는다.
+    sign_up(app, BOB)
+    with app.app_context():
+        assert db.session.get(UserShard, 2).email == BOB
+
+    result = app.test_cli_runner().invoke(args=["shards", "directory"])
+    assert "Added 1 users, 0 accounts and 0 cards" in result.output
+
+    response = app.test_client().post(
+        "/auth/create",
+        json={"username": "user", "email": ALICE, "password": "password123"},
+    )
+    assert response.status_code == 400
+    response = alice.post(
+        "/auth/login", json={"email": ALICE, "password": "password123"}
+    )
+    assert response.status_code == 200
+
+
+def test_card_numbers_are_unique_across_shards(app):
+    alice = sign_up(app, ALICE)
+    bob = sign_up(app, BOB)
+    alice_account = create_account(alice)
+    bob_account = create_account(bob)
+    number = card_number(1)
+
+    response = alice.post(
+        f"/accounts/{alice_account['id']}/cards", json={"card_number": number}
+    )
+    assert response.status_code == 201
+    card_id = response.json["card"]["id"]
+
+    response = bob.post(
+        f"/accounts/{bob_account['id']}/cards", json={"card_number": number}
+    )
+    assert response.status_code == 400
+    response = bob.post(
+        f"/accounts/{bob_account['id']}/cards/bulk",
+        json={"card_numbers": [number, card_number(2)]},
+    )
+    assert response.status_code == 201
+    assert len(response.json["cards"]) == 1
+    assert len(response.json["collisions"]) == 1
+
+    response = alice.delete(f"/accounts/{alice_account['id']}/cards/{card_id}")
+    assert response.status_code == 200
+    response = bob.post(
+        f"/accounts/{bob_account['id']}/cards", json={"card_number": number}
+    )
+    assert response.status_code == 201
+    with app.app_context():
+        assert {entry.shard for entry in CardShard.query} == {0}
+
+
+@mock.patch("app.directory.STALE_AFTER", -1)
+def test_cards_of_deleted_account_can_be_registered_elsewhere(app):
+    alice = sign_up(app, ALICE)
+    bob = sign_up(app, BOB)
+    alice_account = create_account(alice)
+    bob_account = create_account(bob)
+    number = card_number(1)
+    alice.post(
+        f"/accounts/{alice_account['id']}/cards", json={"card_number": number}
+    )
+
+    # 계좌와 함께 지워진 카드의 목록 행은 남지만, 다른 shard 가 넘겨받는다.
+    response = alice.delete(f"/accounts/{alice_account['id']}")
+    assert response.status_code == 200
+    response = bob.post(
+        f"/accounts/{bob_account['id']}/cards", json={"card_number": number}
+    )
+    assert response.status_code == 201
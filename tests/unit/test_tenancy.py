@@ -0,0 +1,195 @@
+import os
+from decimal import Decimal
+
+import pytest
+from unittest import mock
+
+from flask import current_app
+
+from sqlalchemy import func, select
+
+from app import db, create_app
+from app.jobs import run_worker
+from app.models import Account, FxRate, TokenRevocation, User
+from app.money import Money, fx_rates
+from app.tenancy import use_tenant
+
+ACME = {"X-Bank-Id": "777711"}
+
+
+@pytest.fixture
+def app(tmp_path):
+    test_config = {
+        "SQLALCHEMY_DATABASE_URI": "sqlite:///{}".format(
+            os.path.join(os.path.dirname(__file__), "test.db")
+        ),
+        "SECRET_KEY": "test_secret_key_0123456789",
+        "SQLALCHEMY_TRACK_MODIFICATIONS": False,
+        "BANK_ID": "555511",
+        "TENANTS": {
+            "acme": {
+                "bank_id": "777711",
+                "database_uri": f"sqlite:///{tmp_path / 'acme.db'}",
+                "hosts": ["acme.example.com"],
+                "pool_size": 2,
+            },
+        },
+        "ARCHIVE_DIR": str(tmp_path / "archive"),
+        "EXPORT_DIR": str(tmp_path / "exports"),
+    }
+    app = create_app(test_config)
+    with app.app_context():
+        db.create_all()
+        db.metadata.create_all(acme_engine())
+        yield app
+        db.session.remove()
+        db.drop_all()
+        db.metadata.drop_all(acme_engine())
+        app.extensions["tenants"].dispose()
+
+
+def acme_engine():
+    return current_app.extensions["tenants"].engine("acme")
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def count_users(engine):
+    with engine.connect() as conn:
+        return conn.execute(select(func.count(User.id))).scalar()
+
+
+def sign_up_and_login(client, headers):
+    client.post(
+        "/auth/create",
+        json={
+            "username": "acme",
+            "email": "acme@example.com",
+            "password": "password123",
+        },
+        headers=headers,
+    )
+    response = client.post(
+        "/auth/login",
+        json={"email": "acme@example.com", "password": "password123"},
+        headers=headers,
+    )
+    assert response.status_code == 200
+
+
+def test_tenant_requests_use_tenant_database(app, client):
+    sign_up_and_login(client, ACME)
+
+    response = client.post(
+        "/accounts/",
+        json={"name": "Acme Account", "password": "password"},
+        headers=ACME,
+    )
+    assert response.status_code == 201
+    assert response.json["account"]["account_number"].startswith("777711")
+
+    assert count_users(acme_engine()) == 1
+    assert count_users(db.engine) == 0
+    with acme_engine().connect() as conn:
+        assert conn.execute(select(func.count(Account.id))).scalar() == 1
+
+
+def test_tenant_resolved_from_host(app, client):
+    sign_up_and_login(client, {"Host": "acme.example.com"})
+
+    assert count_users(acme_engine()) == 1
+    assert count_users(db.engine) == 0
+
+
+def test_login_does_not_carry_over_to_other_bank(app, client):
+    sign_up_and_login(client, ACME)
+
+    assert client.get("/accounts/", headers=ACME).status_code == 200
+    assert client.get("/accounts/").status_code == 302
+
+
+@mock.patch("app.tenancy.current_app.logger")
+def test_unknown_bank_id(mock_logging, client):
+    response = client.get("/accounts/", headers={"X-Bank-Id": "999999"})
+    assert response.status_code == 404
+    assert response.json["error"] == "Unknown bank"
+
+
+@mock.patch("app.jobs.current_app.logger")
+def test_worker_processes_configured_bank(mock_logging, app, client):
+    sign_up_and_login(client, ACME)
+    response = client.post("/users/me/export", headers=ACME)
+    assert response.status_code == 202
+    job_id = response.json["job"]["id"]
+
+    # 기본 은행의 워커는 다른 은행의 작업을 보지 않는다.
+    assert run_worker(app, once=True) == 0
+
+    app.config["TENANT"] = "acme"
+    assert run_worker(app, once=True) == 1
+
+    response = client.get(f"/jobs/{job_id}", headers=ACME)
+    assert response.json["status"] == "done"
+
+
+def test_unknown_worker_bank_is_rejected():
+    with pytest.raises(RuntimeError):
+        create_app(
+            {
+                "SECRET_KEY": "test_secret_key_0123456789",
+                "BANK_ID": "555511",
+                "TENANT": "acme",
+            }
+        )
+
+
+def test_user_token_revocation_is_per_bank(app, client):
+    tokens = {}
+    for bank, headers in (("default", {}), ("acme", ACME)):
+        client.post(
+            "/auth/create",
+            json={
+                "username": bank,
+                "email": f"{bank}@example.com",
+                "password": "password123",
+            },
+            headers=headers,
+        )
+        response = client.post(
+            "/auth/token",
+            json={"email": f"{bank}@example.com", "password": "password123"},
+            headers=headers,
+        )
+        tokens[bank] = {
+            "Authorization": f"Bearer {response.json['access_token']}"
+        }
+
+    # 두 은행에 같은 id 의 사용자가 있다.
+    response = client.delete("/users/me", headers={**tokens["acme"], **ACME})
+    assert response.status_code == 200
+
+    response = client.get("/accounts/", headers={**tokens["acme"], **ACME})
+    assert response.status_code == 401
+    assert (
+        client.get("/accounts/", headers=tokens["default"]).status_code == 200
+    )
+    with acme_engine().connect() as conn:
+        revocation = conn.execute(select(TokenRevocation)).one()
+    assert (revocation.tenant, revocation.user_id) == ("acme", 1)
+
+
+def test_fx_rates_are_cached_per_bank(app):
+    fx_rates.clear()
+    db.session.add(FxRate(currency="USD", rate=Decimal("1000")))
+    db.session.commit()
+    use_tenant("acme")
+    db.session.add(FxRate(currency="USD", rate=Decimal("2000")))
+    db.session.commit()
+
+    assert fx_rates.to_base(Money(100, "USD")) == Money(2000)
+    use_tenant(None)
+    assert fx_rates.to_base(Money(100, "USD")) == Money(1000)
+    fx_rates.clear()
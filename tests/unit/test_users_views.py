@@ -1,9 +1,10 @@
 import os
 import pytest
 from unittest import mock
+from sqlalchemy import event
 
 from app import db, create_app
-from app.models import User
+from app.models import User, Account, Card, CardStatus
 
 
 @pytest.fixture
@@ -12,7 +13,7 @@ def app():
         "SQLALCHEMY_DATABASE_URI": "sqlite:///{}".format(
             os.path.join(os.path.dirname(__file__), "test.db")
         ),
-        "SECRET_KEY": "test_secret_key",
+        "SECRET_KEY": "test_secret_key_0123456789",
         "SQLALCHEMY_TRACK_MODIFICATIONS": False,
         "BANK_ID": "555511",
     }
@@ -119,3 +120,97 @@ def test_update_user_info_with_incorrect_password(
     user = User.query.filter_by(email="testuser@example.com").first()
     assert user.name == "testuser"
     assert user.verify_password("password123")
+
+
+@mock.patch("app.views.users_views.current_app.logger")
+def test_disable_all_my_cards(mock_logging, client):
+    user = create_test_user()
+    login(client, user.email, "password123")
+    account = Account(
+        user_id=user.id,
+        name="Test Account",
+        password="password",
+        account_number="5555110000001",
+    )
+    db.session.add(account)
+    db.session.commit()
+    cards = [
+        Card(
+            user_id=user.id,
+            account_id=account.id,
+            card_number=f"000000000000000{i}",
+            state=CardStatus.ENABLED,
+        )
+        for i in range(3)
+    ]
+    db.session.add_all(cards)
+    db.session.commit()
+
+    response = client.put("/users/me/cards/disable")
+    assert response.status_code == 200
+    assert response.json["state"] == "disabled"
+    assert response.json["cards"] == [card.id for card in cards]
+
+    response = client.put("/users/me/cards/enable")
+    assert response.status_code == 200
+    assert response.json["cards"] == [card.id for card in cards]
+
+
+@mock.patch("app.views.users_views.current_app.logger")
+def test_delete_user_cascades_without_loading_children(mock_logging, client):
+    user = create_test_user()
+    login(client, user.email, "password123")
+    account = Account(
+        user_id=user.id,
+        name="Test Account",
+        password="password",
+        account_number="5555110000001",
+    )
+    db.session.add(account)
+    db.session.commit()
+    db.session.add(
+        Card(
+            user_id=user.id,
+            account_id=account.id,
+            card_number="0000000000000001",
+        )
+    )
+    db.session.commit()
+    db.session.expunge_all()
+
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", before_cursor_execute)
+    response = client.delete("/users/me")
+    event.remove(db.engine, "before_cursor_execute", before_cursor_execute)
+
+    assert not any(
+        statement.startswith("SELECT")
+        and ("FROM account" in statement or "FROM card" in statement)
+        for statement in statements
+    )
+    assert response.status_code == 200
+    assert db.session.query(Account).count() == 0
+    assert db.session.query(Card).count() == 0
+
+
+@mock.patch("app.views.users_views.current_app.logger")
+def test_update_user_info_with_stale_etag(mock_logging, logged_in_client):
+    etag = logged_in_client.get("/users/me").headers["ETag"]
+
+    response = logged_in_client.put(
+        "/users/me", json={"name": "first"}, headers={"If-Match": etag}
+    )
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+    response = logged_in_client.put(
+        "/users/me", json={"name": "second"}, headers={"If-Match": etag}
+    )
+    assert response.status_code == 409
+
+    user = User.query.filter_by(email="testuser@example.com").first()
+    assert user.name == "first"